@@ -0,0 +1,18 @@
+"""
+Shared request dependencies for the API routers.
+"""
+from fastapi import Depends
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.db.session import get_db, get_read_db
+from app.services.user_loader import UserLoader
+
+
+async def get_user_loader(db: AsyncSession = Depends(get_db)) -> UserLoader:
+    """Dependency to get the request's loader on the primary session."""
+    return UserLoader(db)
+
+
+async def get_read_user_loader(db: AsyncSession = Depends(get_read_db)) -> UserLoader:
+    """Dependency to get the request's loader on the read-only session."""
+    return UserLoader(db)
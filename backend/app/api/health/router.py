@@ -1,14 +1,15 @@
 """
 Health check endpoints.
+
+Readiness and detailed checks report the cached results of the background
+``health_prober`` rather than querying dependencies per request.
 """
 from typing import Dict, Any
 
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import text
+from fastapi import APIRouter, HTTPException
 
-from app.db.session import get_db
 from app.core.config import settings
+from app.core.health import health_prober
 from app.core.logging import get_logger
 
 router = APIRouter()
@@ -26,29 +27,28 @@ async def health_check() -> Dict[str, Any]:
 
 
 @router.get("/ready")
-async def readiness_check(db: AsyncSession = Depends(get_db)) -> Dict[str, Any]:
+async def readiness_check() -> Dict[str, Any]:
     """Readiness check including database connectivity."""
-    try:
-        # Check database connectivity
-        result = await db.execute(text("SELECT 1"))
-        result.fetchone()
-        
-        return {
-            "status": "ready",
-            "database": "connected",
-            "environment": settings.ENVIRONMENT,
-        }
-    except Exception as e:
-        logger.error("Readiness check failed", error=str(e))
+    checks = health_prober.snapshot()
+    database = checks["database"]
+    if database["status"] != "healthy":
         raise HTTPException(
             status_code=503,
             detail={
                 "status": "not ready",
                 "database": "disconnected",
-                "error": str(e),
+                "error": database.get("error", f"database check {database['status']}"),
+                "age_seconds": database.get("age_seconds"),
             }
         )
 
+    return {
+        "status": "ready",
+        "database": "connected",
+        "environment": settings.ENVIRONMENT,
+        "age_seconds": database["age_seconds"],
+    }
+
 
 @router.get("/live")
 async def liveness_check() -> Dict[str, Any]:
@@ -60,36 +60,23 @@ async def liveness_check() -> Dict[str, Any]:
 
 
 @router.get("/detailed")
-async def detailed_health_check(db: AsyncSession = Depends(get_db)) -> Dict[str, Any]:
+async def detailed_health_check() -> Dict[str, Any]:
     """Detailed health check with all service dependencies."""
+    checks = health_prober.snapshot()
     health_status = {
-        "status": "healthy",
+        "status": "healthy" if health_prober.is_healthy() else "unhealthy",
         "environment": settings.ENVIRONMENT,
         "version": settings.VERSION,
         "checks": {
-            "database": "unknown",
+            "database": checks["database"]["status"],
             "gcp_secret_manager": "unknown",
-        }
+        },
+        "probes": checks,
     }
-    
-    # Check database
-    try:
-        result = await db.execute(text("SELECT 1"))
-        result.fetchone()
-        health_status["checks"]["database"] = "healthy"
-    except Exception as e:
-        health_status["checks"]["database"] = "unhealthy"
-        health_status["status"] = "unhealthy"
-        logger.error("Database health check failed", error=str(e))
-    
+
     # Check GCP Secret Manager (if enabled)
     if settings.SECRET_MANAGER_ENABLED:
-        try:
-            # This would be a more comprehensive check in production
-            health_status["checks"]["gcp_secret_manager"] = "healthy"
-        except Exception as e:
-            health_status["checks"]["gcp_secret_manager"] = "unhealthy"
-            health_status["status"] = "unhealthy"
-            logger.error("GCP Secret Manager health check failed", error=str(e))
-    
-    return health_status 
\ No newline at end of file
+        # This would be a more comprehensive check in production
+        health_status["checks"]["gcp_secret_manager"] = "healthy"
+
+    return health_status
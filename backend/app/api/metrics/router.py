@@ -0,0 +1,59 @@
+"""
+Prometheus metrics endpoint.
+
+Metrics describe the deployment (pool sizes, shed load, error rates), so
+they are only served to scrapers in ``METRICS_ALLOWED_NETWORKS`` or sending
+``METRICS_BEARER_TOKEN``; anyone else gets 404.
+"""
+import hmac
+import ipaddress
+
+from fastapi import APIRouter, Depends, HTTPException, Request
+from fastapi.responses import PlainTextResponse
+
+from app.core.config import settings
+from app.core.metrics import CONTENT_TYPE, registry
+
+router = APIRouter()
+
+_allowed_networks = tuple(
+    ipaddress.ip_network(network, strict=False)
+    for network in settings.METRICS_ALLOWED_NETWORKS
+)
+
+
+def _client_allowed(request: Request) -> bool:
+    if request.client is None:
+        return False
+    try:
+        address = ipaddress.ip_address(request.client.host)
+    except ValueError:
+        return False
+    return any(address in network for network in _allowed_networks)
+
+
+def _token_valid(request: Request) -> bool:
+    if not settings.METRICS_BEARER_TOKEN:
+        return False
+    scheme, _, token = request.headers.get("authorization", "").partition(" ")
+    return scheme.lower() == "bearer" and hmac.compare_digest(
+        token.strip().encode(), settings.METRICS_BEARER_TOKEN.encode()
+    )
+
+
+async def require_metrics_access(request: Request) -> None:
+    """Dependency refusing scrapers outside the allowlist without the token."""
+    if not (_client_allowed(request) or _token_valid(request)):
+        # 404 rather than 401/403, so the endpoint is not advertised
+        raise HTTPException(status_code=404, detail="Not Found")
+
+
+@router.get(
+    "",
+    response_class=PlainTextResponse,
+    include_in_schema=False,
+    dependencies=[Depends(require_metrics_access)],
+)
+async def metrics() -> PlainTextResponse:
+    """Expose application metrics in Prometheus text format."""
+    return PlainTextResponse(registry.render(), media_type=CONTENT_TYPE)
@@ -1,15 +1,20 @@
 """
 Admin endpoints for system administration.
 """
-from typing import Any, Dict
+from datetime import datetime, timezone
+from typing import Any, Dict, Literal, Optional
 
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi.responses import StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.core.security import get_current_user
+from app.core.log_store import log_store
+from app.core.security import get_current_active_superuser, get_current_user
+from app.core.serialization import FastJSONResponse
 from app.db.session import get_db
 from app.schemas.user import User
 from app.services.admin import get_system_stats, get_user_stats
+from app.services.export import EXPORT_FORMATS, stream_users_export
 from app.core.logging import get_logger
 
 router = APIRouter()
@@ -52,14 +57,61 @@ async def get_user_statistics(
         )
 
 
-@router.get("/logs")
+@router.get("/export/users")
+async def export_users(
+    format: Literal["csv", "ndjson"] = "ndjson",
+    gzip: bool = False,
+    current_user: User = Depends(get_current_active_superuser),
+) -> Any:
+    """Stream every user as CSV or NDJSON, optionally gzipped (superuser only)."""
+    filename = f"users-{datetime.now(timezone.utc):%Y%m%dT%H%M%SZ}.{format}"
+    if gzip:
+        filename += ".gz"
+        media_type = "application/gzip"
+    else:
+        media_type = EXPORT_FORMATS[format]
+    return StreamingResponse(
+        stream_users_export(format, compress=gzip),
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
+
+
+@router.get("/logs", response_class=FastJSONResponse)
 async def get_system_logs(
-    current_user: User = Depends(get_current_user),
-    limit: int = 100,
+    level: Optional[Literal["debug", "info", "warning", "error", "critical"]] = None,
+    logger_name: Optional[str] = Query(None, alias="logger"),
+    route: Optional[str] = None,
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+    before: Optional[int] = Query(None, ge=1),
+    limit: int = Query(100, ge=1, le=1000),
+    current_user: User = Depends(get_current_active_superuser),
 ) -> Any:
-    """Get system logs (admin only)."""
-    # TODO: Add admin role check and implement log retrieval
-    return {"message": "Log retrieval not implemented yet"}
+    """Recent log events from this process, newest first (superuser only).
+
+    ``level`` matches that level and above; ``route`` is a route template,
+    such as ``/api/v1/users/{user_id}``, matched against completed requests.
+    Pass ``next_before`` back as ``before`` to page to older events.
+    """
+    for bound in (since, until):
+        if bound is not None and bound.tzinfo is None:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="since and until must include a timezone",
+            )
+    items, next_before = log_store.query(
+        min_level=level,
+        logger=logger_name,
+        route=route,
+        since=since,
+        until=until,
+        before=before,
+        limit=limit,
+    )
+    return FastJSONResponse(
+        {"items": items, "next_before": next_before, "store": log_store.stats()}
+    )
 
 
 @router.post("/maintenance")
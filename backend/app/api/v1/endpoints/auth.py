@@ -1,15 +1,18 @@
 """
 Authentication endpoints.
 """
+import math
 from datetime import timedelta
 from typing import Any
 
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, status
 from fastapi.security import OAuth2PasswordRequestForm
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.core.config import settings
-from app.core.security import create_access_token, get_current_user
+from app.core.etag import user_response
+from app.core.serialization import FastJSONResponse
+from app.core.security import create_user_access_token, get_current_user_profile
 from app.db.session import get_db
 from app.schemas.auth import Token, TokenData
 from app.schemas.user import User
@@ -20,11 +23,41 @@ router = APIRouter()
 
 @router.post("/login", response_model=Token)
 async def login(
+    request: Request,
     form_data: OAuth2PasswordRequestForm = Depends(),
     db: AsyncSession = Depends(get_db),
 ) -> Any:
-    """Login endpoint to get access token."""
-    user = await authenticate_user(db, form_data.username, form_data.password)
+    """Login endpoint to get access token.
+
+    Attempts from an email or client IP with too many recent failures are
+    rejected with 429 before the password is checked.
+    """
+    throttle = request.app.state.login_throttle
+    client_ip = request.client.host if request.client else None
+    attempt = None
+    if settings.LOGIN_THROTTLE_ENABLED:
+        attempt = await throttle.check(form_data.username, client_ip)
+        if attempt.retry_after:
+            raise HTTPException(
+                status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                detail="Too many failed login attempts, please retry later",
+                headers={"Retry-After": str(max(1, math.ceil(attempt.retry_after)))},
+            )
+
+    try:
+        user = await authenticate_user(
+            db, form_data.username, form_data.password, client_ip=client_ip
+        )
+    except BaseException:
+        # Neither a success nor a failure (e.g. the hashing pool is saturated)
+        if attempt is not None:
+            await throttle.release(attempt)
+        raise
+    if attempt is not None:
+        if user:
+            await throttle.record_success(attempt)
+        else:
+            await throttle.record_failure(attempt)
     if not user:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -33,8 +66,8 @@ async def login(
         )
     
     access_token_expires = timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
-    access_token = create_access_token(
-        data={"sub": user.email}, expires_delta=access_token_expires
+    access_token = create_user_access_token(
+        user, expires_delta=access_token_expires
     )
     
     return {
@@ -46,12 +79,12 @@ async def login(
 
 @router.post("/refresh", response_model=Token)
 async def refresh_token(
-    current_user: User = Depends(get_current_user),
+    current_user: User = Depends(get_current_user_profile),
 ) -> Any:
     """Refresh access token."""
     access_token_expires = timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
-    access_token = create_access_token(
-        data={"sub": current_user.email}, expires_delta=access_token_expires
+    access_token = create_user_access_token(
+        current_user, expires_delta=access_token_expires
     )
     
     return {
@@ -61,12 +94,13 @@ async def refresh_token(
     }
 
 
-@router.get("/me", response_model=User)
+@router.get("/me", response_model=User, response_class=FastJSONResponse)
 async def get_current_user_info(
-    current_user: User = Depends(get_current_user),
-) -> Any:
-    """Get current user information."""
-    return current_user
+    request: Request,
+    current_user: User = Depends(get_current_user_profile),
+) -> Response:
+    """Get current user information (conditional on ``If-None-Match``)."""
+    return user_response(request, current_user)
 
 
 @router.post("/logout")
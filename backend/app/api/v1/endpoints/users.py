@@ -1,35 +1,200 @@
 """
 User management endpoints.
 """
-from typing import Any, List
+import json
+from typing import Any, List, Literal, Optional, Tuple, Type, Union
 
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, status
+from pydantic import BaseModel, ValidationError
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.core.security import get_current_user, get_current_active_user
-from app.db.session import get_db
-from app.schemas.user import User, UserCreate, UserUpdate
+from app.api.deps import get_read_user_loader, get_user_loader
+from app.core.config import settings
+from app.core.etag import check_if_match, user_response
+from app.core.pagination import InvalidCursor
+from app.core.serialization import FastJSONResponse, serialize_users
+from app.core.security import (
+    get_current_active_user,
+    get_current_active_user_profile,
+    get_current_active_superuser,
+)
+from app.db.session import get_db, get_read_db
+from app.schemas.user import (
+    BulkResult,
+    User,
+    UserBulkUpdate,
+    UserCreate,
+    UserPage,
+    UserSearchPage,
+    UserUpdate,
+)
 from app.services.user import (
+    bulk_create_users,
+    bulk_delete_users,
+    bulk_update_users,
     create_user,
-    get_user,
-    get_users,
+    get_user_for_update,
+    get_user_rows,
+    get_users_page,
+    search_users,
     update_user,
     delete_user,
 )
+from app.services.user_loader import UserLoader
 
 router = APIRouter()
 
 
-@router.get("/", response_model=List[User])
+async def _read_bulk_body(request: Request) -> List[Any]:
+    """Read a bulk request body given as a JSON array or as NDJSON."""
+    body = await request.body()
+    content_type = request.headers.get("content-type", "")
+    try:
+        if "ndjson" in content_type:
+            items = [json.loads(line) for line in body.splitlines() if line.strip()]
+        else:
+            items = json.loads(body)
+    except ValueError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Body must be a JSON array or NDJSON",
+        )
+    if not isinstance(items, list):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Body must be a JSON array or NDJSON",
+        )
+    if len(items) > settings.USERS_BULK_MAX_ITEMS:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=f"At most {settings.USERS_BULK_MAX_ITEMS} items per request",
+        )
+    return items
+
+
+def _check_bulk_passwords(items: List[Any]) -> None:
+    """Reject bulk bodies with more passwords to hash than one request may take."""
+    count = sum(1 for item in items if isinstance(item, dict) and item.get("password"))
+    if count > settings.USERS_BULK_MAX_PASSWORDS:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=(
+                f"At most {settings.USERS_BULK_MAX_PASSWORDS} items with a password "
+                "per request"
+            ),
+        )
+
+
+def _parse_bulk_items(
+    items: List[Any], schema: Type[BaseModel]
+) -> Tuple[List[Tuple[int, Any]], List[dict]]:
+    """Validate each item against ``schema``, collecting per-item errors."""
+    parsed = []
+    errors = []
+    for index, item in enumerate(items):
+        try:
+            parsed.append((index, schema.parse_obj(item)))
+        except ValidationError as e:
+            detail = "; ".join(
+                f"{'.'.join(str(loc) for loc in error['loc'])}: {error['msg']}"
+                for error in e.errors()
+            )
+            errors.append({"index": index, "detail": detail})
+    return parsed, errors
+
+
+def _parse_ids(values: List[str]) -> List[int]:
+    """Parse ``?ids=`` values into unique ids, keeping their order."""
+    try:
+        user_ids = [
+            int(part) for value in values for part in value.split(",") if part.strip()
+        ]
+    except ValueError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="ids must be integers",
+        )
+    user_ids = list(dict.fromkeys(user_ids))
+    if len(user_ids) > settings.USERS_PAGE_MAX_LIMIT:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"At most {settings.USERS_PAGE_MAX_LIMIT} ids per request",
+        )
+    return user_ids
+
+
+async def _load_for_write(
+    request: Request, db: AsyncSession, loader: UserLoader, user_id: int
+) -> Any:
+    """Load a user to modify, enforcing ``If-Match`` against a locked fresh copy."""
+    if "if-match" not in request.headers:
+        user = await loader.load(user_id)
+    else:
+        user = await get_user_for_update(db, id=user_id)
+    if not user:
+        raise HTTPException(
+            status_code=404,
+            detail="User not found",
+        )
+    check_if_match(request, user)
+    return user
+
+
+def _merge_bulk_errors(result: dict, errors: List[dict]) -> dict:
+    result["errors"] = sorted(result["errors"] + errors, key=lambda e: e["index"])
+    return result
+
+
+@router.get(
+    "/",
+    response_model=Union[List[User], UserPage],
+    response_class=FastJSONResponse,
+)
 async def read_users(
-    skip: int = 0,
-    limit: int = 100,
+    skip: int = Query(0, ge=0),
+    limit: int = Query(settings.USERS_PAGE_DEFAULT_LIMIT, ge=1),
+    cursor: Optional[str] = None,
+    order_by: Literal["id", "created_at"] = "id",
+    ids: Optional[List[str]] = Query(None),
     current_user: User = Depends(get_current_active_user),
-    db: AsyncSession = Depends(get_db),
+    db: AsyncSession = Depends(get_read_db),
+    loader: UserLoader = Depends(get_read_user_loader),
 ) -> Any:
-    """Retrieve users."""
-    users = await get_users(db, skip=skip, limit=limit)
-    return users
+    """Retrieve users.
+
+    Passing ``cursor`` (empty for the first page) switches to keyset
+    pagination and returns ``{"items": [...], "next_cursor": ...}``;
+    otherwise ``skip``/``limit`` paging returns a plain list.  ``limit`` is
+    capped at ``USERS_PAGE_MAX_LIMIT`` in both modes.
+
+    Passing ``ids`` (comma-separated and/or repeated) instead fetches those
+    users with one query, in the order given; unknown ids are omitted.
+
+    Rows are serialized directly rather than validated through the response
+    model; see ``app.core.serialization``.
+    """
+    if ids is not None:
+        user_ids = _parse_ids(ids)
+        users = await loader.load_many(user_ids)
+        return FastJSONResponse(serialize_users(user for user in users if user))
+
+    limit = min(limit, settings.USERS_PAGE_MAX_LIMIT)
+    if cursor is None:
+        users = await get_user_rows(db, skip=skip, limit=limit)
+        return FastJSONResponse(serialize_users(users))
+    
+    try:
+        users, next_cursor = await get_users_page(
+            db, limit=limit, cursor=cursor, order_by=order_by, rows=True
+        )
+    except InvalidCursor as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e),
+        )
+    return FastJSONResponse(
+        {"items": serialize_users(users), "next_cursor": next_cursor}
+    )
 
 
 @router.post("/", response_model=User)
@@ -43,57 +208,132 @@ async def create_new_user(
     return user
 
 
-@router.get("/me", response_model=User)
-async def read_user_me(
-    current_user: User = Depends(get_current_active_user),
+@router.post("/bulk", response_model=BulkResult)
+async def create_users_bulk(
+    request: Request,
+    current_user: User = Depends(get_current_active_superuser),
+    db: AsyncSession = Depends(get_db),
 ) -> Any:
-    """Get current user."""
-    return current_user
+    """Create users from a JSON array or NDJSON body of ``UserCreate`` items."""
+    body = await _read_bulk_body(request)
+    _check_bulk_passwords(body)
+    items, errors = _parse_bulk_items(body, UserCreate)
+    result = await bulk_create_users(db, items)
+    return _merge_bulk_errors(result, errors)
+
 
+@router.patch("/bulk", response_model=BulkResult)
+async def update_users_bulk(
+    request: Request,
+    current_user: User = Depends(get_current_active_superuser),
+    db: AsyncSession = Depends(get_db),
+) -> Any:
+    """Update users from a JSON array or NDJSON body of items with an ``id``."""
+    body = await _read_bulk_body(request)
+    _check_bulk_passwords(body)
+    items, errors = _parse_bulk_items(body, UserBulkUpdate)
+    result = await bulk_update_users(db, items)
+    return _merge_bulk_errors(result, errors)
 
-@router.put("/me", response_model=User)
+
+@router.post("/bulk/delete", response_model=BulkResult)
+async def delete_users_bulk(
+    request: Request,
+    current_user: User = Depends(get_current_active_superuser),
+    db: AsyncSession = Depends(get_db),
+) -> Any:
+    """Delete users given a JSON array or NDJSON body of ids."""
+    items = []
+    errors = []
+    for index, item in enumerate(await _read_bulk_body(request)):
+        if isinstance(item, dict):
+            item = item.get("id")
+        if isinstance(item, int) and not isinstance(item, bool):
+            items.append((index, item))
+        else:
+            errors.append({"index": index, "detail": "Expected a user id"})
+    result = await bulk_delete_users(db, items)
+    return _merge_bulk_errors(result, errors)
+
+
+@router.get("/me", response_model=User, response_class=FastJSONResponse)
+async def read_user_me(
+    request: Request,
+    current_user: User = Depends(get_current_active_user_profile),
+) -> Response:
+    """Get current user (conditional on ``If-None-Match``)."""
+    return user_response(request, current_user)
+
+
+@router.put("/me", response_model=User, response_class=FastJSONResponse)
 async def update_user_me(
+    request: Request,
     user_in: UserUpdate,
     current_user: User = Depends(get_current_active_user),
     db: AsyncSession = Depends(get_db),
-) -> Any:
-    """Update current user."""
-    user = await update_user(db, db_obj=current_user, obj_in=user_in)
-    return user
+    loader: UserLoader = Depends(get_user_loader),
+) -> Response:
+    """Update current user; honours ``If-Match``."""
+    user = await _load_for_write(request, db, loader, current_user.id)
+    user = await update_user(db, db_obj=user, obj_in=user_in)
+    return user_response(request, user, conditional=False)
 
 
-@router.get("/{user_id}", response_model=User)
+@router.get("/search", response_model=UserSearchPage, response_class=FastJSONResponse)
+async def search_users_endpoint(
+    q: str = Query(..., min_length=1, max_length=100),
+    limit: int = Query(20, ge=1),
+    offset: int = Query(0, ge=0),
+    current_user: User = Depends(get_current_active_user),
+    db: AsyncSession = Depends(get_read_db),
+) -> Response:
+    """Search users by email or name prefix/substring, best matches first.
+
+    Terms shorter than ``USERS_SEARCH_MIN_SUBSTRING_LENGTH`` characters
+    match prefixes only.
+    """
+    limit = min(limit, settings.USERS_SEARCH_MAX_LIMIT)
+    if offset > settings.USERS_SEARCH_MAX_OFFSET:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"offset may not exceed {settings.USERS_SEARCH_MAX_OFFSET}; refine the query",
+        )
+    users, next_offset = await search_users(db, q, limit=limit, offset=offset)
+    return FastJSONResponse(
+        {"items": serialize_users(users), "next_offset": next_offset}
+    )
+
+
+@router.get("/{user_id}", response_model=User, response_class=FastJSONResponse)
 async def read_user_by_id(
+    request: Request,
     user_id: int,
     current_user: User = Depends(get_current_active_user),
-    db: AsyncSession = Depends(get_db),
-) -> Any:
-    """Get a specific user by id."""
-    user = await get_user(db, id=user_id)
+    loader: UserLoader = Depends(get_read_user_loader),
+) -> Response:
+    """Get a specific user by id (conditional on ``If-None-Match``)."""
+    user = await loader.load(user_id)
     if not user:
         raise HTTPException(
             status_code=404,
             detail="User not found",
         )
-    return user
+    return user_response(request, user)
 
 
-@router.put("/{user_id}", response_model=User)
+@router.put("/{user_id}", response_model=User, response_class=FastJSONResponse)
 async def update_user_by_id(
+    request: Request,
     user_id: int,
     user_in: UserUpdate,
     current_user: User = Depends(get_current_active_user),
     db: AsyncSession = Depends(get_db),
-) -> Any:
-    """Update a user."""
-    user = await get_user(db, id=user_id)
-    if not user:
-        raise HTTPException(
-            status_code=404,
-            detail="User not found",
-        )
+    loader: UserLoader = Depends(get_user_loader),
+) -> Response:
+    """Update a user; honours ``If-Match``."""
+    user = await _load_for_write(request, db, loader, user_id)
     user = await update_user(db, db_obj=user, obj_in=user_in)
-    return user
+    return user_response(request, user, conditional=False)
 
 
 @router.delete("/{user_id}")
@@ -101,13 +341,15 @@ async def delete_user_by_id(
     user_id: int,
     current_user: User = Depends(get_current_active_user),
     db: AsyncSession = Depends(get_db),
+    loader: UserLoader = Depends(get_user_loader),
 ) -> Any:
     """Delete a user."""
-    user = await get_user(db, id=user_id)
+    user = await loader.load(user_id)
     if not user:
         raise HTTPException(
             status_code=404,
             detail="User not found",
         )
-    await delete_user(db, id=user_id)
+    await delete_user(db, id=user_id, db_obj=user)
+    loader.forget(user)
     return {"message": "User deleted successfully"} 
\ No newline at end of file
@@ -0,0 +1,317 @@
+"""
+Admission control.
+
+Requests are grouped into route classes by longest path prefix
+(``ADMISSION_ROUTE_CLASSES``).  Each class admits at most
+``ADMISSION_CONCURRENCY[class]`` requests at a time; further requests wait
+in a FIFO queue of at most ``ADMISSION_QUEUE_SIZE[class]`` entries for up to
+``ADMISSION_QUEUE_TIMEOUT_SECONDS``.  A request that finds the queue full,
+waits past its deadline, or arrives while the estimated wait for a primary
+database connection exceeds ``ADMISSION_POOL_WAIT_BUDGET_SECONDS`` is
+answered with 503 and ``Retry-After`` straight away, instead of queueing
+behind the pool's ``pool_timeout`` and failing late.
+
+The pool wait estimate comes from the pool's real backlog: primary sessions
+that are waiting for a connection (from session events) and the mean
+connection hold time (from the engine's checkout/checkin events).  While every connection
+is checked out, a new checkout waits for everything queued ahead of it, and
+a connection frees up every ``mean hold / capacity`` seconds on average.
+"""
+import asyncio
+import math
+import time
+from collections import deque
+from typing import Any, Deque, Dict, List, Optional, Tuple
+
+from sqlalchemy import event
+from starlette.responses import JSONResponse
+
+from app.core.config import settings
+from app.core.metrics import Gauge, Metric, registry
+from app.db.session import PrimarySession, engine
+
+admission_shed_total = registry.counter(
+    "admission_shed_total",
+    "Requests rejected by admission control, by route class and reason.",
+    ("route_class", "reason"),
+)
+
+
+class AdmissionRejected(Exception):
+    """Raised when a request is not admitted."""
+
+    def __init__(self, reason: str) -> None:
+        super().__init__(reason)
+        self.reason = reason
+
+
+class ConcurrencyLimiter:
+    """Concurrency limit with a bounded FIFO wait queue."""
+
+    def __init__(self, limit: int, queue_size: int, timeout: float) -> None:
+        self.limit = limit
+        self.queue_size = queue_size
+        self.timeout = timeout
+        self.in_flight = 0
+        self._waiters: Deque["asyncio.Future[None]"] = deque()
+
+    @property
+    def queued(self) -> int:
+        return len(self._waiters)
+
+    async def acquire(self) -> None:
+        """Take a slot, waiting in the queue if needed; raise ``AdmissionRejected``."""
+        if self.in_flight < self.limit and not self._waiters:
+            self.in_flight += 1
+            return
+        if len(self._waiters) >= self.queue_size:
+            raise AdmissionRejected("queue_full")
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        try:
+            await asyncio.wait((waiter,), timeout=self.timeout)
+        except BaseException:
+            # Cancelled while queued; hand on a slot that was already granted
+            if waiter.done() and not waiter.cancelled():
+                self.release()
+            else:
+                waiter.cancel()
+                self._discard(waiter)
+            raise
+        if not waiter.done():
+            waiter.cancel()
+            self._discard(waiter)
+            raise AdmissionRejected("timeout")
+        # The releasing request handed its slot over; in_flight is unchanged
+
+    def _discard(self, waiter: "asyncio.Future[None]") -> None:
+        try:
+            self._waiters.remove(waiter)
+        except ValueError:
+            pass
+
+    def release(self) -> None:
+        """Free a slot, handing it to the oldest live waiter if there is one."""
+        while self._waiters:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(None)
+                return
+        self.in_flight -= 1
+
+
+class PoolWaitEstimator:
+    """Estimates how long a new request would wait for a pooled connection."""
+
+    def __init__(self, capacity: int, smoothing: float = 0.2) -> None:
+        self.capacity = max(1, capacity)
+        self.smoothing = smoothing
+        self.checked_out = 0
+        # Checkouts started but not yet holding a connection
+        self.waiting = 0
+        self.mean_hold = 0.0
+
+    def attach(self, async_engine: Any, session_class: Any) -> None:
+        """Count checkouts of ``async_engine`` and waits of ``session_class``."""
+        # Registered on the engine rather than its pool, so they carry over
+        # to the new pool that ``engine.dispose()`` creates
+        @event.listens_for(async_engine.sync_engine, "checkout")
+        def on_checkout(dbapi_connection, connection_record, connection_proxy):
+            connection_record.info["admission_checkout_at"] = time.perf_counter()
+            self.checked_out += 1
+
+        @event.listens_for(async_engine.sync_engine, "checkin")
+        def on_checkin(dbapi_connection, connection_record):
+            started = connection_record.info.pop("admission_checkout_at", None)
+            if started is None:
+                return
+            self.checked_out -= 1
+            held = time.perf_counter() - started
+            self.mean_hold += self.smoothing * (held - self.mean_hold)
+
+        # Pool events only fire once a connection is handed out.  A session
+        # needs one from its first statement or flush until its transaction
+        # begins on a connection, so it counts as waiting over that span.
+        def start_waiting(session: Any) -> None:
+            if "admission_holding" in session.info or "admission_waiting" in session.info:
+                return
+            session.info["admission_waiting"] = True
+            self.waiting += 1
+
+        def stop_waiting(session: Any) -> None:
+            if session.info.pop("admission_waiting", False):
+                self.waiting -= 1
+
+        @event.listens_for(session_class, "do_orm_execute")
+        def on_execute(orm_execute_state):
+            start_waiting(orm_execute_state.session)
+
+        @event.listens_for(session_class, "before_flush")
+        def on_flush(session, flush_context, instances):
+            start_waiting(session)
+
+        @event.listens_for(session_class, "after_begin")
+        def on_begin(session, transaction, connection):
+            stop_waiting(session)
+            session.info["admission_holding"] = True
+
+        @event.listens_for(session_class, "after_transaction_end")
+        def on_transaction_end(session, transaction):
+            if transaction.parent is None:
+                # Also covers a checkout that failed, e.g. on pool_timeout
+                stop_waiting(session)
+                session.info.pop("admission_holding", None)
+
+    def estimate(self) -> float:
+        """Expected wait in seconds for a checkout started now."""
+        if self.checked_out < self.capacity:
+            return 0.0
+        return (self.waiting + 1) * self.mean_hold / self.capacity
+
+
+class AdmissionController:
+    """Route classification, per-class limiters and the pool wait budget."""
+
+    def __init__(
+        self,
+        route_classes: Dict[str, str],
+        concurrency: Dict[str, int],
+        queue_sizes: Dict[str, int],
+        queue_timeout: float,
+        pool_wait_budget: float,
+        estimator: Optional[PoolWaitEstimator] = None,
+    ) -> None:
+        # Longest prefix first, so the most specific class wins
+        self.prefixes: Tuple[Tuple[str, str], ...] = tuple(
+            sorted(route_classes.items(), key=lambda item: len(item[0]), reverse=True)
+        )
+        self.limiters = {
+            name: ConcurrencyLimiter(
+                concurrency[name], queue_sizes.get(name, 0), queue_timeout
+            )
+            for name in set(route_classes.values())
+        }
+        self.pool_wait_budget = pool_wait_budget
+        self.estimator = estimator
+        self.shed: Dict[Tuple[str, str], int] = {}
+
+    def classify(self, path: str) -> Optional[str]:
+        for prefix, name in self.prefixes:
+            if path.startswith(prefix):
+                return name
+        return None
+
+    def pool_wait_estimate(self) -> float:
+        if self.estimator is None:
+            return 0.0
+        return self.estimator.estimate()
+
+    async def admit(self, route_class: str) -> None:
+        """Admit a request of ``route_class`` or raise ``AdmissionRejected``."""
+        try:
+            if self.pool_wait_estimate() > self.pool_wait_budget:
+                raise AdmissionRejected("pool")
+            await self.limiters[route_class].acquire()
+        except AdmissionRejected as e:
+            key = (route_class, e.reason)
+            self.shed[key] = self.shed.get(key, 0) + 1
+            admission_shed_total.inc(route_class, e.reason)
+            raise
+
+    def release(self, route_class: str) -> None:
+        self.limiters[route_class].release()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "classes": {
+                name: {
+                    "limit": limiter.limit,
+                    "in_flight": limiter.in_flight,
+                    "queued": limiter.queued,
+                    "shed": {
+                        reason: count
+                        for (route_class, reason), count in self.shed.items()
+                        if route_class == name
+                    },
+                }
+                for name, limiter in self.limiters.items()
+            },
+            "pool_wait_estimate_seconds": round(self.pool_wait_estimate(), 6),
+        }
+
+
+class AdmissionControlMiddleware:
+    """Pure ASGI middleware admitting HTTP requests through the controller."""
+
+    def __init__(
+        self,
+        app,
+        controller: AdmissionController,
+        exempt_prefixes: Optional[List[str]] = None,
+    ) -> None:
+        self.app = app
+        self.controller = controller
+        self.exempt_prefixes = tuple(
+            settings.ADMISSION_EXEMPT_PATHS if exempt_prefixes is None else exempt_prefixes
+        )
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["path"].startswith(self.exempt_prefixes):
+            await self.app(scope, receive, send)
+            return
+        route_class = self.controller.classify(scope["path"])
+        if route_class is None:
+            await self.app(scope, receive, send)
+            return
+
+        try:
+            await self.controller.admit(route_class)
+        except AdmissionRejected:
+            retry_after = max(1, math.ceil(self.controller.pool_wait_estimate()))
+            response = JSONResponse(
+                {"detail": "Server busy, please retry"},
+                status_code=503,
+                headers={"Retry-After": str(retry_after)},
+            )
+            await response(scope, receive, send)
+            return
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            self.controller.release(route_class)
+
+
+def create_admission_controller() -> AdmissionController:
+    """Build the controller from settings, estimating waits on the primary pool."""
+    estimator = PoolWaitEstimator(
+        settings.DATABASE_POOL_SIZE + settings.DATABASE_MAX_OVERFLOW
+    )
+    estimator.attach(engine, PrimarySession)
+    controller = AdmissionController(
+        route_classes=settings.ADMISSION_ROUTE_CLASSES,
+        concurrency=settings.ADMISSION_CONCURRENCY,
+        queue_sizes=settings.ADMISSION_QUEUE_SIZE,
+        queue_timeout=settings.ADMISSION_QUEUE_TIMEOUT_SECONDS,
+        pool_wait_budget=settings.ADMISSION_POOL_WAIT_BUDGET_SECONDS,
+        estimator=estimator,
+    )
+
+    def collect_admission_metrics() -> List[Metric]:
+        in_flight = Gauge(
+            "admission_in_flight", "Requests admitted and running.", ("route_class",)
+        )
+        queued = Gauge(
+            "admission_queue_depth", "Requests waiting for admission.", ("route_class",)
+        )
+        for name, limiter in controller.limiters.items():
+            in_flight.set(limiter.in_flight, name)
+            queued.set(limiter.queued, name)
+        pool_wait = Gauge(
+            "admission_pool_wait_estimate_seconds",
+            "Estimated wait for a primary database connection.",
+        )
+        pool_wait.set(controller.pool_wait_estimate())
+        return [in_flight, queued, pool_wait]
+
+    registry.register_collector(collect_admission_metrics)
+    return controller
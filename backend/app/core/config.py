@@ -2,9 +2,10 @@
 Application configuration using Pydantic settings.
 """
 import os
-from typing import List, Optional
+from typing import Dict, List, Optional
 
-from pydantic import AnyHttpUrl, BaseSettings, validator
+from pydantic import AnyHttpUrl, validator
+from pydantic_settings import BaseSettings
 
 
 class Settings(BaseSettings):
@@ -26,12 +27,40 @@ class Settings(BaseSettings):
     REFRESH_TOKEN_EXPIRE_DAYS: int = 7
     ALGORITHM: str = "HS256"
     
-    # CORS
+    # Embed id, flags and token_version in access tokens so requests can
+    # be authenticated from the token plus a cached version check
+    ACCESS_TOKEN_EMBED_CLAIMS: bool = True
+    
+    # Authenticated principal cache (per process)
+    PRINCIPAL_CACHE_SIZE: int = 10000
+    PRINCIPAL_CACHE_TTL_SECONDS: float = 30.0
+    TOKEN_VERSION_CACHE_SIZE: int = 100000
+    TOKEN_VERSION_CACHE_TTL_SECONDS: float = 5.0
+    
+    # Password hashing worker pool
+    PASSWORD_HASH_WORKERS: int = 4
+    PASSWORD_HASH_MAX_PENDING: int = 64
+    
+    # Password hashing parameters.  New hashes use the first scheme; hashes
+    # in other schemes or with a lower cost are upgraded on the next login.
+    # Pick the cost with ``python -m app.core.hashing --target 0.25``.
+    PASSWORD_HASH_SCHEMES: List[str] = ["bcrypt"]
+    BCRYPT_ROUNDS: int = 12
+    ARGON2_TIME_COST: int = 3
+    ARGON2_MEMORY_COST: int = 65536  # KiB
+    ARGON2_PARALLELISM: int = 4
+    
+    # Trusted hosts (Host header; "*.example.com" matches subdomains)
     ALLOWED_HOSTS: List[str] = ["*"]
     
-    @validator("ALLOWED_HOSTS", pre=True)
+    # CORS ("https://*.example.com" matches subdomains).  Credentials are
+    # allowed, so "*" is refused; list the origins
+    CORS_ALLOWED_ORIGINS: List[str] = []
+    CORS_MAX_AGE_SECONDS: int = 600
+    
+    @validator("ALLOWED_HOSTS", "CORS_ALLOWED_ORIGINS", pre=True)
     def assemble_cors_origins(cls, v: str | List[str]) -> List[str]:
-        """Parse CORS origins."""
+        """Parse comma-separated host and origin lists."""
         if isinstance(v, str) and not v.startswith("["):
             return [i.strip() for i in v.split(",")]
         elif isinstance(v, (list, str)):
@@ -44,6 +73,48 @@ class Settings(BaseSettings):
     DATABASE_MAX_OVERFLOW: int = 30
     DATABASE_POOL_TIMEOUT: int = 30
     DATABASE_POOL_RECYCLE: int = 3600
+    # SQLAlchemy compiled-statement cache entries per engine
+    DATABASE_QUERY_CACHE_SIZE: int = 1200
+    # asyncpg server-side prepared statements cached per connection
+    DATABASE_PREPARED_STATEMENT_CACHE_SIZE: int = 256
+    
+    # Read replicas (optional)
+    DATABASE_REPLICA_URLS: List[str] = []
+    DATABASE_REPLICA_POOL_SIZE: int = 20
+    DATABASE_REPLICA_MAX_OVERFLOW: int = 30
+    DATABASE_REPLICA_POOL_TIMEOUT: int = 5
+    DATABASE_REPLICA_MAX_LAG_SECONDS: float = 5.0
+    
+    @validator("DATABASE_REPLICA_URLS", pre=True)
+    def assemble_replica_urls(cls, v: str | List[str]) -> List[str]:
+        """Parse replica URLs."""
+        if isinstance(v, str) and not v.startswith("["):
+            return [i.strip() for i in v.split(",") if i.strip()]
+        elif isinstance(v, (list, str)):
+            return v
+        raise ValueError(v)
+    
+    # Pagination
+    USERS_PAGE_DEFAULT_LIMIT: int = 100
+    USERS_PAGE_MAX_LIMIT: int = 500
+    USERS_SEARCH_MAX_LIMIT: int = 100
+    USERS_SEARCH_MAX_OFFSET: int = 1000
+    # Shorter search terms only match prefixes: trigram indexes cannot
+    # narrow a substring search on fewer than three characters
+    USERS_SEARCH_MIN_SUBSTRING_LENGTH: int = 3
+    
+    # Bulk user operations
+    USERS_BULK_MAX_ITEMS: int = 10000
+    USERS_BULK_BATCH_SIZE: int = 1000
+    # Each password costs a full hash on the shared worker pool, so far
+    # fewer items with passwords are accepted per bulk request
+    USERS_BULK_MAX_PASSWORDS: int = 100
+    # Rows fetched per server-side cursor batch when exporting users
+    USERS_EXPORT_CHUNK_SIZE: int = 5000
+    
+    # Admin statistics
+    ADMIN_STATS_MAX_STALENESS_SECONDS: float = 10.0
+    ADMIN_STATS_SIGNUP_DAYS: int = 30
     
     # Google Cloud
     GCP_PROJECT_ID: str
@@ -52,15 +123,71 @@ class Settings(BaseSettings):
     # Secret Manager
     SECRET_MANAGER_ENABLED: bool = True
     
+    # Health probing
+    HEALTH_PROBE_INTERVAL_SECONDS: float = 5.0
+    HEALTH_PROBE_TIMEOUT_SECONDS: float = 2.0
+    HEALTH_MAX_STALENESS_SECONDS: float = 15.0
+    
     # Logging
     LOG_LEVEL: str = "INFO"
     LOG_FORMAT: str = "json"
+    LOG_QUEUE_SIZE: int = 10000
+    LOG_BATCH_SIZE: int = 256
+    LOG_FLUSH_INTERVAL_SECONDS: float = 0.2
+    LOG_REQUEST_SAMPLE_RATE: float = 1.0
+    # Recent events kept in memory for GET /admin/logs (0 disables)
+    LOG_STORE_SIZE: int = 10000
+    LOG_STORE_INDEX_SIZE: int = 2000
+    LOG_STORE_MAX_INDEX_KEYS: int = 256
     
     # Rate Limiting
+    RATE_LIMIT_ENABLED: bool = True
     RATE_LIMIT_PER_MINUTE: int = 60
+    RATE_LIMIT_BURST: Optional[int] = None  # Defaults to RATE_LIMIT_PER_MINUTE
+    RATE_LIMIT_ROUTE_COSTS: Dict[str, int] = {"/api/v1/auth/login": 5}
+    RATE_LIMIT_EXEMPT_PATHS: List[str] = ["/health", "/metrics"]
+    RATE_LIMIT_LOCAL_MAX_KEYS: int = 100000
+    RATE_LIMIT_REDIS_PREFIX: str = "ratelimit:"
+    
+    # Admission control: per route class concurrency (classes are matched by
+    # longest path prefix) with a bounded, deadline-limited wait queue
+    ADMISSION_CONTROL_ENABLED: bool = True
+    ADMISSION_ROUTE_CLASSES: Dict[str, str] = {
+        "/api/v1/auth/login": "login",
+        "/api/v1/admin/export": "export",
+        "/api/v1": "api",
+    }
+    ADMISSION_CONCURRENCY: Dict[str, int] = {"login": 8, "export": 2, "api": 40}
+    ADMISSION_QUEUE_SIZE: Dict[str, int] = {"login": 32, "export": 2, "api": 200}
+    ADMISSION_QUEUE_TIMEOUT_SECONDS: float = 2.0
+    # Shed load while the estimated wait for a database connection is longer
+    ADMISSION_POOL_WAIT_BUDGET_SECONDS: float = 1.0
+    ADMISSION_EXEMPT_PATHS: List[str] = ["/health", "/metrics"]
+    
+    # Login throttling (failed attempts per email and per client IP)
+    LOGIN_THROTTLE_ENABLED: bool = True
+    LOGIN_FAILURE_WINDOW_SECONDS: float = 900.0
+    LOGIN_MAX_FAILURES_PER_EMAIL: int = 10
+    LOGIN_BACKOFF_AFTER_PER_EMAIL: int = 5
+    LOGIN_MAX_FAILURES_PER_IP: int = 100
+    LOGIN_BACKOFF_AFTER_PER_IP: int = 50
+    LOGIN_BACKOFF_BASE_SECONDS: float = 1.0
+    LOGIN_BACKOFF_MAX_SECONDS: float = 900.0
+    LOGIN_THROTTLE_MAX_KEYS: int = 100000
+    LOGIN_THROTTLE_REDIS_PREFIX: str = "login:"
+    
+    # Login audit (last_login_at and login_events, written behind in batches)
+    LOGIN_AUDIT_ENABLED: bool = True
+    LOGIN_AUDIT_MAX_PENDING: int = 10000
+    LOGIN_AUDIT_BATCH_SIZE: int = 500
+    LOGIN_AUDIT_FLUSH_INTERVAL_SECONDS: float = 1.0
     
     # Monitoring
     SENTRY_DSN: Optional[str] = None
+    # GET /metrics is served to clients in these networks, or to any client
+    # sending "Authorization: Bearer <METRICS_BEARER_TOKEN>" when it is set
+    METRICS_ALLOWED_NETWORKS: List[str] = ["127.0.0.1/32", "::1/128"]
+    METRICS_BEARER_TOKEN: Optional[str] = None
     
     # Email (if needed)
     SMTP_TLS: bool = True
@@ -84,7 +211,8 @@ class DevelopmentSettings(Settings):
     
     DEBUG: bool = True
     LOG_LEVEL: str = "DEBUG"
-    ALLOWED_HOSTS: List[str] = ["http://localhost:3000", "http://127.0.0.1:3000"]
+    ALLOWED_HOSTS: List[str] = ["localhost", "127.0.0.1"]
+    CORS_ALLOWED_ORIGINS: List[str] = ["http://localhost:3000", "http://127.0.0.1:3000"]
 
 
 
@@ -97,6 +225,7 @@ class ProductionSettings(Settings):
     DEBUG: bool = False
     LOG_LEVEL: str = "WARNING"
     ALLOWED_HOSTS: List[str] = []  # Set specific domains in production
+    CORS_ALLOWED_ORIGINS: List[str] = []
 
 
 def get_settings() -> Settings:
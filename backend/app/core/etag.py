@@ -0,0 +1,67 @@
+"""
+ETags and conditional requests for user resources.
+
+A user's ETag is derived from its id and ``updated_at``, which the database
+sets on insert and every update, so it changes exactly when the
+representation can.  ``user_response`` answers ``If-None-Match`` with a 304
+before serializing anything; ``check_if_match`` enforces ``If-Match`` for
+optimistic concurrency on writes.
+"""
+from typing import Any, Optional
+
+from fastapi import HTTPException, Request, Response, status
+
+from app.core.serialization import FastJSONResponse, serialize_user
+
+
+def user_etag(user: Any) -> str:
+    """Return the strong ETag of a user (ORM object or cached principal)."""
+    changed_at = user.updated_at or user.created_at
+    version = int(changed_at.timestamp() * 1_000_000) if changed_at else 0
+    return f'"{user.id:x}-{version:x}"'
+
+
+def _tags(header: str):
+    for tag in header.split(","):
+        yield tag.strip()
+
+
+def etag_matches(header: Optional[str], etag: str, weak: bool = False) -> bool:
+    """True if ``etag`` matches a list-valued ``If-Match``/``If-None-Match`` header.
+
+    ``If-None-Match`` uses the weak comparison (``W/`` prefixes ignored),
+    ``If-Match`` the strong one.
+    """
+    if not header:
+        return False
+    for tag in _tags(header):
+        if tag == "*":
+            return True
+        if weak and tag.startswith("W/"):
+            tag = tag[2:]
+        if tag == etag:
+            return True
+    return False
+
+
+def user_response(request: Request, user: Any, conditional: bool = True) -> Response:
+    """Serialize ``user`` with its ETag, or answer 304 if the client's copy is current.
+
+    Pass ``conditional=False`` for responses to writes, which are never 304.
+    """
+    etag = user_etag(user)
+    if conditional and etag_matches(
+        request.headers.get("if-none-match"), etag, weak=True
+    ):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag})
+    return FastJSONResponse(serialize_user(user), headers={"ETag": etag})
+
+
+def check_if_match(request: Request, user: Any) -> None:
+    """Raise 412 if the request has an ``If-Match`` that ``user`` no longer matches."""
+    header = request.headers.get("if-match")
+    if header is not None and not etag_matches(header, user_etag(user)):
+        raise HTTPException(
+            status_code=status.HTTP_412_PRECONDITION_FAILED,
+            detail="User was modified since it was fetched",
+        )
@@ -0,0 +1,235 @@
+"""
+Front-door middleware.
+
+``FrontDoorMiddleware`` is the outermost application middleware and does
+the work of Starlette's ``TrustedHostMiddleware`` and ``CORSMiddleware`` in
+one pass over the request headers:
+
+* the ``Host`` header is checked against ``ALLOWED_HOSTS`` (a set of exact
+  names plus one compiled pattern for ``*.example.com`` entries);
+* the ``Origin`` header is checked against ``CORS_ALLOWED_ORIGINS`` the same
+  way (``*`` is refused while credentials are allowed), and CORS response
+  headers are added to allowed requests;
+* preflight requests are answered directly from header lists built once
+  per origin, with ``Access-Control-Max-Age`` so browsers cache them.
+
+Host and origin decisions are memoized per raw header value.  Requests to
+``/health`` skip every middleware below this one (and the host check, so
+probes may use any address) and go straight to the router.
+"""
+import re
+from typing import Dict, Iterable, List, Optional, Pattern, Tuple
+
+from app.core.config import settings
+
+Headers = List[Tuple[bytes, bytes]]
+
+ALL_METHODS = b"DELETE, GET, HEAD, OPTIONS, PATCH, POST, PUT"
+
+# Memoized host and origin decisions per process
+_DECISION_CACHE_SIZE = 1024
+
+
+def _compile_patterns(
+    patterns: Iterable[str], wildcard: str
+) -> Tuple[bool, frozenset, Optional[Pattern[str]]]:
+    """Split patterns into (allow all, exact names, compiled ``*.`` patterns)."""
+    exact = set()
+    expressions = []
+    for pattern in patterns:
+        pattern = pattern.strip().lower()
+        if pattern == "*":
+            return True, frozenset(), None
+        if "*." in pattern:
+            prefix, _, suffix = pattern.partition("*.")
+            expressions.append(f"{re.escape(prefix)}{wildcard}{re.escape(suffix)}")
+        elif pattern:
+            exact.add(pattern)
+    compiled = re.compile("|".join(expressions)) if expressions else None
+    return False, frozenset(exact), compiled
+
+
+def _plain_response(
+    status: int, body: bytes, headers: Optional[Headers] = None
+) -> Tuple[dict, dict]:
+    return (
+        {
+            "type": "http.response.start",
+            "status": status,
+            "headers": [
+                (b"content-type", b"text/plain; charset=utf-8"),
+                (b"content-length", str(len(body)).encode()),
+                *(headers or ()),
+            ],
+        },
+        {"type": "http.response.body", "body": body},
+    )
+
+
+class FrontDoorMiddleware:
+    """Pure ASGI trusted-host and CORS handling with a bypass for health checks."""
+
+    def __init__(
+        self,
+        app,
+        bypass_app=None,
+        allowed_hosts: Optional[List[str]] = None,
+        allowed_origins: Optional[List[str]] = None,
+        allow_credentials: bool = True,
+        max_age: Optional[int] = None,
+        bypass_prefixes: Iterable[str] = ("/health",),
+    ) -> None:
+        self.app = app
+        self.bypass_app = bypass_app or app
+        self.bypass_paths = frozenset(bypass_prefixes)
+        self.bypass_prefixes = tuple(f"{prefix}/" for prefix in bypass_prefixes)
+
+        self.any_host, self.hosts, self.host_pattern = _compile_patterns(
+            settings.ALLOWED_HOSTS if allowed_hosts is None else allowed_hosts,
+            wildcard=r"(?:[^.:]+\.)+",
+        )
+        self.any_origin, self.origins, self.origin_pattern = _compile_patterns(
+            settings.CORS_ALLOWED_ORIGINS if allowed_origins is None else allowed_origins,
+            wildcard=r"(?:[^./:]+\.)+",
+        )
+        if self.any_origin and allow_credentials:
+            # Echoing every origin with credentials lets any site make
+            # authenticated requests on a user's behalf
+            raise ValueError("Allowed origins may not be '*' when credentials are allowed")
+        self._host_decisions: Dict[bytes, bool] = {}
+        # Origin -> (headers for simple responses, preflight response), or
+        # None for a disallowed origin
+        self._origin_decisions: Dict[bytes, Optional[Tuple[Headers, dict]]] = {}
+
+        credentials: Headers = (
+            [(b"access-control-allow-credentials", b"true")] if allow_credentials else []
+        )
+        max_age = settings.CORS_MAX_AGE_SECONDS if max_age is None else max_age
+        self._simple_headers: Headers = credentials
+        self._preflight_headers: Headers = [
+            *credentials,
+            (b"access-control-allow-methods", ALL_METHODS),
+            (b"access-control-max-age", str(max_age).encode()),
+            (b"vary", b"Origin"),
+        ]
+        self._invalid_host = _plain_response(400, b"Invalid host header")
+        self._disallowed_origin = _plain_response(400, b"Disallowed CORS origin")
+
+    def _host_allowed(self, host: Optional[bytes]) -> bool:
+        if self.any_host:
+            return True
+        if host is None:
+            return False
+        allowed = self._host_decisions.get(host)
+        if allowed is None:
+            name = host.decode("latin-1").lower()
+            if name.startswith("["):  # IPv6 literal
+                name = name[:name.find("]") + 1]
+            else:
+                name = name.split(":", 1)[0]
+            allowed = name in self.hosts or (
+                self.host_pattern is not None
+                and self.host_pattern.fullmatch(name) is not None
+            )
+            if len(self._host_decisions) >= _DECISION_CACHE_SIZE:
+                self._host_decisions.clear()
+            self._host_decisions[host] = allowed
+        return allowed
+
+    def _origin_entry(self, origin: bytes) -> Optional[Tuple[Headers, dict]]:
+        try:
+            return self._origin_decisions[origin]
+        except KeyError:
+            pass
+        name = origin.decode("latin-1").lower()
+        allowed = self.any_origin or name in self.origins or (
+            self.origin_pattern is not None
+            and self.origin_pattern.fullmatch(name) is not None
+        )
+        entry = None
+        if allowed:
+            allow_origin = (b"access-control-allow-origin", origin)
+            start, _ = _plain_response(200, b"OK", [allow_origin, *self._preflight_headers])
+            entry = ([allow_origin, *self._simple_headers], start)
+        if len(self._origin_decisions) >= _DECISION_CACHE_SIZE:
+            self._origin_decisions.clear()
+        self._origin_decisions[origin] = entry
+        return entry
+
+    async def _respond(self, send, response: Tuple[dict, dict]) -> None:
+        start, body = response
+        # Cached messages are copied in case a server or wrapper mutates them
+        await send(dict(start))
+        await send(dict(body))
+
+    async def __call__(self, scope, receive, send):
+        scope_type = scope["type"]
+        if scope_type == "lifespan":
+            await self.app(scope, receive, send)
+            return
+        path = scope["path"]
+        if path in self.bypass_paths or path.startswith(self.bypass_prefixes):
+            await self.bypass_app(scope, receive, send)
+            return
+
+        host = origin = request_method = request_headers = None
+        for name, value in scope["headers"]:
+            if name == b"host":
+                host = value
+            elif name == b"origin":
+                origin = value
+            elif name == b"access-control-request-method":
+                request_method = value
+            elif name == b"access-control-request-headers":
+                request_headers = value
+
+        if not self._host_allowed(host):
+            if scope_type == "http":
+                await self._respond(send, self._invalid_host)
+            else:
+                await send({"type": "websocket.close", "code": 1008})
+            return
+
+        if origin is None or scope_type != "http":
+            await self.app(scope, receive, send)
+            return
+
+        entry = self._origin_entry(origin)
+        if scope["method"] == "OPTIONS" and request_method is not None:
+            if entry is None:
+                await self._respond(send, self._disallowed_origin)
+                return
+            start = dict(entry[1])
+            if request_headers is not None:
+                # Every header is allowed; echo the ones asked for
+                start = dict(
+                    start,
+                    headers=[
+                        *start["headers"],
+                        (b"access-control-allow-headers", request_headers),
+                    ],
+                )
+            await send(start)
+            await send({"type": "http.response.body", "body": b"OK"})
+            return
+
+        if entry is None:
+            await self.app(scope, receive, send)
+            return
+
+        cors_headers = entry[0]
+
+        async def send_with_cors(message):
+            if message["type"] == "http.response.start":
+                headers = list(message.get("headers", ()))
+                for index, (name, value) in enumerate(headers):
+                    if name.lower() == b"vary":
+                        headers[index] = (name, value + b", Origin")
+                        break
+                else:
+                    headers.append((b"vary", b"Origin"))
+                headers.extend(cors_headers)
+                message = dict(message, headers=headers)
+            await send(message)
+
+        await self.app(scope, receive, send_with_cors)
@@ -0,0 +1,288 @@
+"""
+Password hashing.
+
+bcrypt is deliberately slow, so async code must not call it on the event
+loop.  ``PasswordHasher`` runs hashing and verification in a bounded thread
+pool (bcrypt releases the GIL while it works) and rejects new work once too
+many calls are queued, instead of letting a login burst queue unboundedly.
+
+Schemes and costs come from settings, so every instance hashes with the
+same policy.  Stored hashes weaker than that policy are upgraded on login;
+stronger ones are left alone.  ``calibrate_cost`` finds the highest cost
+meeting a per-hash latency target on the current machine, to choose the
+configured value: ``python -m app.core.hashing --target 0.25``.
+"""
+import argparse
+import asyncio
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from functools import lru_cache, partial
+from typing import Any, Callable, Dict, List, Optional, Tuple, TypeVar, Union
+
+from app.core.config import settings
+
+T = TypeVar("T")
+
+# Cost parameter and the range calibration searches, per scheme
+COST_PARAMETERS: Dict[str, Tuple[str, int, int]] = {
+    "bcrypt": ("rounds", 10, 16),
+    "argon2": ("time_cost", 1, 10),
+}
+
+def hashing_params(scheme: str) -> Dict[str, Any]:
+    """Return the configured passlib parameters for ``scheme``."""
+    if scheme == "bcrypt":
+        params = {"rounds": settings.BCRYPT_ROUNDS}
+    elif scheme == "argon2":
+        params = {
+            "time_cost": settings.ARGON2_TIME_COST,
+            "memory_cost": settings.ARGON2_MEMORY_COST,
+            "parallelism": settings.ARGON2_PARALLELISM,
+        }
+    else:
+        params = {}
+    return params
+
+
+def build_context(schemes: List[str], params: Dict[str, Dict[str, Any]]):
+    """Build a passlib context; hashes weaker than ``params`` are flagged for update."""
+    from passlib.context import CryptContext
+
+    options: Dict[str, Any] = {}
+    for scheme, scheme_params in params.items():
+        for name, value in scheme_params.items():
+            if name in ("rounds", "time_cost"):
+                # passlib calls argon2's time_cost "rounds" too.  Only the
+                # minimum is pinned, so needs_update() flags weaker hashes
+                # but never downgrades stronger ones.
+                for bound in ("min", "default"):
+                    options[f"{scheme}__{bound}_rounds"] = value
+            else:
+                options[f"{scheme}__{name}"] = value
+    return CryptContext(schemes=schemes, deprecated="auto", **options)
+
+
+@lru_cache(maxsize=None)
+def get_pwd_context():
+    """Build the passlib context on first use (passlib is slow to import)."""
+    schemes = list(settings.PASSWORD_HASH_SCHEMES)
+    return build_context(schemes, {scheme: hashing_params(scheme) for scheme in schemes})
+
+
+def calibrate_cost(
+    target_seconds: float, scheme: Optional[str] = None
+) -> Tuple[int, Dict[int, float]]:
+    """Find the highest cost of ``scheme`` whose hash takes at most ``target_seconds``.
+
+    Returns the chosen cost and the measured time per cost tried.  Falls back
+    to the lowest cost in range if even that is over target.
+    """
+    scheme = scheme or settings.PASSWORD_HASH_SCHEMES[0]
+    name, low, high = COST_PARAMETERS[scheme]
+    base = hashing_params(scheme)
+    timings: Dict[int, float] = {}
+    chosen = low
+    for cost in range(low, high + 1):
+        context = build_context([scheme], {scheme: dict(base, **{name: cost})})
+        start = time.perf_counter()
+        context.hash("calibration-password")
+        timings[cost] = time.perf_counter() - start
+        if timings[cost] > target_seconds:
+            break
+        chosen = cost
+    return chosen, timings
+
+
+def verify_password(plain_password: str, hashed_password: str) -> bool:
+    """Verify a password against its hash (blocking)."""
+    return get_pwd_context().verify(plain_password, hashed_password)
+
+
+def verify_and_update_password(
+    plain_password: str, hashed_password: str
+) -> Tuple[bool, Optional[str]]:
+    """Verify a password; also return a new hash if the stored one is stale (blocking)."""
+    return get_pwd_context().verify_and_update(plain_password, hashed_password)
+
+
+def get_password_hash(password: str) -> str:
+    """Hash a password (blocking)."""
+    return get_pwd_context().hash(password)
+
+
+class HashingPoolSaturated(Exception):
+    """Raised when the hashing pool already has too many calls queued."""
+
+
+class PasswordHasher:
+    """Runs password hashing off the event loop in a bounded worker pool."""
+
+    def __init__(self, max_workers: int, max_pending: int) -> None:
+        self.max_workers = max_workers
+        self.max_pending = max_pending
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._pending = 0
+        self.completed = 0
+        self.rejected = 0
+        self.wait_seconds_total = 0.0
+        self.wait_seconds_max = 0.0
+        self.compute_seconds_total = 0.0
+        self.compute_seconds_max = 0.0
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(
+                max_workers=self.max_workers,
+                thread_name_prefix="password-hash",
+            )
+        return self._executor
+
+    def _call_done(self, loop: asyncio.AbstractEventLoop, future: Future) -> None:
+        # Runs in the worker thread; settle the count on the event loop
+        try:
+            loop.call_soon_threadsafe(self._release)
+        except RuntimeError:  # loop already closed
+            pass
+
+    def _release(self) -> None:
+        self._pending -= 1
+
+    async def _run(self, func: Callable[..., T], *args: Any) -> T:
+        if self._pending >= self.max_pending:
+            self.rejected += 1
+            raise HashingPoolSaturated(
+                f"{self._pending} password hashing calls already pending"
+            )
+
+        submitted_at = time.perf_counter()
+
+        def timed_call():
+            started_at = time.perf_counter()
+            result = func(*args)
+            return result, started_at - submitted_at, time.perf_counter() - started_at
+
+        loop = asyncio.get_running_loop()
+        future = self._get_executor().submit(timed_call)
+        self._pending += 1
+        # A cancelled caller stops waiting, but a call already running keeps
+        # its worker busy; count it as pending until the call itself ends
+        future.add_done_callback(partial(self._call_done, loop))
+        result, wait, compute = await asyncio.wrap_future(future, loop=loop)
+
+        self.completed += 1
+        self.wait_seconds_total += wait
+        self.wait_seconds_max = max(self.wait_seconds_max, wait)
+        self.compute_seconds_total += compute
+        self.compute_seconds_max = max(self.compute_seconds_max, compute)
+        return result
+
+    async def hash(self, password: str) -> str:
+        """Hash ``password`` in the worker pool."""
+        return await self._run(get_password_hash, password)
+
+    async def hash_many(self, passwords: List[str]) -> List[Union[str, Exception]]:
+        """Hash ``passwords`` in batches using at most half the workers.
+
+        The other workers stay free for logins.  A password that could not
+        be hashed gets the exception in place of its hash; once the pool is
+        saturated the remaining passwords are not attempted.
+        """
+        batch_size = max(1, self.max_workers // 2)
+        results: List[Union[str, Exception]] = []
+        for start in range(0, len(passwords), batch_size):
+            batch = passwords[start:start + batch_size]
+            outcomes = await asyncio.gather(
+                *(self.hash(password) for password in batch), return_exceptions=True
+            )
+            for outcome in outcomes:
+                if isinstance(outcome, BaseException) and not isinstance(outcome, Exception):
+                    raise outcome
+            results.extend(outcomes)
+            saturated = next(
+                (e for e in outcomes if isinstance(e, HashingPoolSaturated)), None
+            )
+            if saturated is not None:
+                results.extend(saturated for _ in passwords[start + batch_size:])
+                break
+        return results
+
+    async def verify(self, plain_password: str, hashed_password: str) -> bool:
+        """Verify ``plain_password`` against ``hashed_password`` in the worker pool."""
+        return await self._run(verify_password, plain_password, hashed_password)
+
+    async def verify_and_update(
+        self, plain_password: str, hashed_password: str
+    ) -> Tuple[bool, Optional[str]]:
+        """Verify in the worker pool, returning a replacement hash if the stored one is stale."""
+        return await self._run(
+            verify_and_update_password, plain_password, hashed_password
+        )
+
+    @property
+    def pending(self) -> int:
+        """Number of calls queued or running in the pool."""
+        return self._pending
+
+    def stats(self) -> Dict[str, Any]:
+        """Return queue depth and wait/compute timing counters."""
+        completed = self.completed or 1
+        return {
+            "max_workers": self.max_workers,
+            "max_pending": self.max_pending,
+            "pending": self._pending,
+            "completed": self.completed,
+            "rejected": self.rejected,
+            "wait_seconds_total": self.wait_seconds_total,
+            "wait_seconds_avg": self.wait_seconds_total / completed,
+            "wait_seconds_max": self.wait_seconds_max,
+            "compute_seconds_total": self.compute_seconds_total,
+            "compute_seconds_avg": self.compute_seconds_total / completed,
+            "compute_seconds_max": self.compute_seconds_max,
+        }
+
+    def shutdown(self) -> None:
+        """Stop the worker threads, waiting for in-flight calls to finish."""
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+
+
+password_hasher = PasswordHasher(
+    max_workers=settings.PASSWORD_HASH_WORKERS,
+    max_pending=settings.PASSWORD_HASH_MAX_PENDING,
+)
+
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    """Verify a password against its hash without blocking the event loop."""
+    return await password_hasher.verify(plain_password, hashed_password)
+
+
+async def verify_and_update_password_async(
+    plain_password: str, hashed_password: str
+) -> Tuple[bool, Optional[str]]:
+    """Verify a password and rehash it if stale, without blocking the event loop."""
+    return await password_hasher.verify_and_update(plain_password, hashed_password)
+
+
+async def get_password_hash_async(password: str) -> str:
+    """Hash a password without blocking the event loop."""
+    return await password_hasher.hash(password)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Pick the password hash cost meeting a latency target on this machine."
+    )
+    parser.add_argument("--target", type=float, default=0.25, help="seconds per hash")
+    parser.add_argument("--scheme", choices=sorted(COST_PARAMETERS), default=None)
+    args = parser.parse_args()
+
+    scheme = args.scheme or settings.PASSWORD_HASH_SCHEMES[0]
+    cost, timings = calibrate_cost(args.target, scheme)
+    name = COST_PARAMETERS[scheme][0]
+    for tried, seconds in timings.items():
+        marker = " <-" if tried == cost else ""
+        print(f"{scheme} {name}={tried}: {seconds * 1000:.1f} ms{marker}")
+    setting = "BCRYPT_ROUNDS" if scheme == "bcrypt" else "ARGON2_TIME_COST"
+    print(f"{setting}={cost}")
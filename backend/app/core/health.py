@@ -0,0 +1,152 @@
+"""
+Background dependency health prober.
+
+Probes run on a fixed interval in a task started from the application
+lifespan, each bounded by its own timeout.  Health endpoints only read the
+cached results, so a burst of probe requests never checks connections out
+of the pool and a slow dependency cannot make probes pile up.
+"""
+import asyncio
+import time
+from datetime import datetime, timezone
+from functools import partial
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+from sqlalchemy import text
+
+from app.core.config import settings
+from app.core.logging import get_logger
+
+logger = get_logger(__name__)
+
+Check = Callable[[], Awaitable[None]]
+
+
+class CheckResult:
+    """Outcome of the most recent run of one check."""
+
+    __slots__ = ("healthy", "error", "latency", "checked_at", "checked_at_monotonic")
+
+    def __init__(self, healthy: bool, error: Optional[str], latency: float) -> None:
+        self.healthy = healthy
+        self.error = error
+        self.latency = latency
+        self.checked_at = datetime.now(timezone.utc)
+        self.checked_at_monotonic = time.monotonic()
+
+
+class HealthProber:
+    """Periodically runs registered checks and caches their results."""
+
+    def __init__(self, interval: float, timeout: float, max_staleness: float) -> None:
+        self.interval = interval
+        self.timeout = timeout
+        self.max_staleness = max_staleness
+        self._checks: Dict[str, Check] = {}
+        self._results: Dict[str, CheckResult] = {}
+        self._task: Optional[asyncio.Task] = None
+
+    def register(self, name: str, check: Check) -> None:
+        """Register ``check``; it should raise on failure."""
+        self._checks[name] = check
+
+    async def _run_check(self, name: str, check: Check) -> None:
+        start = time.perf_counter()
+        try:
+            await asyncio.wait_for(check(), timeout=self.timeout)
+        except asyncio.TimeoutError:
+            error = f"timed out after {self.timeout}s"
+        except Exception as e:
+            error = str(e) or type(e).__name__
+        else:
+            error = None
+        result = CheckResult(error is None, error, time.perf_counter() - start)
+        previous = self._results.get(name)
+        if error is not None and (previous is None or previous.healthy):
+            logger.error("Health check failed", check=name, error=error)
+        elif error is None and previous is not None and not previous.healthy:
+            logger.info("Health check recovered", check=name)
+        self._results[name] = result
+
+    async def probe_once(self) -> None:
+        """Run every check concurrently and store the results."""
+        await asyncio.gather(
+            *(self._run_check(name, check) for name, check in self._checks.items())
+        )
+
+    async def _loop(self) -> None:
+        while True:
+            await self.probe_once()
+            await asyncio.sleep(self.interval)
+
+    def start(self) -> None:
+        """Start probing in the background."""
+        if self._task is None:
+            self._task = asyncio.create_task(self._loop(), name="health-prober")
+
+    async def stop(self) -> None:
+        """Stop the background task."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def status(self, name: str) -> str:
+        """Return ``healthy``, ``unhealthy``, ``stale`` or ``unknown`` for a check."""
+        result = self._results.get(name)
+        if result is None:
+            return "unknown"
+        if time.monotonic() - result.checked_at_monotonic > self.max_staleness:
+            return "stale"
+        return "healthy" if result.healthy else "unhealthy"
+
+    def is_healthy(self) -> bool:
+        """True when every check passed within the staleness bound."""
+        return all(self.status(name) == "healthy" for name in self._checks)
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Return the cached result of every check with its age."""
+        now = time.monotonic()
+        checks = {}
+        for name in self._checks:
+            result = self._results.get(name)
+            entry: Dict[str, Any] = {"status": self.status(name)}
+            if result is not None:
+                entry.update(
+                    checked_at=result.checked_at.isoformat(),
+                    age_seconds=round(now - result.checked_at_monotonic, 3),
+                    latency_seconds=round(result.latency, 6),
+                )
+                if result.error:
+                    entry["error"] = result.error
+            checks[name] = entry
+        return checks
+
+
+async def check_database() -> None:
+    """Run ``SELECT 1`` on the primary database, outside the request pool."""
+    from app.db.session import probe_engine
+
+    async with probe_engine.connect() as conn:
+        await conn.execute(text("SELECT 1"))
+
+
+health_prober = HealthProber(
+    interval=settings.HEALTH_PROBE_INTERVAL_SECONDS,
+    timeout=settings.HEALTH_PROBE_TIMEOUT_SECONDS,
+    max_staleness=settings.HEALTH_MAX_STALENESS_SECONDS,
+)
+health_prober.register("database", check_database)
+
+
+def _register_replica_checks() -> None:
+    from app.db.session import measure_replica_lag, replica_engines
+
+    for index in range(len(replica_engines)):
+        health_prober.register(f"replica_{index}", partial(measure_replica_lag, index))
+
+
+_register_replica_checks()
@@ -0,0 +1,214 @@
+"""
+In-memory store of recent log events.
+
+``LogRingBuffer`` is a structlog processor that keeps the last
+``LOG_STORE_SIZE`` events in a ring buffer, plus smaller per-level,
+per-logger and per-route rings (at most ``LOG_STORE_INDEX_SIZE`` events
+each, ``LOG_STORE_MAX_INDEX_KEYS`` loggers and routes, least recently used
+dropped first) so filtered queries mostly scan only matching events.
+Routes are keyed by template (``/api/v1/users/{user_id}``), as in the HTTP
+metrics, so the set of keys stays small and one key covers every user.
+
+Recording is a few ``deque.append`` calls and takes no lock, so it never
+blocks the code that logs.  Queries copy the rings they read and filter the
+copy, newest first, paging backwards with the sequence number of the oldest
+event returned.
+"""
+import heapq
+import itertools
+import time
+from collections import OrderedDict, deque
+from datetime import datetime
+from typing import Any, Deque, Dict, Iterable, List, MutableMapping, Optional, Tuple
+
+from app.core.config import settings
+
+LEVELS = ("debug", "info", "warning", "error", "critical")
+_LEVEL_RANK = {level: rank for rank, level in enumerate(LEVELS)}
+_LEVEL_ALIASES = {"warn": "warning", "exception": "error", "fatal": "critical"}
+
+# (sequence number, unix time, event dict)
+Entry = Tuple[int, float, Dict[str, Any]]
+
+_PLAIN_TYPES = (str, int, float, bool, type(None))
+
+
+def _snapshot(ring: Deque[Entry]) -> List[Entry]:
+    # Copying can race an append from another thread; just try again
+    while True:
+        try:
+            return list(ring)
+        except RuntimeError:
+            continue
+
+
+def _plain(value: Any) -> Any:
+    if isinstance(value, _PLAIN_TYPES):
+        return value
+    if isinstance(value, (list, tuple)):
+        return [_plain(item) for item in value]
+    if isinstance(value, dict):
+        return {str(key): _plain(item) for key, item in value.items()}
+    return str(value)
+
+
+class _KeyedRings:
+    """Per-key rings with a bounded, least recently used set of keys."""
+
+    def __init__(self, ring_size: int, max_keys: int) -> None:
+        self.ring_size = ring_size
+        self.max_keys = max_keys
+        self._rings: "OrderedDict[str, Deque[Entry]]" = OrderedDict()
+        # Once a key has been dropped, a ring may lack its key's older events
+        self.evicted = False
+
+    def append(self, key: str, entry: Entry) -> None:
+        ring = self._rings.get(key)
+        if ring is None:
+            if len(self._rings) >= self.max_keys:
+                self._rings.popitem(last=False)
+                self.evicted = True
+            ring = self._rings[key] = deque(maxlen=self.ring_size)
+        else:
+            self._rings.move_to_end(key)
+        ring.append(entry)
+
+    def get(self, key: str) -> Optional[Deque[Entry]]:
+        return self._rings.get(key)
+
+
+class LogRingBuffer:
+    """Structlog processor keeping recent events queryable in memory."""
+
+    def __init__(self, size: int, index_size: int, max_index_keys: int) -> None:
+        self._events: Deque[Entry] = deque(maxlen=size)
+        self._by_level: Dict[str, Deque[Entry]] = {
+            level: deque(maxlen=index_size) for level in LEVELS
+        }
+        self._by_logger = _KeyedRings(index_size, max_index_keys)
+        self._by_route = _KeyedRings(index_size, max_index_keys)
+        self._seq = itertools.count(1)
+
+    def __call__(
+        self, logger: Any, method_name: str, event_dict: MutableMapping[str, Any]
+    ) -> MutableMapping[str, Any]:
+        entry: Entry = (next(self._seq), time.time(), dict(event_dict))
+        self._events.append(entry)
+        level = event_dict.get("level") or method_name
+        level = _LEVEL_ALIASES.get(level, level)
+        ring = self._by_level.get(level)
+        if ring is not None:
+            ring.append(entry)
+        name = event_dict.get("logger")
+        if name:
+            self._by_logger.append(name, entry)
+        route = event_dict.get("route")
+        if isinstance(route, str):
+            self._by_route.append(route, entry)
+        return event_dict
+
+    def _candidates(
+        self, min_level: Optional[str], logger: Optional[str], route: Optional[str]
+    ) -> Iterable[Entry]:
+        """Newest-first entries from the smallest rings covering the filters.
+
+        Index rings are shorter than the main ring; once a full one runs out,
+        older entries come from the main ring (and are filtered by the caller).
+        """
+        partial = False
+        if route is not None or logger is not None:
+            keyed, key = (
+                (self._by_route, route) if route is not None else (self._by_logger, logger)
+            )
+            ring = keyed.get(key)
+            if ring is None:
+                return () if not keyed.evicted else reversed(_snapshot(self._events))
+            rings = [ring]
+            partial = keyed.evicted
+        elif min_level is not None:
+            rings = [self._by_level[level] for level in LEVELS[_LEVEL_RANK[min_level]:]]
+        else:
+            return reversed(_snapshot(self._events))
+
+        snapshots = [_snapshot(ring) for ring in rings]
+        # Below this sequence number an index ring may have dropped entries
+        boundary = max(
+            (
+                snapshot[0][0]
+                for ring, snapshot in zip(rings, snapshots)
+                if snapshot and (partial or len(snapshot) == ring.maxlen)
+            ),
+            default=0,
+        )
+        indexed = heapq.merge(
+            *(reversed(snapshot) for snapshot in snapshots), key=lambda entry: -entry[0]
+        )
+        return itertools.chain(
+            itertools.takewhile(lambda entry: entry[0] >= boundary, indexed),
+            (
+                itertools.dropwhile(
+                    lambda entry: entry[0] >= boundary, reversed(_snapshot(self._events))
+                )
+                if boundary
+                else ()
+            ),
+        )
+
+    def query(
+        self,
+        min_level: Optional[str] = None,
+        logger: Optional[str] = None,
+        route: Optional[str] = None,
+        since: Optional[datetime] = None,
+        until: Optional[datetime] = None,
+        before: Optional[int] = None,
+        limit: int = 100,
+    ) -> Tuple[List[Dict[str, Any]], Optional[int]]:
+        """Return up to ``limit`` matching events, newest first, and the next cursor.
+
+        ``min_level`` matches that level and above; ``route`` is a route
+        template.  Pass the returned cursor
+        as ``before`` to get the next (older) page; it is ``None`` on the last.
+        """
+        oldest = self._events[0][0] if self._events else 0
+        since_ts = since.timestamp() if since is not None else None
+        until_ts = until.timestamp() if until is not None else None
+        min_rank = _LEVEL_RANK[min_level] if min_level is not None else None
+
+        items: List[Dict[str, Any]] = []
+        for seq, ts, event in self._candidates(min_level, logger, route):
+            if seq < oldest:
+                # Evicted from the main ring; older index entries are too
+                break
+            if before is not None and seq >= before:
+                continue
+            if until_ts is not None and ts > until_ts:
+                continue
+            if since_ts is not None and ts < since_ts:
+                break
+            if min_rank is not None and _LEVEL_RANK.get(
+                _LEVEL_ALIASES.get(event.get("level"), event.get("level")), -1
+            ) < min_rank:
+                continue
+            if logger is not None and event.get("logger") != logger:
+                continue
+            if route is not None and event.get("route") != route:
+                continue
+            if len(items) == limit:
+                return items, items[-1]["seq"]
+            items.append({"seq": seq, **_plain(event)})
+        return items, None
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "size": len(self._events),
+            "capacity": self._events.maxlen,
+            "oldest_seq": self._events[0][0] if self._events else None,
+        }
+
+
+log_store = LogRingBuffer(
+    size=settings.LOG_STORE_SIZE,
+    index_size=settings.LOG_STORE_INDEX_SIZE,
+    max_index_keys=settings.LOG_STORE_MAX_INDEX_KEYS,
+)
@@ -1,54 +1,237 @@
 """
 Logging configuration for the application.
+
+Log calls on the request path only run the cheap structlog processors and
+enqueue the record.  A background writer thread renders the queued records
+to JSON and writes them out in batches, so slow sinks never stall a request.
+When the queue is full new records are dropped and counted rather than
+blocking the caller.
 """
+import atexit
 import logging
+import logging.handlers
+import queue
+import random
 import sys
-from typing import Any, Dict
+import threading
+import time
+from typing import Any, Dict, List, Optional, TextIO
 
 import structlog
-from google.cloud import logging as cloud_logging
 from structlog.stdlib import LoggerFactory
 
 from app.core.config import settings
+from app.core.log_store import log_store
+
+_STOP = object()
+
+
+class DroppingQueueHandler(logging.handlers.QueueHandler):
+    """Queue handler that drops and counts records when the queue is full."""
+
+    def __init__(self, log_queue: "queue.Queue[Any]") -> None:
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # Rendering is left to the writer thread.
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+class BatchingQueueListener(threading.Thread):
+    """Background thread that renders queued records and writes them in batches."""
+
+    def __init__(
+        self,
+        log_queue: "queue.Queue[Any]",
+        formatter: logging.Formatter,
+        stream: TextIO,
+        handlers: Optional[List[logging.Handler]] = None,
+        batch_size: int = 256,
+        flush_interval: float = 0.2,
+    ) -> None:
+        super().__init__(name="log-writer", daemon=True)
+        self.queue = log_queue
+        self.formatter = formatter
+        self.stream = stream
+        self.handlers = handlers or []
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.written = 0
+        self.batches = 0
+        self.errors = 0
+        self._stopping = False
+
+    def _next_batch(self) -> List[logging.LogRecord]:
+        batch: List[logging.LogRecord] = []
+        item = self.queue.get()
+        deadline = time.monotonic() + self.flush_interval
+        while True:
+            if item is _STOP:
+                self._stopping = True
+                return batch
+            batch.append(item)
+            if len(batch) >= self.batch_size:
+                return batch
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return batch
+            try:
+                item = self.queue.get(timeout=remaining)
+            except queue.Empty:
+                return batch
+
+    def _write(self, batch: List[logging.LogRecord]) -> None:
+        lines = []
+        for record in batch:
+            try:
+                lines.append(self.formatter.format(record))
+            except Exception:
+                self.errors += 1
+        if lines:
+            try:
+                self.stream.write("\n".join(lines) + "\n")
+                self.stream.flush()
+            except Exception:
+                self.errors += 1
+        for handler in self.handlers:
+            for record in batch:
+                if record.levelno >= handler.level:
+                    handler.handle(record)
+        self.written += len(batch)
+        self.batches += 1
+
+    def run(self) -> None:
+        while not self._stopping:
+            batch = self._next_batch()
+            if batch:
+                self._write(batch)
+
+    def stop(self, timeout: float = 5.0) -> None:
+        """Flush everything already queued and stop the thread."""
+        self.queue.put(_STOP)
+        self.join(timeout)
+        for handler in self.handlers:
+            handler.flush()
+
+
+_queue_handler: Optional[DroppingQueueHandler] = None
+_listener: Optional[BatchingQueueListener] = None
 
 
 def setup_logging() -> None:
     """Setup structured logging with GCP integration."""
-    
-    # Configure structlog
+    global _queue_handler, _listener
+    if _listener is not None:
+        return
+
+    renderer = (
+        structlog.processors.JSONRenderer()
+        if settings.LOG_FORMAT == "json"
+        else structlog.dev.ConsoleRenderer()
+    )
+
+    processors = [
+        structlog.stdlib.filter_by_level,
+        structlog.stdlib.add_logger_name,
+        structlog.stdlib.add_log_level,
+        structlog.stdlib.PositionalArgumentsFormatter(),
+        structlog.processors.TimeStamper(fmt="iso"),
+        structlog.processors.StackInfoRenderer(),
+        structlog.processors.format_exc_info,
+        structlog.processors.UnicodeDecoder(),
+    ]
+    if settings.LOG_STORE_SIZE > 0:
+        # Keep recent events queryable from GET /admin/logs
+        processors.append(log_store)
+    processors.append(structlog.stdlib.ProcessorFormatter.wrap_for_formatter)
+
+    # Configure structlog; rendering is deferred to the writer thread
     structlog.configure(
-        processors=[
-            structlog.stdlib.filter_by_level,
-            structlog.stdlib.add_logger_name,
-            structlog.stdlib.add_log_level,
-            structlog.stdlib.PositionalArgumentsFormatter(),
-            structlog.processors.TimeStamper(fmt="iso"),
-            structlog.processors.StackInfoRenderer(),
-            structlog.processors.format_exc_info,
-            structlog.processors.UnicodeDecoder(),
-            structlog.processors.JSONRenderer() if settings.LOG_FORMAT == "json" else structlog.dev.ConsoleRenderer(),
-        ],
+        processors=processors,
         context_class=dict,
         logger_factory=LoggerFactory(),
         wrapper_class=structlog.stdlib.BoundLogger,
         cache_logger_on_first_use=True,
     )
-    
-    # Configure standard library logging
-    logging.basicConfig(
-        format="%(message)s",
-        stream=sys.stdout,
-        level=getattr(logging, settings.LOG_LEVEL.upper()),
+    formatter = structlog.stdlib.ProcessorFormatter(
+        processor=renderer,
+        foreign_pre_chain=[
+            structlog.stdlib.add_logger_name,
+            structlog.stdlib.add_log_level,
+            structlog.processors.TimeStamper(fmt="iso"),
+        ],
     )
-    
+
     # Setup GCP logging if in cloud environment
+    handlers: List[logging.Handler] = []
+    gcp_error: Optional[Exception] = None
     if settings.ENVIRONMENT == "production":
         try:
+            # Imported here: the client library is heavy and unused outside GCP
+            from google.cloud import logging as cloud_logging
+
             client = cloud_logging.Client()
-            client.setup_logging()
+            gcp_handler = client.get_default_handler()
+            gcp_handler.setFormatter(formatter)
+            handlers.append(gcp_handler)
         except Exception as e:
-            logger = structlog.get_logger()
-            logger.warning("Failed to setup GCP logging", error=str(e))
+            gcp_error = e
+
+    # Configure standard library logging to go through the queue
+    log_queue: "queue.Queue[Any]" = queue.Queue(maxsize=settings.LOG_QUEUE_SIZE)
+    _queue_handler = DroppingQueueHandler(log_queue)
+    _listener = BatchingQueueListener(
+        log_queue,
+        formatter=formatter,
+        stream=sys.stdout,
+        handlers=handlers,
+        batch_size=settings.LOG_BATCH_SIZE,
+        flush_interval=settings.LOG_FLUSH_INTERVAL_SECONDS,
+    )
+    _listener.start()
+    atexit.register(shutdown_logging)
+
+    root_logger = logging.getLogger()
+    for handler in root_logger.handlers[:]:
+        root_logger.removeHandler(handler)
+    root_logger.addHandler(_queue_handler)
+    root_logger.setLevel(getattr(logging, settings.LOG_LEVEL.upper()))
+
+    if gcp_error is not None:
+        logger = structlog.get_logger()
+        logger.warning("Failed to setup GCP logging", error=str(gcp_error))
+
+
+def shutdown_logging() -> None:
+    """Flush queued log records and stop the writer thread."""
+    global _queue_handler, _listener
+    if _listener is None:
+        return
+    logging.getLogger().removeHandler(_queue_handler)
+    _listener.stop()
+    _queue_handler = None
+    _listener = None
+
+
+def get_logging_stats() -> Dict[str, Any]:
+    """Return queue depth, drop and write counters for the logging pipeline."""
+    if _listener is None or _queue_handler is None:
+        return {"enabled": False}
+    return {
+        "enabled": True,
+        "queued": _listener.queue.qsize(),
+        "dropped": _queue_handler.dropped,
+        "written": _listener.written,
+        "batches": _listener.batches,
+        "errors": _listener.errors,
+    }
 
 
 def get_logger(name: str = __name__) -> structlog.BoundLogger:
@@ -61,34 +244,49 @@ logger = get_logger()
 
 
 class RequestLoggingMiddleware:
-    """Middleware to log HTTP requests."""
-    
-    def __init__(self, app):
+    """Middleware to log HTTP requests.
+
+    Only a ``LOG_REQUEST_SAMPLE_RATE`` fraction of requests is logged;
+    server errors are always logged on completion.
+    """
+
+    def __init__(self, app, sample_rate: Optional[float] = None):
         self.app = app
         self.logger = get_logger("http")
-    
+        self.sample_rate = (
+            settings.LOG_REQUEST_SAMPLE_RATE if sample_rate is None else sample_rate
+        )
+
     async def __call__(self, scope, receive, send):
         if scope["type"] == "http":
+            sampled = self.sample_rate >= 1.0 or random.random() < self.sample_rate
+
             # Log request
-            self.logger.info(
-                "Request started",
-                method=scope["method"],
-                path=scope["path"],
-                query_string=scope["query_string"].decode(),
-                client=scope.get("client"),
-            )
-            
+            if sampled:
+                self.logger.info(
+                    "Request started",
+                    method=scope["method"],
+                    path=scope["path"],
+                    query_string=scope["query_string"].decode(),
+                    client=scope.get("client"),
+                )
+
             # Create a custom send function to log response
             async def send_wrapper(message):
-                if message["type"] == "http.response.start":
+                if message["type"] == "http.response.start" and (
+                    sampled or message["status"] >= 500
+                ):
+                    # The router records the matched route in the (shared) scope
+                    route = scope.get("route")
                     self.logger.info(
                         "Request completed",
                         method=scope["method"],
                         path=scope["path"],
+                        route=getattr(route, "path", None),
                         status_code=message["status"],
                     )
                 await send(message)
-            
+
             await self.app(scope, receive, send_wrapper)
         else:
             await self.app(scope, receive, send)
@@ -107,4 +305,4 @@ def log_error(error: Exception, context: Dict[str, Any] = None) -> None:
         error_message=str(error),
         context=context or {},
         exc_info=True,
-    ) 
\ No newline at end of file
+    )
@@ -0,0 +1,410 @@
+"""
+Login throttling and account lockout.
+
+Failed logins are tracked in a sliding window per email and per client IP.
+A key over its failure budget, or inside its backoff period, is rejected
+before any password is hashed, so credential-stuffing traffic costs almost
+no CPU.  The check and counting are one atomic step: an admitted attempt
+is counted as a failure straight away and taken back if it succeeds, so a
+burst of concurrent attempts cannot all pass before the first one fails.
+Once a key reaches ``backoff_after`` failures in the window it is locked
+for ``LOGIN_BACKOFF_BASE_SECONDS`` doubled for every further failure, up to
+``LOGIN_BACKOFF_MAX_SECONDS``.
+
+As with the rate limiter, a bounded in-process tracker sits in front of an
+optional Redis tracker shared by every instance: the local tracker only
+sees a subset of the failures Redis sees, so anything it rejects Redis
+would reject too.  Redis errors fall back to the local tracker.
+"""
+import time
+import uuid
+from collections import OrderedDict, deque
+from typing import Any, Deque, Dict, List, Optional, Sequence, Tuple
+
+from app.core.config import settings
+from app.core.logging import get_logger
+from app.core.metrics import registry
+
+logger = get_logger(__name__)
+
+login_attempts_rejected_total = registry.counter(
+    "login_attempts_rejected_total",
+    "Login attempts rejected before password verification, by throttled key.",
+    ("scope",),
+)
+
+RESERVE_SCRIPT = """
+local window = tonumber(ARGV[1])
+local clock = redis.call('TIME')
+local now = tonumber(clock[1]) + tonumber(clock[2]) / 1000000
+local index = 0
+for i = 1, #KEYS, 2 do
+    index = index + 1
+    local max_failures = tonumber(ARGV[2 + index])
+    redis.call('ZREMRANGEBYSCORE', KEYS[i], '-inf', now - window)
+    local retry_after = 0
+    local count = redis.call('ZCARD', KEYS[i])
+    if count >= max_failures then
+        local oldest = redis.call('ZRANGE', KEYS[i], count - max_failures, count - max_failures, 'WITHSCORES')
+        retry_after = tonumber(oldest[2]) + window - now
+    end
+    local lock_ms = redis.call('PTTL', KEYS[i + 1])
+    if lock_ms > 0 then
+        retry_after = math.max(retry_after, lock_ms / 1000)
+    end
+    if retry_after > 0 then
+        return {index, tostring(retry_after)}
+    end
+end
+for i = 1, #KEYS, 2 do
+    redis.call('ZADD', KEYS[i], now, ARGV[2])
+    redis.call('PEXPIRE', KEYS[i], math.ceil(window * 1000))
+end
+return {0, '0'}
+"""
+
+FAILURE_SCRIPT = """
+local window = tonumber(ARGV[1])
+local max_failures = tonumber(ARGV[2])
+local backoff_after = tonumber(ARGV[3])
+local backoff_base = tonumber(ARGV[4])
+local backoff_max = tonumber(ARGV[5])
+local clock = redis.call('TIME')
+local now = tonumber(clock[1]) + tonumber(clock[2]) / 1000000
+redis.call('ZREMRANGEBYSCORE', KEYS[1], '-inf', now - window)
+redis.call('ZADD', KEYS[1], 'NX', now, ARGV[6])
+redis.call('ZREMRANGEBYRANK', KEYS[1], 0, -(max_failures + 1))
+redis.call('PEXPIRE', KEYS[1], math.ceil(window * 1000))
+local count = redis.call('ZCARD', KEYS[1])
+if count >= backoff_after then
+    local lock = math.min(backoff_base * 2 ^ (count - backoff_after), backoff_max)
+    redis.call('SET', KEYS[2], '1', 'PX', math.ceil(lock * 1000))
+end
+return count
+"""
+
+# (key, policy) pairs an attempt is counted against
+ThrottleKeys = Sequence[Tuple[str, "ThrottlePolicy"]]
+
+
+class ThrottlePolicy:
+    """Failure limits for one kind of key (email or client IP)."""
+
+    __slots__ = ("max_failures", "backoff_after")
+
+    def __init__(self, max_failures: int, backoff_after: int) -> None:
+        self.max_failures = max_failures
+        self.backoff_after = backoff_after
+
+
+class LoginAttempt:
+    """One login attempt, counted against its keys from the check onwards."""
+
+    __slots__ = ("id", "keys", "retry_after")
+
+    def __init__(self, keys: Dict[str, str]) -> None:
+        self.id = uuid.uuid4().hex
+        # scope -> throttled key
+        self.keys = keys
+        # Seconds to wait when the attempt was rejected, 0 when it is counted
+        self.retry_after = 0.0
+
+
+class LocalFailureTracker:
+    """In-process sliding-window attempt counts for a bounded number of keys."""
+
+    def __init__(
+        self, window: float, backoff_base: float, backoff_max: float, max_keys: int
+    ) -> None:
+        self.window = window
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.max_keys = max_keys
+        # key -> [(timestamp, attempt id) per counted attempt, locked until]
+        self._entries: "OrderedDict[str, List[Any]]" = OrderedDict()
+
+    def _prune(self, key: str, now: float) -> Optional[List[Any]]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        attempts: Deque[Tuple[float, str]] = entry[0]
+        while attempts and attempts[0][0] <= now - self.window:
+            attempts.popleft()
+        if not attempts and entry[1] <= now:
+            del self._entries[key]
+            return None
+        return entry
+
+    def _entry(self, key: str, policy: ThrottlePolicy, now: float) -> List[Any]:
+        entry = self._prune(key, now)
+        if entry is None:
+            entry = [deque(maxlen=policy.max_failures), 0.0]
+            self._entries[key] = entry
+            if len(self._entries) > self.max_keys:
+                self._entries.popitem(last=False)
+        else:
+            self._entries.move_to_end(key)
+        return entry
+
+    def retry_after(self, key: str, policy: ThrottlePolicy) -> float:
+        """Seconds until ``key`` may attempt to log in again (0 if it may now)."""
+        now = time.monotonic()
+        entry = self._prune(key, now)
+        if entry is None:
+            return 0.0
+        attempts, locked_until = entry
+        retry_after = max(0.0, locked_until - now)
+        if len(attempts) >= policy.max_failures:
+            oldest = attempts[len(attempts) - policy.max_failures][0]
+            retry_after = max(retry_after, oldest + self.window - now)
+        return retry_after
+
+    def reserve(self, keys: ThrottleKeys, attempt_id: str) -> Tuple[int, float]:
+        """Count an attempt against every key, unless one of them is throttled.
+
+        Returns the index of the first throttled key and its wait in seconds,
+        or ``(-1, 0.0)`` once the attempt is counted.
+        """
+        for index, (key, policy) in enumerate(keys):
+            retry_after = self.retry_after(key, policy)
+            if retry_after:
+                return index, retry_after
+        now = time.monotonic()
+        for key, policy in keys:
+            self._entry(key, policy, now)[0].append((now, attempt_id))
+        return -1, 0.0
+
+    def add_failure(self, key: str, policy: ThrottlePolicy, attempt_id: str) -> None:
+        """Keep the attempt counted as a failure, locking ``key`` once over ``backoff_after``."""
+        now = time.monotonic()
+        attempts, locked_until = entry = self._entry(key, policy, now)
+        if all(counted != attempt_id for _, counted in attempts):
+            # Its reservation aged out or the key was evicted meanwhile
+            attempts.append((now, attempt_id))
+        if len(attempts) >= policy.backoff_after:
+            lock = min(
+                self.backoff_base * 2 ** (len(attempts) - policy.backoff_after),
+                self.backoff_max,
+            )
+            entry[1] = max(locked_until, now + lock)
+
+    def release(self, key: str, attempt_id: str) -> None:
+        """Stop counting the attempt against ``key``."""
+        entry = self._entries.get(key)
+        if entry is None:
+            return
+        attempts = entry[0]
+        for item in attempts:
+            if item[1] == attempt_id:
+                attempts.remove(item)
+                return
+
+    def reset(self, key: str) -> None:
+        """Forget the attempts counted against ``key``."""
+        self._entries.pop(key, None)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class RedisFailureTracker:
+    """Sliding-window attempt counts in Redis sorted sets, updated by Lua scripts."""
+
+    def __init__(
+        self,
+        client: Any,
+        window: float,
+        backoff_base: float,
+        backoff_max: float,
+        prefix: str,
+    ) -> None:
+        self.client = client
+        self.window = window
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.prefix = prefix
+        self._reserve = client.register_script(RESERVE_SCRIPT)
+        self._failure = client.register_script(FAILURE_SCRIPT)
+
+    def _keys(self, key: str) -> List[str]:
+        return [f"{self.prefix}{key}:failures", f"{self.prefix}{key}:lock"]
+
+    async def reserve(self, keys: ThrottleKeys, attempt_id: str) -> Tuple[int, float]:
+        """Count an attempt against every key, unless one of them is throttled.
+
+        Returns the index of the first throttled key and its wait in seconds,
+        or ``(-1, 0.0)`` once the attempt is counted.
+        """
+        index, retry_after = await self._reserve(
+            keys=[name for key, _ in keys for name in self._keys(key)],
+            args=[self.window, attempt_id, *(policy.max_failures for _, policy in keys)],
+        )
+        return int(index) - 1, max(0.0, float(retry_after))
+
+    async def add_failure(self, key: str, policy: ThrottlePolicy, attempt_id: str) -> None:
+        """Keep the attempt counted as a failure, locking ``key`` once over ``backoff_after``."""
+        await self._failure(
+            keys=self._keys(key),
+            args=[
+                self.window,
+                policy.max_failures,
+                policy.backoff_after,
+                self.backoff_base,
+                self.backoff_max,
+                attempt_id,
+            ],
+        )
+
+    async def release(self, key: str, attempt_id: str) -> None:
+        """Stop counting the attempt against ``key``."""
+        await self.client.zrem(self._keys(key)[0], attempt_id)
+
+    async def reset(self, key: str) -> None:
+        """Forget the attempts counted against ``key``."""
+        await self.client.delete(*self._keys(key))
+
+    async def close(self) -> None:
+        await self.client.aclose()
+
+
+class LoginThrottle:
+    """Per-email and per-IP login failure limits, checked before hashing."""
+
+    def __init__(
+        self,
+        local: LocalFailureTracker,
+        policies: Dict[str, ThrottlePolicy],
+        shared: Optional[RedisFailureTracker] = None,
+    ) -> None:
+        self.local = local
+        self.policies = policies
+        self.shared = shared
+        self.rejected: Dict[str, int] = {scope: 0 for scope in policies}
+        self.failures = 0
+        self.shared_errors = 0
+
+    def _keys(self, email: str, client_ip: Optional[str]) -> Dict[str, str]:
+        keys = {"email": f"email:{email.strip().lower()}"}
+        if client_ip:
+            keys["ip"] = f"ip:{client_ip}"
+        return keys
+
+    def _policy_keys(self, attempt: LoginAttempt) -> ThrottleKeys:
+        return [(key, self.policies[scope]) for scope, key in attempt.keys.items()]
+
+    def _shared_failed(self, error: Exception) -> None:
+        self.shared_errors += 1
+        if self.shared_errors == 1 or self.shared_errors % 1000 == 0:
+            logger.warning(
+                "Shared login throttle unavailable",
+                error=str(error),
+                errors=self.shared_errors,
+            )
+
+    async def check(self, email: str, client_ip: Optional[str]) -> LoginAttempt:
+        """Count an attempt against the email and client IP unless either is throttled.
+
+        The attempt counts as a failure from here on, so concurrent attempts
+        cannot all pass before the first of them fails; ``record_success``
+        and ``release`` take it back.  A rejected attempt is not counted and
+        has ``retry_after`` set to the seconds to wait.
+        """
+        attempt = LoginAttempt(self._keys(email, client_ip))
+        keys = self._policy_keys(attempt)
+        index, retry_after = self.local.reserve(keys, attempt.id)
+        if index < 0 and self.shared is not None:
+            try:
+                index, retry_after = await self.shared.reserve(keys, attempt.id)
+            except Exception as e:
+                self._shared_failed(e)
+            else:
+                if index >= 0:
+                    for key, _ in keys:
+                        self.local.release(key, attempt.id)
+        if index >= 0:
+            scope = list(attempt.keys)[index]
+            self.rejected[scope] += 1
+            login_attempts_rejected_total.inc(scope)
+            attempt.retry_after = retry_after
+        return attempt
+
+    async def record_failure(self, attempt: LoginAttempt) -> None:
+        """Keep a failed attempt counted against the email and the client IP."""
+        self.failures += 1
+        for key, policy in self._policy_keys(attempt):
+            self.local.add_failure(key, policy, attempt.id)
+            if self.shared is not None:
+                try:
+                    await self.shared.add_failure(key, policy, attempt.id)
+                except Exception as e:
+                    self._shared_failed(e)
+
+    async def record_success(self, attempt: LoginAttempt) -> None:
+        """Clear the failures of the email; the client IP's are kept."""
+        email_key = attempt.keys["email"]
+        self.local.reset(email_key)
+        if self.shared is not None:
+            try:
+                await self.shared.reset(email_key)
+            except Exception as e:
+                self._shared_failed(e)
+        await self._release(attempt, skip=email_key)
+
+    async def release(self, attempt: LoginAttempt) -> None:
+        """Stop counting an attempt that ended without a verdict (e.g. an error)."""
+        await self._release(attempt)
+
+    async def _release(self, attempt: LoginAttempt, skip: Optional[str] = None) -> None:
+        for key in attempt.keys.values():
+            if key == skip:
+                continue
+            self.local.release(key, attempt.id)
+            if self.shared is not None:
+                try:
+                    await self.shared.release(key, attempt.id)
+                except Exception as e:
+                    self._shared_failed(e)
+
+    def stats(self) -> Dict[str, Any]:
+        """Return failure and rejection counters."""
+        return {
+            "shared": self.shared is not None,
+            "tracked_keys": len(self.local),
+            "failures": self.failures,
+            "rejected": dict(self.rejected),
+            "shared_errors": self.shared_errors,
+        }
+
+    async def close(self) -> None:
+        if self.shared is not None:
+            await self.shared.close()
+
+
+def create_login_throttle() -> LoginThrottle:
+    """Build the login throttle from settings, sharing state through Redis if configured."""
+    local = LocalFailureTracker(
+        window=settings.LOGIN_FAILURE_WINDOW_SECONDS,
+        backoff_base=settings.LOGIN_BACKOFF_BASE_SECONDS,
+        backoff_max=settings.LOGIN_BACKOFF_MAX_SECONDS,
+        max_keys=settings.LOGIN_THROTTLE_MAX_KEYS,
+    )
+    policies = {
+        "email": ThrottlePolicy(
+            settings.LOGIN_MAX_FAILURES_PER_EMAIL, settings.LOGIN_BACKOFF_AFTER_PER_EMAIL
+        ),
+        "ip": ThrottlePolicy(
+            settings.LOGIN_MAX_FAILURES_PER_IP, settings.LOGIN_BACKOFF_AFTER_PER_IP
+        ),
+    }
+    shared = None
+    if settings.REDIS_URL:
+        from redis import asyncio as aioredis
+
+        shared = RedisFailureTracker(
+            aioredis.from_url(settings.REDIS_URL),
+            window=settings.LOGIN_FAILURE_WINDOW_SECONDS,
+            backoff_base=settings.LOGIN_BACKOFF_BASE_SECONDS,
+            backoff_max=settings.LOGIN_BACKOFF_MAX_SECONDS,
+            prefix=settings.LOGIN_THROTTLE_REDIS_PREFIX,
+        )
+    return LoginThrottle(local, policies, shared)
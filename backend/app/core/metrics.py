@@ -0,0 +1,355 @@
+"""
+In-process metrics with Prometheus text exposition.
+
+The primitives here are intentionally minimal: they are updated from a
+single event loop without locking, and rendered on demand by the
+``/metrics`` endpoint.  Values owned by other components (pool usage, cache
+counters) are read at scrape time through registered collectors instead of
+being pushed on every change.
+"""
+import time
+from bisect import bisect_left
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from app.core.hashing import password_hasher
+from app.core.logging import get_logging_stats
+from app.core.principal_cache import principal_cache
+
+LabelValues = Tuple[str, ...]
+Sample = Tuple[str, Dict[str, str], float]
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(labels: Dict[str, str]) -> str:
+    if not labels:
+        return ""
+    inner = ",".join(f'{name}="{_escape(str(value))}"' for name, value in labels.items())
+    return "{" + inner + "}"
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+class Metric:
+    """Base class for a named metric family with optional labels."""
+
+    type_name = "untyped"
+
+    def __init__(
+        self, name: str, documentation: str, labelnames: Sequence[str] = ()
+    ) -> None:
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+
+    def _labels(self, values: LabelValues) -> Dict[str, str]:
+        return dict(zip(self.labelnames, values))
+
+    def samples(self) -> Iterable[Sample]:
+        raise NotImplementedError
+
+
+class Counter(Metric):
+    """Monotonically increasing value."""
+
+    type_name = "counter"
+
+    def __init__(self, *args: Any, **kwargs: Any) -> None:
+        super().__init__(*args, **kwargs)
+        self._values: Dict[LabelValues, float] = {}
+
+    def inc(self, *labelvalues: str, amount: float = 1.0) -> None:
+        self._values[labelvalues] = self._values.get(labelvalues, 0.0) + amount
+
+    def samples(self) -> Iterable[Sample]:
+        for labelvalues, value in self._values.items():
+            yield self.name, self._labels(labelvalues), value
+
+
+class Gauge(Metric):
+    """Value that can go up and down."""
+
+    type_name = "gauge"
+
+    def __init__(self, *args: Any, **kwargs: Any) -> None:
+        super().__init__(*args, **kwargs)
+        self._values: Dict[LabelValues, float] = {}
+
+    def inc(self, *labelvalues: str, amount: float = 1.0) -> None:
+        self._values[labelvalues] = self._values.get(labelvalues, 0.0) + amount
+
+    def dec(self, *labelvalues: str, amount: float = 1.0) -> None:
+        self.inc(*labelvalues, amount=-amount)
+
+    def set(self, value: float, *labelvalues: str) -> None:
+        self._values[labelvalues] = value
+
+    def samples(self) -> Iterable[Sample]:
+        for labelvalues, value in self._values.items():
+            yield self.name, self._labels(labelvalues), value
+
+
+class Histogram(Metric):
+    """Distribution of observations in cumulative buckets."""
+
+    type_name = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+    ) -> None:
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # Per label set: [bucket counts..., +Inf count], sum
+        self._values: Dict[LabelValues, Tuple[List[int], List[float]]] = {}
+
+    def observe(self, value: float, *labelvalues: str) -> None:
+        entry = self._values.get(labelvalues)
+        if entry is None:
+            entry = ([0] * (len(self.buckets) + 1), [0.0])
+            self._values[labelvalues] = entry
+        counts, total = entry
+        counts[bisect_left(self.buckets, value)] += 1
+        total[0] += value
+
+    def samples(self) -> Iterable[Sample]:
+        for labelvalues, (counts, total) in self._values.items():
+            labels = self._labels(labelvalues)
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += count
+                yield (
+                    f"{self.name}_bucket",
+                    {**labels, "le": _format_value(bound)},
+                    cumulative,
+                )
+            yield f"{self.name}_sum", labels, total[0]
+            yield f"{self.name}_count", labels, cumulative
+
+
+Collector = Callable[[], Iterable[Metric]]
+
+
+class MetricsRegistry:
+    """Holds metric families and scrape-time collectors."""
+
+    def __init__(self) -> None:
+        self._metrics: Dict[str, Metric] = {}
+        self._collectors: List[Collector] = []
+
+    def register(self, metric: Metric) -> Metric:
+        self._metrics[metric.name] = metric
+        return metric
+
+    def counter(
+        self, name: str, documentation: str, labelnames: Sequence[str] = ()
+    ) -> Counter:
+        return self.register(Counter(name, documentation, labelnames))
+
+    def gauge(
+        self, name: str, documentation: str, labelnames: Sequence[str] = ()
+    ) -> Gauge:
+        return self.register(Gauge(name, documentation, labelnames))
+
+    def histogram(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+    ) -> Histogram:
+        return self.register(Histogram(name, documentation, labelnames, buckets))
+
+    def register_collector(self, collector: Collector) -> None:
+        """Register a callable returning freshly built metrics at scrape time."""
+        self._collectors.append(collector)
+
+    def render(self) -> str:
+        """Render every metric in the Prometheus text exposition format."""
+        metrics = list(self._metrics.values())
+        for collector in self._collectors:
+            metrics.extend(collector())
+        lines = []
+        for metric in metrics:
+            lines.append(f"# HELP {metric.name} {_escape(metric.documentation)}")
+            lines.append(f"# TYPE {metric.name} {metric.type_name}")
+            for name, labels, value in metric.samples():
+                lines.append(f"{name}{_format_labels(labels)} {_format_value(value)}")
+        return "\n".join(lines) + "\n"
+
+
+registry = MetricsRegistry()
+
+http_requests_total = registry.counter(
+    "http_requests_total",
+    "HTTP requests by method, route template and status code.",
+    ("method", "route", "status"),
+)
+http_request_duration_seconds = registry.histogram(
+    "http_request_duration_seconds",
+    "HTTP request latency by method and route template.",
+    ("method", "route"),
+)
+http_requests_in_flight = registry.gauge(
+    "http_requests_in_flight",
+    "HTTP requests currently being handled.",
+)
+http_requests_in_flight.set(0)
+
+UNMATCHED_ROUTE = "<unmatched>"
+
+
+class MetricsMiddleware:
+    """Pure ASGI middleware recording request counts and latency per route template."""
+
+    def __init__(self, app) -> None:
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status_code = 500
+
+        async def send_wrapper(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        http_requests_in_flight.inc()
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            duration = time.perf_counter() - start
+            http_requests_in_flight.dec()
+            # The router records the matched route in the (shared) scope
+            route = scope.get("route")
+            template = getattr(route, "path", None) or UNMATCHED_ROUTE
+            method = scope["method"]
+            http_request_duration_seconds.observe(duration, method, template)
+            http_requests_total.inc(method, template, str(status_code))
+
+
+def _gauge(name: str, documentation: str, value: Optional[float]) -> Gauge:
+    gauge = Gauge(name, documentation)
+    if value is not None:
+        gauge.set(value)
+    return gauge
+
+
+def _counter(name: str, documentation: str, value: float) -> Counter:
+    counter = Counter(name, documentation)
+    counter.inc(amount=value)
+    return counter
+
+
+def collect_db_pool_metrics() -> List[Metric]:
+    """Connection pool usage and statement cache results of every engine."""
+    from app.db.session import engine, replica_engines, statement_cache_events
+
+    engines = [("primary", engine)] + [
+        (f"replica_{index}", replica) for index, replica in enumerate(replica_engines)
+    ]
+    metrics = []
+    for name, method, documentation in (
+        ("db_pool_size", "size", "Configured number of pooled connections."),
+        ("db_pool_checked_out", "checkedout", "Connections currently checked out."),
+        ("db_pool_checked_in", "checkedin", "Idle connections in the pool."),
+        ("db_pool_overflow", "overflow", "Connections open beyond the pool size."),
+    ):
+        gauge = Gauge(name, documentation, ("engine",))
+        for label, pool_engine in engines:
+            reader = getattr(pool_engine.pool, method, None)
+            if reader is not None:
+                gauge.set(reader(), label)
+        metrics.append(gauge)
+
+    statements = Counter(
+        "db_statement_cache_total",
+        "Statements executed, by engine and compiled-statement cache result.",
+        ("engine", "result"),
+    )
+    for (label, result), count in list(statement_cache_events.items()):
+        statements.inc(label, result, amount=count)
+    metrics.append(statements)
+    return metrics
+
+
+def collect_component_metrics() -> List[Metric]:
+    """Counters kept by the principal cache, hashing pool and logging pipeline."""
+    cache = principal_cache.stats()
+    hashing = password_hasher.stats()
+    logging_stats = get_logging_stats()
+    metrics = [
+        _gauge("principal_cache_size", "Cached principals.", cache["size"]),
+        _counter("principal_cache_hits_total", "Principal cache hits.", cache["hits"]),
+        _counter(
+            "principal_cache_misses_total", "Principal cache misses.", cache["misses"]
+        ),
+        _counter(
+            "token_version_cache_hits_total",
+            "Token version cache hits.",
+            cache["token_versions"]["hits"],
+        ),
+        _counter(
+            "token_version_cache_misses_total",
+            "Token version cache misses.",
+            cache["token_versions"]["misses"],
+        ),
+        _gauge(
+            "password_hash_pending",
+            "Hashing calls queued or running.",
+            hashing["pending"],
+        ),
+        _counter(
+            "password_hash_rejected_total",
+            "Hashing calls rejected because the pool was saturated.",
+            hashing["rejected"],
+        ),
+        _counter(
+            "password_hash_wait_seconds_total",
+            "Time hashing calls spent waiting for a worker.",
+            hashing["wait_seconds_total"],
+        ),
+        _counter(
+            "password_hash_compute_seconds_total",
+            "Time spent hashing or verifying passwords.",
+            hashing["compute_seconds_total"],
+        ),
+    ]
+    if logging_stats.get("enabled"):
+        metrics.extend([
+            _gauge(
+                "log_queue_depth",
+                "Log records waiting to be written.",
+                logging_stats["queued"],
+            ),
+            _counter(
+                "log_records_dropped_total",
+                "Log records dropped because the queue was full.",
+                logging_stats["dropped"],
+            ),
+        ])
+    return metrics
+
+
+registry.register_collector(collect_db_pool_metrics)
+registry.register_collector(collect_component_metrics)
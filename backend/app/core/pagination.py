@@ -0,0 +1,28 @@
+"""
+Opaque cursor encoding for keyset pagination.
+"""
+import base64
+import json
+from typing import Any, Dict
+
+
+class InvalidCursor(ValueError):
+    """Raised when a client supplies a cursor that cannot be decoded."""
+
+
+def encode_cursor(values: Dict[str, Any]) -> str:
+    """Encode keyset values into an opaque, URL-safe cursor."""
+    raw = json.dumps(values, separators=(",", ":"), default=str).encode()
+    return base64.urlsafe_b64encode(raw).rstrip(b"=").decode()
+
+
+def decode_cursor(cursor: str) -> Dict[str, Any]:
+    """Decode a cursor produced by ``encode_cursor``."""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode()))
+    except (ValueError, TypeError) as e:
+        raise InvalidCursor("Malformed cursor") from e
+    if not isinstance(values, dict):
+        raise InvalidCursor("Malformed cursor")
+    return values
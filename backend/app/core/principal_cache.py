@@ -0,0 +1,178 @@
+"""
+Cache of authenticated principals used by ``get_current_user``.
+
+Entries are compact snapshots of the user row rather than live ORM objects, so
+they are safe to share between requests and sessions.  The cache is
+per-process: writes made through the user service invalidate the local copy,
+and the TTL bounds how long other processes can serve a stale principal.
+
+Tokens that embed their claims are authenticated from a separate, shorter
+lived cache of each user's ``token_version``.
+"""
+from datetime import datetime
+from typing import Any, Dict, Optional, Union
+
+from app.core.cache import LRUTTLCache
+from app.core.config import settings
+
+
+class CachedPrincipal:
+    """Read-only snapshot of the fields of a user needed by the API layer."""
+
+    __slots__ = (
+        "id",
+        "email",
+        "full_name",
+        "is_active",
+        "is_superuser",
+        "created_at",
+        "updated_at",
+        "token_version",
+    )
+
+    def __init__(
+        self,
+        id: int,
+        email: str,
+        full_name: Optional[str],
+        is_active: bool,
+        is_superuser: bool,
+        created_at: Optional[datetime],
+        updated_at: Optional[datetime],
+        token_version: int = 0,
+    ) -> None:
+        self.id = id
+        self.email = email
+        self.full_name = full_name
+        self.is_active = is_active
+        self.is_superuser = is_superuser
+        self.created_at = created_at
+        self.updated_at = updated_at
+        self.token_version = token_version
+
+    @classmethod
+    def from_user(cls, user: Any) -> "CachedPrincipal":
+        """Build a snapshot from a ``User`` ORM instance."""
+        return cls(
+            id=user.id,
+            email=user.email,
+            full_name=user.full_name,
+            is_active=user.is_active,
+            is_superuser=user.is_superuser,
+            created_at=user.created_at,
+            updated_at=user.updated_at,
+            token_version=user.token_version or 0,
+        )
+
+    def __repr__(self) -> str:
+        return f"CachedPrincipal(id={self.id!r}, email={self.email!r})"
+
+
+class TokenPrincipal:
+    """Principal built from the claims of a self-contained access token."""
+
+    __slots__ = ("id", "email", "is_active", "is_superuser", "token_version")
+
+    def __init__(
+        self,
+        id: int,
+        email: str,
+        is_active: bool,
+        is_superuser: bool,
+        token_version: int,
+    ) -> None:
+        self.id = id
+        self.email = email
+        self.is_active = is_active
+        self.is_superuser = is_superuser
+        self.token_version = token_version
+
+    @classmethod
+    def from_claims(cls, claims: Dict[str, Any]) -> Optional["TokenPrincipal"]:
+        """Build a principal from token claims, or ``None`` if any are missing."""
+        try:
+            return cls(
+                id=int(claims["uid"]),
+                email=claims["sub"],
+                is_active=bool(claims["act"]),
+                is_superuser=bool(claims["su"]),
+                token_version=int(claims["ver"]),
+            )
+        except (KeyError, TypeError, ValueError):
+            return None
+
+    def __repr__(self) -> str:
+        return f"TokenPrincipal(id={self.id!r}, email={self.email!r})"
+
+
+Principal = Union[CachedPrincipal, TokenPrincipal]
+
+
+class PrincipalCache:
+    """LRU+TTL cache of principals keyed by email, with a by-id index for invalidation."""
+
+    def __init__(
+        self, maxsize: int, ttl: float, version_maxsize: int, version_ttl: float
+    ) -> None:
+        self._by_email: LRUTTLCache[str, CachedPrincipal] = LRUTTLCache(maxsize, ttl)
+        self._email_by_id: Dict[int, str] = {}
+        self._versions: LRUTTLCache[int, int] = LRUTTLCache(version_maxsize, version_ttl)
+
+    def get(self, email: str) -> Optional[CachedPrincipal]:
+        """Return the cached principal for ``email``, if any."""
+        return self._by_email.get(email)
+
+    def put(self, user: Any) -> CachedPrincipal:
+        """Snapshot ``user`` into the cache and return the snapshot."""
+        principal = CachedPrincipal.from_user(user)
+        self._by_email.set(principal.email, principal)
+        self._email_by_id[principal.id] = principal.email
+        self._versions.set(principal.id, principal.token_version)
+        if len(self._email_by_id) > 2 * max(self._by_email.maxsize, 1):
+            # Entries evicted from the LRU leave stale index rows behind.
+            self._email_by_id = {
+                user_id: email
+                for user_id, email in self._email_by_id.items()
+                if email in self._by_email
+            }
+        return principal
+
+    def get_token_version(self, user_id: int) -> Optional[int]:
+        """Return the cached ``token_version`` of ``user_id``, if any."""
+        return self._versions.get(user_id)
+
+    def put_token_version(self, user_id: int, version: int) -> None:
+        """Cache the current ``token_version`` of ``user_id``."""
+        self._versions.set(user_id, version)
+
+    def invalidate(
+        self, *, email: Optional[str] = None, user_id: Optional[int] = None
+    ) -> None:
+        """Drop the cached principal identified by ``email`` and/or ``user_id``."""
+        if user_id is not None:
+            self._versions.pop(user_id)
+            indexed_email = self._email_by_id.pop(user_id, None)
+            if indexed_email is not None:
+                self._by_email.pop(indexed_email)
+        if email is not None:
+            self._by_email.pop(email)
+
+    def clear(self) -> None:
+        """Drop every cached principal."""
+        self._by_email.clear()
+        self._email_by_id.clear()
+        self._versions.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        """Return hit/miss counters for the principal and token version caches."""
+        stats = self._by_email.stats()
+        stats["token_versions"] = self._versions.stats()
+        return stats
+
+
+principal_cache = PrincipalCache(
+    maxsize=settings.PRINCIPAL_CACHE_SIZE,
+    ttl=settings.PRINCIPAL_CACHE_TTL_SECONDS,
+    version_maxsize=settings.TOKEN_VERSION_CACHE_SIZE,
+    version_ttl=settings.TOKEN_VERSION_CACHE_TTL_SECONDS,
+)
@@ -0,0 +1,239 @@
+"""
+Rate limiting.
+
+Limits are token buckets holding ``RATE_LIMIT_BURST`` tokens and refilling
+at ``RATE_LIMIT_PER_MINUTE`` tokens per minute, keyed by authenticated user
+or, for anonymous requests, by client IP.  Each route may cost more than
+one token.
+
+When ``REDIS_URL`` is set the authoritative bucket lives in Redis and is
+checked with a single atomic script call, so the limit holds across every
+worker and instance.  A local bucket with the same parameters sits in front
+of it and turns clients away without a network round-trip.  Tokens the
+local bucket spent on a request that Redis then rejects are refunded, so
+local spend never exceeds what the cluster admitted and a process never
+rejects a client the cluster would still let through.  If Redis is
+unreachable the local bucket alone applies (fail open).
+"""
+import math
+import time
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+
+from starlette.responses import JSONResponse
+
+from app.core.config import settings
+from app.core.logging import get_logger
+from app.core.tokens import decode_access_token
+
+logger = get_logger(__name__)
+
+TOKEN_BUCKET_SCRIPT = """
+local capacity = tonumber(ARGV[1])
+local rate = tonumber(ARGV[2])
+local cost = tonumber(ARGV[3])
+local clock = redis.call('TIME')
+local now = tonumber(clock[1]) + tonumber(clock[2]) / 1000000
+local state = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+local tokens = tonumber(state[1]) or capacity
+local ts = tonumber(state[2]) or now
+tokens = math.min(capacity, tokens + math.max(0, now - ts) * rate)
+local allowed = 0
+local retry_after = 0
+if tokens >= cost then
+    tokens = tokens - cost
+    allowed = 1
+else
+    retry_after = (cost - tokens) / rate
+end
+redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'ts', tostring(now))
+redis.call('PEXPIRE', KEYS[1], math.ceil(capacity / rate * 1000) + 1000)
+return {allowed, tostring(retry_after)}
+"""
+
+
+class LocalTokenBuckets:
+    """In-process token buckets for a bounded number of keys (LRU eviction)."""
+
+    def __init__(self, capacity: float, rate: float, max_keys: int) -> None:
+        self.capacity = capacity
+        self.rate = rate
+        self.max_keys = max_keys
+        self._buckets: "OrderedDict[str, List[float]]" = OrderedDict()
+
+    def consume(self, key: str, cost: float) -> Tuple[bool, float]:
+        """Take ``cost`` tokens from ``key``'s bucket; returns (allowed, retry_after)."""
+        now = time.monotonic()
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            bucket = [self.capacity, now]
+            self._buckets[key] = bucket
+            if len(self._buckets) > self.max_keys:
+                self._buckets.popitem(last=False)
+        else:
+            self._buckets.move_to_end(key)
+            bucket[0] = min(self.capacity, bucket[0] + (now - bucket[1]) * self.rate)
+            bucket[1] = now
+        if bucket[0] >= cost:
+            bucket[0] -= cost
+            return True, 0.0
+        return False, (cost - bucket[0]) / self.rate
+
+    def refund(self, key: str, cost: float) -> None:
+        """Return ``cost`` tokens to ``key``'s bucket (up to its capacity)."""
+        bucket = self._buckets.get(key)
+        if bucket is not None:
+            bucket[0] = min(self.capacity, bucket[0] + cost)
+
+
+class RedisTokenBuckets:
+    """Token buckets stored in Redis, updated atomically by a Lua script."""
+
+    def __init__(self, client: Any, capacity: float, rate: float, prefix: str) -> None:
+        self.client = client
+        self.capacity = capacity
+        self.rate = rate
+        self.prefix = prefix
+        self._script = client.register_script(TOKEN_BUCKET_SCRIPT)
+
+    async def consume(self, key: str, cost: float) -> Tuple[bool, float]:
+        """Take ``cost`` tokens from ``key``'s bucket; returns (allowed, retry_after)."""
+        allowed, retry_after = await self._script(
+            keys=[self.prefix + key], args=[self.capacity, self.rate, cost]
+        )
+        return bool(int(allowed)), float(retry_after)
+
+    async def close(self) -> None:
+        await self.client.aclose()
+
+
+class RateLimiter:
+    """Local pre-filter in front of an optional shared Redis limiter."""
+
+    def __init__(
+        self,
+        capacity: float,
+        rate: float,
+        max_local_keys: int,
+        shared: Optional[RedisTokenBuckets] = None,
+    ) -> None:
+        self.local = LocalTokenBuckets(capacity, rate, max_local_keys)
+        self.shared = shared
+        self.allowed = 0
+        self.rejected_local = 0
+        self.rejected_shared = 0
+        self.shared_errors = 0
+
+    async def hit(self, key: str, cost: float = 1) -> Tuple[bool, float]:
+        """Charge ``cost`` to ``key``; returns (allowed, seconds until retry)."""
+        allowed, retry_after = self.local.consume(key, cost)
+        if not allowed:
+            self.rejected_local += 1
+            return False, retry_after
+
+        if self.shared is not None:
+            try:
+                allowed, retry_after = await self.shared.consume(key, cost)
+            except Exception as e:
+                # Fail open on the local limit rather than rejecting traffic
+                self.shared_errors += 1
+                if self.shared_errors == 1 or self.shared_errors % 1000 == 0:
+                    logger.warning(
+                        "Shared rate limiter unavailable",
+                        error=str(e),
+                        errors=self.shared_errors,
+                    )
+            else:
+                if not allowed:
+                    # The request was not admitted, so it must not count locally
+                    self.local.refund(key, cost)
+                    self.rejected_shared += 1
+                    return False, retry_after
+
+        self.allowed += 1
+        return True, 0.0
+
+    def stats(self) -> Dict[str, Any]:
+        """Return allow/reject counters."""
+        return {
+            "shared": self.shared is not None,
+            "allowed": self.allowed,
+            "rejected_local": self.rejected_local,
+            "rejected_shared": self.rejected_shared,
+            "shared_errors": self.shared_errors,
+        }
+
+    async def close(self) -> None:
+        if self.shared is not None:
+            await self.shared.close()
+
+
+def create_rate_limiter() -> RateLimiter:
+    """Build the limiter from settings, sharing state through Redis if configured."""
+    capacity = settings.RATE_LIMIT_BURST or settings.RATE_LIMIT_PER_MINUTE
+    rate = settings.RATE_LIMIT_PER_MINUTE / 60.0
+    shared = None
+    if settings.REDIS_URL:
+        from redis import asyncio as aioredis
+
+        client = aioredis.from_url(settings.REDIS_URL)
+        shared = RedisTokenBuckets(
+            client, capacity, rate, prefix=settings.RATE_LIMIT_REDIS_PREFIX
+        )
+    return RateLimiter(capacity, rate, settings.RATE_LIMIT_LOCAL_MAX_KEYS, shared)
+
+
+def _header(scope, name: bytes) -> Optional[bytes]:
+    for key, value in scope["headers"]:
+        if key == name:
+            return value
+    return None
+
+
+def rate_limit_key(scope) -> str:
+    """Key requests by authenticated user when a valid bearer token is present, else by IP."""
+    authorization = _header(scope, b"authorization")
+    if authorization and authorization[:7].lower() == b"bearer ":
+        payload = decode_access_token(authorization[7:].decode("latin-1"))
+        if payload and payload.get("sub"):
+            return f"user:{payload['sub']}"
+    client = scope.get("client")
+    return f"ip:{client[0] if client else 'unknown'}"
+
+
+class RateLimitMiddleware:
+    """Pure ASGI middleware applying the rate limiter to HTTP requests."""
+
+    def __init__(
+        self,
+        app,
+        limiter: RateLimiter,
+        route_costs: Optional[Dict[str, int]] = None,
+        exempt_prefixes: Optional[List[str]] = None,
+    ) -> None:
+        self.app = app
+        self.limiter = limiter
+        self.route_costs = dict(
+            settings.RATE_LIMIT_ROUTE_COSTS if route_costs is None else route_costs
+        )
+        self.exempt_prefixes = tuple(
+            settings.RATE_LIMIT_EXEMPT_PATHS if exempt_prefixes is None else exempt_prefixes
+        )
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["path"].startswith(self.exempt_prefixes):
+            await self.app(scope, receive, send)
+            return
+
+        cost = self.route_costs.get(scope["path"], 1)
+        allowed, retry_after = await self.limiter.hit(rate_limit_key(scope), cost)
+        if allowed:
+            await self.app(scope, receive, send)
+            return
+
+        response = JSONResponse(
+            {"detail": "Rate limit exceeded"},
+            status_code=429,
+            headers={"Retry-After": str(max(1, math.ceil(retry_after)))},
+        )
+        await response(scope, receive, send)
@@ -1,22 +1,37 @@
 """
 Security utilities for authentication and authorization.
+
+``jose`` (and the crypto backend it loads) is imported on first use rather
+than at startup, to keep cold starts short.
+
+With ``ACCESS_TOKEN_EMBED_CLAIMS`` enabled, access tokens carry the user's
+id, flags and ``token_version``.  ``get_current_user`` trusts those claims
+once the version matches the user's current one (a cached lookup), so most
+authenticated requests run no query at all.  Endpoints that return the
+user's profile depend on ``get_current_user_profile`` instead.
+
+Principal and ``token_version`` lookups always read the primary: a lagging
+replica would refill the caches with a deactivated user or a revoked
+version right after ``update_user`` invalidated them.
 """
 from datetime import datetime, timedelta
-from typing import Any, Union
+from typing import Any, Dict, Optional, Union
 
-from jose import jwt
-from passlib.context import CryptContext
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.core.config import settings
+from app.core.hashing import get_password_hash, verify_password  # noqa: F401
+from app.core.principal_cache import (
+    CachedPrincipal,
+    Principal,
+    TokenPrincipal,
+    principal_cache,
+)
+from app.core.tokens import decode_access_token  # noqa: F401
 from app.db.session import get_db
-from app.models.user import User
-from app.services.user import get_user_by_email
-
-# Password hashing
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+from app.services.user import get_token_version, get_user, get_user_by_email
 
 # OAuth2 scheme
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl=f"{settings.API_V1_STR}/auth/login")
@@ -26,6 +41,8 @@ def create_access_token(
     data: dict, expires_delta: Union[timedelta, None] = None
 ) -> str:
     """Create JWT access token."""
+    from jose import jwt
+
     to_encode = data.copy()
     if expires_delta:
         expire = datetime.utcnow() + expires_delta
@@ -36,52 +53,110 @@ def create_access_token(
     return encoded_jwt
 
 
-def verify_password(plain_password: str, hashed_password: str) -> bool:
-    """Verify a password against its hash."""
-    return pwd_context.verify(plain_password, hashed_password)
+def create_user_access_token(
+    user: Any, expires_delta: Union[timedelta, None] = None
+) -> str:
+    """Create an access token for ``user``, embedding its claims if enabled."""
+    data: Dict[str, Any] = {"sub": user.email}
+    if settings.ACCESS_TOKEN_EMBED_CLAIMS:
+        data.update(
+            uid=user.id,
+            act=bool(user.is_active),
+            su=bool(user.is_superuser),
+            ver=user.token_version or 0,
+        )
+    return create_access_token(data, expires_delta=expires_delta)
+
+
+def _credentials_exception() -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_401_UNAUTHORIZED,
+        detail="Could not validate credentials",
+        headers={"WWW-Authenticate": "Bearer"},
+    )
 
 
-def get_password_hash(password: str) -> str:
-    """Hash a password."""
-    return pwd_context.hash(password)
+async def _current_token_version(db: AsyncSession, user_id: int) -> Optional[int]:
+    version = principal_cache.get_token_version(user_id)
+    if version is None:
+        version = await get_token_version(db, user_id)
+        if version is not None:
+            principal_cache.put_token_version(user_id, version)
+    return version
 
 
 async def get_current_user(
     db: AsyncSession = Depends(get_db),
     token: str = Depends(oauth2_scheme),
-) -> User:
-    """Get current user from JWT token."""
-    credentials_exception = HTTPException(
-        status_code=status.HTTP_401_UNAUTHORIZED,
-        detail="Could not validate credentials",
-        headers={"WWW-Authenticate": "Bearer"},
-    )
-    try:
-        payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
-        email: str = payload.get("sub")
-        if email is None:
-            raise credentials_exception
-    except jwt.JWTError:
-        raise credentials_exception
+) -> Principal:
+    """Get current user from JWT token.
+
+    Returns the token's claims when it carries them and is still current,
+    otherwise a cached snapshot of the user.  Callers that need to modify
+    the user must load the ORM object themselves.
+    """
+    payload = decode_access_token(token)
+    if payload is None:
+        raise _credentials_exception()
+    email: str = payload.get("sub")
+    if email is None:
+        raise _credentials_exception()
+
+    if "ver" in payload:
+        claims = TokenPrincipal.from_claims(payload)
+        if claims is None:
+            raise _credentials_exception()
+        if await _current_token_version(db, claims.id) != claims.token_version:
+            raise _credentials_exception()
+        return claims
+    
+    principal = principal_cache.get(email)
+    if principal is not None:
+        return principal
     
     user = await get_user_by_email(db, email=email)
     if user is None:
-        raise credentials_exception
-    return user
+        raise _credentials_exception()
+    return principal_cache.put(user)
+
+
+async def get_current_user_profile(
+    db: AsyncSession = Depends(get_db),
+    current_user: Principal = Depends(get_current_user),
+) -> CachedPrincipal:
+    """Get the full cached snapshot of the current user (loads it if needed)."""
+    if isinstance(current_user, CachedPrincipal):
+        return current_user
+    principal = principal_cache.get(current_user.email)
+    if principal is not None and principal.id == current_user.id:
+        return principal
+    user = await get_user(db, id=current_user.id)
+    if user is None:
+        raise _credentials_exception()
+    return principal_cache.put(user)
 
 
 async def get_current_active_user(
-    current_user: User = Depends(get_current_user),
-) -> User:
+    current_user: Principal = Depends(get_current_user),
+) -> Principal:
     """Get current active user."""
     if not current_user.is_active:
         raise HTTPException(status_code=400, detail="Inactive user")
     return current_user
 
 
+async def get_current_active_user_profile(
+    current_user: CachedPrincipal = Depends(get_current_user_profile),
+) -> CachedPrincipal:
+    """Get the full snapshot of the current active user."""
+    if not current_user.is_active:
+        raise HTTPException(status_code=400, detail="Inactive user")
+    return current_user
+
+
 async def get_current_active_superuser(
-    current_user: User = Depends(get_current_user),
-) -> User:
+    current_user: Principal = Depends(get_current_user),
+) -> Principal:
     """Get current active superuser."""
     if not current_user.is_superuser:
         raise HTTPException(
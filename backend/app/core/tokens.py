@@ -0,0 +1,20 @@
+"""
+Access token decoding.
+
+Kept free of database and service imports so middleware (the rate limiter)
+can read token claims without importing the authentication stack.  ``jose``
+is imported on first use, as in ``app.core.security``.
+"""
+from typing import Any, Dict, Optional
+
+from app.core.config import settings
+
+
+def decode_access_token(token: str) -> Optional[Dict[str, Any]]:
+    """Verify a JWT access token and return its claims, or ``None`` if invalid."""
+    from jose import jwt
+
+    try:
+        return jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
+    except jwt.JWTError:
+        return None
@@ -1,28 +1,180 @@
 """
 Database session configuration.
+
+Writes and read-your-writes paths use ``get_db`` (primary only).  Read-only
+paths can use ``get_read_db``, whose sessions send queries to a read
+replica when one is configured and its replication lag, as measured by the
+health prober, is within ``DATABASE_REPLICA_MAX_LAG_SECONDS``; otherwise
+they fall back to the primary.
+
+Health probes connect through separate engines without a pool
+(``probe_engine`` and ``replica_probe_engines``), so they never take a
+connection from, or wait behind, the pools serving requests.
+
+Every engine counts how often statements were served from SQLAlchemy's
+compiled-statement cache (``statement_cache_events``), exported as metrics.
 """
-from sqlalchemy import create_engine
-from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+import itertools
+from collections import defaultdict
+from typing import Any, Dict, List, Optional, Tuple
+
+from sqlalchemy import create_engine, event, text
+from sqlalchemy.engine import default as engine_default
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy.orm import Session, sessionmaker
+from sqlalchemy.pool import AsyncAdaptedQueuePool, NullPool
 
 from app.core.config import settings
 
-# Create async engine
+
+def _statement_cache_args(url: str) -> Dict[str, Any]:
+    """Engine arguments sizing the compiled and prepared statement caches."""
+    kwargs: Dict[str, Any] = {"query_cache_size": settings.DATABASE_QUERY_CACHE_SIZE}
+    if url.startswith("postgresql+asyncpg"):
+        kwargs["connect_args"] = {
+            "prepared_statement_cache_size": settings.DATABASE_PREPARED_STATEMENT_CACHE_SIZE
+        }
+    return kwargs
+
+
+# Create async engine.  The pool class is explicit because SQLAlchemy
+# defaults file-based SQLite (tests, benchmarks) to NullPool, which takes no
+# pool sizing arguments.
 engine = create_async_engine(
     settings.DATABASE_URL,
+    poolclass=AsyncAdaptedQueuePool,
     pool_size=settings.DATABASE_POOL_SIZE,
     max_overflow=settings.DATABASE_MAX_OVERFLOW,
     pool_timeout=settings.DATABASE_POOL_TIMEOUT,
     pool_recycle=settings.DATABASE_POOL_RECYCLE,
     echo=settings.DEBUG,
+    **_statement_cache_args(settings.DATABASE_URL),
+)
+
+# Create replica engines, each with its own pool
+replica_engines: List[AsyncEngine] = [
+    create_async_engine(
+        url,
+        poolclass=AsyncAdaptedQueuePool,
+        pool_size=settings.DATABASE_REPLICA_POOL_SIZE,
+        max_overflow=settings.DATABASE_REPLICA_MAX_OVERFLOW,
+        pool_timeout=settings.DATABASE_REPLICA_POOL_TIMEOUT,
+        pool_recycle=settings.DATABASE_POOL_RECYCLE,
+        echo=settings.DEBUG,
+        **_statement_cache_args(url),
+    )
+    for url in settings.DATABASE_REPLICA_URLS
+]
+
+# Unpooled engines for health probes: one fresh connection per probe
+probe_engine = create_async_engine(settings.DATABASE_URL, poolclass=NullPool)
+replica_probe_engines: List[AsyncEngine] = [
+    create_async_engine(url, poolclass=NullPool) for url in settings.DATABASE_REPLICA_URLS
+]
+
+_CACHE_RESULTS = {
+    engine_default.CACHE_HIT: "hit",
+    engine_default.CACHE_MISS: "miss",
+    engine_default.CACHING_DISABLED: "disabled",
+    engine_default.NO_CACHE_KEY: "no_key",
+    engine_default.NO_DIALECT_SUPPORT: "unsupported",
+}
+
+# (engine label, cache result) -> statements executed
+statement_cache_events: Dict[Tuple[str, str], int] = defaultdict(int)
+
+
+def _track_statement_cache(label: str, async_engine: AsyncEngine) -> None:
+    @event.listens_for(async_engine.sync_engine, "after_cursor_execute")
+    def count_cache_result(conn, cursor, statement, parameters, context, executemany):
+        result = _CACHE_RESULTS.get(getattr(context, "cache_hit", None), "no_key")
+        statement_cache_events[(label, result)] += 1
+
+
+_track_statement_cache("primary", engine)
+for _index, _replica in enumerate(replica_engines):
+    _track_statement_cache(f"replica_{_index}", _replica)
+
+# Last measured lag per replica index; None until measured or after a failure
+replica_lag: Dict[int, Optional[float]] = {i: None for i in range(len(replica_engines))}
+_replica_cycle = itertools.cycle(range(len(replica_engines)))
+
+
+def choose_replica() -> Optional[AsyncEngine]:
+    """Return the next replica within the lag budget, round-robin, if any."""
+    for _ in range(len(replica_engines)):
+        index = next(_replica_cycle)
+        lag = replica_lag[index]
+        if lag is not None and lag <= settings.DATABASE_REPLICA_MAX_LAG_SECONDS:
+            return replica_engines[index]
+    return None
+
+
+REPLICA_LAG_QUERY = text(
+    "SELECT CASE WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0 "
+    "ELSE EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()) END"
 )
 
+
+async def measure_replica_lag(index: int) -> None:
+    """Measure and record the replication lag of replica ``index``.
+
+    Raises when the replica is unreachable or lagging beyond the budget, so
+    the health prober reports it as unhealthy.
+    """
+    replica = replica_probe_engines[index]
+    try:
+        async with replica.connect() as conn:
+            if replica.dialect.name == "postgresql":
+                lag = (await conn.execute(REPLICA_LAG_QUERY)).scalar()
+            else:
+                await conn.execute(text("SELECT 1"))
+                lag = 0.0
+    except BaseException:
+        replica_lag[index] = None
+        raise
+    replica_lag[index] = float(lag or 0.0)
+    if replica_lag[index] > settings.DATABASE_REPLICA_MAX_LAG_SECONDS:
+        raise RuntimeError(f"replication lag {replica_lag[index]:.1f}s over budget")
+
+
+class PrimarySession(Session):
+    """Session bound to the primary; the sync class behind ``AsyncSessionLocal``."""
+
+
+class RoutingSession(Session):
+    """Session that reads from a replica while it is marked read-only.
+
+    Once a read-only session writes (by flushing or executing a DML
+    statement) it sticks to the primary for the rest of its life, so it
+    reads its own writes.
+    """
+
+    def get_bind(self, mapper=None, clause=None, **kw):
+        if self._flushing or getattr(clause, "is_dml", False):
+            self.info["read_only"] = False
+        if self.info.get("read_only"):
+            replica = choose_replica()
+            if replica is not None:
+                return replica.sync_engine
+        return engine.sync_engine
+
+
 # Create async session factory
 AsyncSessionLocal = sessionmaker(
     engine,
     class_=AsyncSession,
+    sync_session_class=PrimarySession,
+    expire_on_commit=False,
+)
+
+# Session factory for read-only work, routed to replicas when available
+ReadSessionLocal = sessionmaker(
+    class_=AsyncSession,
+    sync_session_class=RoutingSession,
     expire_on_commit=False,
+    info={"read_only": True},
 )
 
 # Create declarative base
@@ -38,6 +190,23 @@ async def get_db() -> AsyncSession:
             await session.close()
 
 
+async def get_read_db() -> AsyncSession:
+    """Dependency to get a session for read-only work (replica-routed)."""
+    async with ReadSessionLocal() as session:
+        try:
+            yield session
+        finally:
+            await session.close()
+
+
+async def dispose_engines() -> None:
+    """Close the connection pools of the primary and every replica."""
+    await engine.dispose()
+    await probe_engine.dispose()
+    for replica in (*replica_engines, *replica_probe_engines):
+        await replica.dispose()
+
+
 # For Alembic (synchronous engine)
 def get_sync_engine():
     """Get synchronous engine for Alembic."""
@@ -49,4 +218,4 @@ def get_sync_engine():
         pool_timeout=settings.DATABASE_POOL_TIMEOUT,
         pool_recycle=settings.DATABASE_POOL_RECYCLE,
         echo=settings.DEBUG,
-    ) 
\ No newline at end of file
+    )
@@ -4,19 +4,28 @@ Main FastAPI application entry point.
 from contextlib import asynccontextmanager
 from typing import AsyncGenerator
 
-from fastapi import FastAPI
-from fastapi.middleware.cors import CORSMiddleware
-from fastapi.middleware.trustedhost import TrustedHostMiddleware
-from slowapi import Limiter, _rate_limit_exceeded_handler
-from slowapi.errors import RateLimitExceeded
-from slowapi.middleware import SlowAPIMiddleware
-from slowapi.util import get_remote_address
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
+from starlette.middleware.exceptions import ExceptionMiddleware
 
+from app.core.admission import AdmissionControlMiddleware, create_admission_controller
 from app.core.config import settings
-from app.core.logging import setup_logging
-from app.db.session import engine
+from app.core.front_door import FrontDoorMiddleware
+from app.core.hashing import HashingPoolSaturated, password_hasher
+from app.core.health import health_prober
+from app.core.login_throttle import create_login_throttle
+from app.core.metrics import MetricsMiddleware
+from app.core.rate_limit import RateLimitMiddleware, create_rate_limiter
+from app.core.logging import (
+    RequestLoggingMiddleware,
+    setup_logging,
+    shutdown_logging,
+)
+from app.db.session import dispose_engines
+from app.services.login_audit import login_audit
 from app.api.v1.api import api_router
-from app.api.health.router import health_router
+from app.api.health.router import router as health_router
+from app.api.metrics.router import router as metrics_router
 
 
 @asynccontextmanager
@@ -24,16 +33,59 @@ async def lifespan(app: FastAPI) -> AsyncGenerator[None, None]:
     """Application lifespan manager."""
     # Startup
     setup_logging()
+    health_prober.start()
+    if settings.LOGIN_AUDIT_ENABLED:
+        login_audit.start()
     yield
     # Shutdown
-    await engine.dispose()
+    await health_prober.stop()
+    # Flush buffered login events before the engines are disposed
+    await login_audit.stop()
+    await app.state.rate_limiter.close()
+    await app.state.login_throttle.close()
+    password_hasher.shutdown()
+    await dispose_engines()
+    shutdown_logging()
+
+
+async def hashing_pool_saturated_handler(
+    request: Request, exc: HashingPoolSaturated
+) -> JSONResponse:
+    """Shed load when the password hashing pool is backed up."""
+    return JSONResponse(
+        status_code=503,
+        content={"detail": "Server busy, please retry"},
+        headers={"Retry-After": "1"},
+    )
+
+
+class HealthBypassApp:
+    """The router wrapped in the app's exception handlers, for health checks.
+
+    ``ExceptionMiddleware`` copies the handlers it is given, so it is built
+    on the first request (as Starlette builds its middleware stack) and sees
+    handlers registered after ``create_application`` too.
+    """
+
+    def __init__(self, app: FastAPI) -> None:
+        self.fastapi_app = app
+        self.app = None
+
+    async def __call__(self, scope, receive, send):
+        if self.app is None:
+            self.app = ExceptionMiddleware(
+                self.fastapi_app.router,
+                handlers=self.fastapi_app.exception_handlers,
+                debug=settings.DEBUG,
+            )
+        await self.app(scope, receive, send)
 
 
 def create_application() -> FastAPI:
     """Create and configure the FastAPI application."""
     
     # Initialize rate limiter
-    limiter = Limiter(key_func=get_remote_address)
+    limiter = create_rate_limiter()
     
     app = FastAPI(
         title=settings.PROJECT_NAME,
@@ -45,28 +97,38 @@ def create_application() -> FastAPI:
         lifespan=lifespan,
     )
     
+    # Add admission control (inside rate limiting, so limited clients never
+    # take a slot)
+    if settings.ADMISSION_CONTROL_ENABLED:
+        app.state.admission = create_admission_controller()
+        app.add_middleware(AdmissionControlMiddleware, controller=app.state.admission)
+    
     # Add rate limiting
-    app.state.limiter = limiter
-    app.add_exception_handler(RateLimitExceeded, _rate_limit_exceeded_handler)
-    app.add_middleware(SlowAPIMiddleware)
+    app.state.rate_limiter = limiter
+    if settings.RATE_LIMIT_ENABLED:
+        app.add_middleware(RateLimitMiddleware, limiter=limiter)
+    app.state.login_throttle = create_login_throttle()
     
-    # Add CORS middleware
-    app.add_middleware(
-        CORSMiddleware,
-        allow_origins=settings.ALLOWED_HOSTS,
-        allow_credentials=True,
-        allow_methods=["*"],
-        allow_headers=["*"],
-    )
+    app.add_exception_handler(HashingPoolSaturated, hashing_pool_saturated_handler)
+    
+    # Add request logging and metrics
+    app.add_middleware(RequestLoggingMiddleware)
+    app.add_middleware(MetricsMiddleware)
     
-    # Add trusted host middleware
+    # Add trusted host and CORS handling in front of everything else; health
+    # checks go straight to the router (with the app's exception handlers)
     app.add_middleware(
-        TrustedHostMiddleware,
+        FrontDoorMiddleware,
+        bypass_app=HealthBypassApp(app),
         allowed_hosts=settings.ALLOWED_HOSTS,
+        allowed_origins=settings.CORS_ALLOWED_ORIGINS,
+        allow_credentials=True,
+        max_age=settings.CORS_MAX_AGE_SECONDS,
     )
     
     # Include routers
     app.include_router(health_router, prefix="/health", tags=["health"])
+    app.include_router(metrics_router, prefix="/metrics", tags=["metrics"])
     app.include_router(api_router, prefix=settings.API_V1_STR)
     
     return app
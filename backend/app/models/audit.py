@@ -0,0 +1,24 @@
+"""
+Login audit model.
+"""
+from sqlalchemy import BigInteger, Boolean, Column, DateTime, Index, Integer, String
+
+from app.db.session import Base
+
+
+class LoginEvent(Base):
+    """One login attempt, successful or not."""
+
+    __tablename__ = "login_events"
+    __table_args__ = (
+        Index("ix_login_events_user_id_occurred_at", "user_id", "occurred_at"),
+        Index("ix_login_events_email_occurred_at", "email", "occurred_at"),
+    )
+
+    id = Column(BigInteger().with_variant(Integer, "sqlite"), primary_key=True)
+    # Null when the email matched no user
+    user_id = Column(Integer, nullable=True)
+    email = Column(String, nullable=False)
+    client_ip = Column(String, nullable=True)
+    success = Column(Boolean, nullable=False)
+    occurred_at = Column(DateTime(timezone=True), nullable=False)
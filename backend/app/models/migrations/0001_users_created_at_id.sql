@@ -0,0 +1,6 @@
+-- Keyset pagination index for GET /users, ordered by (created_at, id).
+--
+-- Model: app/models/user.py (User.__table_args__)
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_users_created_at_id
+    ON users (created_at, id);
@@ -0,0 +1,26 @@
+-- Running user counters behind the admin statistics endpoints.
+--
+-- The counters are not seeded here: the first statistics read finds no
+-- user_stats row and rebuilds both tables from users
+-- (app.services.admin.rebuild_user_stats).
+--
+-- Models: app/models/stats.py
+
+BEGIN;
+
+CREATE TABLE IF NOT EXISTS user_stats (
+    id SERIAL NOT NULL,
+    total BIGINT NOT NULL,
+    active BIGINT NOT NULL,
+    superusers BIGINT NOT NULL,
+    updated_at TIMESTAMP WITH TIME ZONE DEFAULT now(),
+    PRIMARY KEY (id)
+);
+
+CREATE TABLE IF NOT EXISTS user_signups_daily (
+    day DATE NOT NULL,
+    count BIGINT NOT NULL,
+    PRIMARY KEY (day)
+);
+
+COMMIT;
@@ -0,0 +1,7 @@
+-- Token version embedded in access tokens; bumping it revokes every token
+-- issued before.  Existing users start at 0, matching tokens issued from
+-- now on.
+--
+-- Model: app/models/user.py (User.token_version)
+
+ALTER TABLE users ADD COLUMN IF NOT EXISTS token_version INTEGER DEFAULT '0' NOT NULL;
@@ -0,0 +1,7 @@
+-- updated_at is set on insert as well as on update, so it always
+-- identifies the row's current version (user ETags are derived from it).
+-- Rows inserted before this keep NULL; their ETags fall back to created_at.
+--
+-- Model: app/models/user.py (User.updated_at)
+
+ALTER TABLE users ALTER COLUMN updated_at SET DEFAULT now();
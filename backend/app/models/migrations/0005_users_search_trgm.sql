@@ -0,0 +1,15 @@
+-- Trigram indexes serving user search by email and name
+-- (lower(column) LIKE '%term%', ranked by similarity).
+--
+-- Creating the extension needs a role allowed to (a superuser, or the
+-- database owner on PostgreSQL 13+, pg_trgm being a trusted extension).
+--
+-- Model: app/models/user.py (User.__table_args__ and the before_create DDL)
+
+CREATE EXTENSION IF NOT EXISTS pg_trgm;
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_users_email_lower_trgm
+    ON users USING gin (lower(email) gin_trgm_ops);
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_users_full_name_lower_trgm
+    ON users USING gin (lower(full_name) gin_trgm_ops);
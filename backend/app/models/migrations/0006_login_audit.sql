@@ -0,0 +1,23 @@
+-- Login audit: users.last_login_at and one login_events row per attempt,
+-- both written in batches by the login audit buffer
+-- (app.services.login_audit).
+--
+-- Models: app/models/audit.py, app/models/user.py (User.last_login_at)
+
+ALTER TABLE users ADD COLUMN IF NOT EXISTS last_login_at TIMESTAMP WITH TIME ZONE;
+
+CREATE TABLE IF NOT EXISTS login_events (
+    id BIGSERIAL NOT NULL,
+    user_id INTEGER,
+    email VARCHAR NOT NULL,
+    client_ip VARCHAR,
+    success BOOLEAN NOT NULL,
+    occurred_at TIMESTAMP WITH TIME ZONE NOT NULL,
+    PRIMARY KEY (id)
+);
+
+CREATE INDEX IF NOT EXISTS ix_login_events_user_id_occurred_at
+    ON login_events (user_id, occurred_at);
+
+CREATE INDEX IF NOT EXISTS ix_login_events_email_occurred_at
+    ON login_events (email, occurred_at);
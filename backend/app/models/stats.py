@@ -0,0 +1,30 @@
+"""
+Incrementally maintained aggregate models.
+"""
+from sqlalchemy import BigInteger, Column, Date, DateTime, Integer
+from sqlalchemy.sql import func
+
+from app.db.session import Base
+
+
+class UserStats(Base):
+    """Running user counters (a single row with ``id = 1``)."""
+
+    __tablename__ = "user_stats"
+
+    id = Column(Integer, primary_key=True)
+    total = Column(BigInteger, nullable=False, default=0)
+    active = Column(BigInteger, nullable=False, default=0)
+    superusers = Column(BigInteger, nullable=False, default=0)
+    updated_at = Column(
+        DateTime(timezone=True), server_default=func.now(), onupdate=func.now()
+    )
+
+
+class UserSignupDaily(Base):
+    """Number of users created per UTC day."""
+
+    __tablename__ = "user_signups_daily"
+
+    day = Column(Date, primary_key=True)
+    count = Column(BigInteger, nullable=False, default=0)
@@ -2,7 +2,7 @@
 User model.
 """
 from datetime import datetime
-from sqlalchemy import Boolean, Column, Integer, String, DateTime
+from sqlalchemy import DDL, Boolean, Column, Integer, String, DateTime, Index, event, text
 from sqlalchemy.sql import func
 
 from app.db.session import Base
@@ -12,6 +12,21 @@ class User(Base):
     """User model."""
     
     __tablename__ = "users"
+    __table_args__ = (
+        # Supports keyset pagination ordered by (created_at, id)
+        Index("ix_users_created_at_id", "created_at", "id"),
+        # Trigram indexes serving prefix and substring search on PostgreSQL
+        Index(
+            "ix_users_email_lower_trgm",
+            text("lower(email) gin_trgm_ops"),
+            postgresql_using="gin",
+        ).ddl_if(dialect="postgresql"),
+        Index(
+            "ix_users_full_name_lower_trgm",
+            text("lower(full_name) gin_trgm_ops"),
+            postgresql_using="gin",
+        ).ddl_if(dialect="postgresql"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     email = Column(String, unique=True, index=True, nullable=False)
@@ -19,5 +34,21 @@ class User(Base):
     full_name = Column(String, nullable=True)
     is_active = Column(Boolean, default=True)
     is_superuser = Column(Boolean, default=False)
+    # Bumped whenever a claim embedded in access tokens changes, revoking
+    # every token issued before
+    token_version = Column(Integer, nullable=False, default=0, server_default="0")
+    # Written in batches by the login audit buffer, without touching updated_at
+    last_login_at = Column(DateTime(timezone=True), nullable=True)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
-    updated_at = Column(DateTime(timezone=True), onupdate=func.now()) 
\ No newline at end of file
+    # Set on insert too, so it always identifies the row's current version
+    # (user ETags are derived from it)
+    updated_at = Column(
+        DateTime(timezone=True), server_default=func.now(), onupdate=func.now()
+    )
+
+
+event.listen(
+    User.__table__,
+    "before_create",
+    DDL("CREATE EXTENSION IF NOT EXISTS pg_trgm").execute_if(dialect="postgresql"),
+)
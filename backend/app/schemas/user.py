@@ -1,7 +1,7 @@
 """
 User schemas.
 """
-from typing import Optional
+from typing import List, Optional
 from datetime import datetime
 
 from pydantic import BaseModel, EmailStr
@@ -43,4 +43,34 @@ class User(UserInDBBase):
 
 class UserInDB(UserInDBBase):
     """User in database schema."""
-    hashed_password: str 
\ No newline at end of file
+    hashed_password: str 
+
+
+class UserPage(BaseModel):
+    """A page of users from keyset pagination."""
+    items: List[User]
+    next_cursor: Optional[str] = None
+
+
+class UserSearchPage(BaseModel):
+    """A page of ranked user search results."""
+    items: List[User]
+    next_offset: Optional[int] = None
+
+
+class UserBulkUpdate(UserUpdate):
+    """Single item of a bulk update request."""
+    id: int
+
+
+class BulkItemError(BaseModel):
+    """Failure of one item in a bulk request."""
+    index: int
+    detail: str
+
+
+class BulkResult(BaseModel):
+    """Outcome of a bulk create, update or delete request."""
+    succeeded: int
+    ids: List[int]
+    errors: List[BulkItemError]
\ No newline at end of file
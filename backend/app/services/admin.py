@@ -0,0 +1,218 @@
+"""
+Admin statistics service.
+
+User statistics come from counters that the user write paths adjust in the
+same transaction as the write itself (see ``record_user_changes``), so
+reading them is a primary-key lookup however large the users table grows.
+Each process additionally caches the last snapshot for
+``ADMIN_STATS_MAX_STALENESS_SECONDS``.
+"""
+import platform
+import time
+from datetime import date, datetime, timedelta, timezone
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from sqlalchemy import func, select, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.core.hashing import password_hasher
+from app.core.logging import get_logger
+from app.core.principal_cache import principal_cache
+from app.models.stats import UserSignupDaily, UserStats
+from app.models.user import User
+from app.services.login_audit import login_audit
+
+logger = get_logger(__name__)
+
+STATS_ROW_ID = 1
+
+_started_at = time.time()
+_snapshot: Optional[Tuple[float, Dict[str, Any]]] = None
+
+
+def _utc_today() -> date:
+    return datetime.now(timezone.utc).date()
+
+
+def _upsert_insert(db: AsyncSession) -> Optional[Callable[..., Any]]:
+    """The dialect's ``insert`` supporting ``ON CONFLICT``, if it has one."""
+    dialect = db.get_bind().dialect.name
+    if dialect == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+    elif dialect == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert
+    else:
+        return None
+    return insert
+
+
+def _utc_date(db: AsyncSession, column: Any) -> Any:
+    """SQL expression for the UTC calendar day of a timestamp column."""
+    if db.get_bind().dialect.name == "postgresql":
+        # date() of a timestamptz uses the session time zone
+        return func.date(func.timezone("UTC", column))
+    # SQLite stores the UTC timestamps as written
+    return func.date(column)
+
+
+async def _increment_signups(db: AsyncSession, day: date, count: int) -> None:
+    """Add ``count`` to the signup counter for ``day``, creating it if needed."""
+    insert = _upsert_insert(db)
+    if insert is not None:
+        stmt = insert(UserSignupDaily).values(day=day, count=count)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[UserSignupDaily.day],
+            set_={"count": UserSignupDaily.count + stmt.excluded.count},
+        )
+        await db.execute(stmt)
+        return
+
+    result = await db.execute(
+        update(UserSignupDaily)
+        .where(UserSignupDaily.day == day)
+        .values(count=UserSignupDaily.count + count)
+    )
+    if result.rowcount == 0:
+        db.add(UserSignupDaily(day=day, count=count))
+        await db.flush()
+
+
+async def record_user_changes(
+    db: AsyncSession,
+    *,
+    total: int = 0,
+    active: int = 0,
+    superusers: int = 0,
+    signups: int = 0,
+) -> None:
+    """Apply deltas to the user counters inside the caller's transaction.
+
+    Call this from every write path that creates, deletes or changes the
+    flags of users, before committing.  If the counters have not been
+    initialised yet the deltas are dropped; the first read rebuilds them
+    from the users table.
+    """
+    if total or active or superusers:
+        await db.execute(
+            update(UserStats)
+            .where(UserStats.id == STATS_ROW_ID)
+            .values(
+                total=UserStats.total + total,
+                active=UserStats.active + active,
+                superusers=UserStats.superusers + superusers,
+            )
+        )
+    if signups:
+        await _increment_signups(db, _utc_today(), signups)
+
+
+async def rebuild_user_stats(db: AsyncSession) -> None:
+    """Recompute every counter from the users table.
+
+    This scans the whole table; it runs once to initialise the counters and
+    can be used to repair them after out-of-band writes.  The counter row is
+    created if missing and locked first, so concurrent rebuilds, and writers
+    applying deltas, wait for this one instead of conflicting with it.
+    """
+    logger.info("Rebuilding user statistics")
+    insert = _upsert_insert(db)
+    if insert is not None:
+        await db.execute(
+            insert(UserStats)
+            .values(id=STATS_ROW_ID, total=0, active=0, superusers=0)
+            .on_conflict_do_nothing(index_elements=[UserStats.id])
+        )
+    else:
+        try:
+            async with db.begin_nested():
+                db.add(UserStats(id=STATS_ROW_ID, total=0, active=0, superusers=0))
+        except IntegrityError:
+            pass
+    result = await db.execute(
+        select(UserStats)
+        .where(UserStats.id == STATS_ROW_ID)
+        .with_for_update()
+        .execution_options(populate_existing=True)
+    )
+    stats = result.scalar_one()
+
+    result = await db.execute(
+        select(
+            func.count(User.id),
+            func.count(User.id).filter(User.is_active.is_(True)),
+            func.count(User.id).filter(User.is_superuser.is_(True)),
+        )
+    )
+    total, active, superusers = result.one()
+    stats.total = total
+    stats.active = active
+    stats.superusers = superusers
+
+    signup_day = _utc_date(db, User.created_at)
+    result = await db.execute(
+        select(signup_day, func.count(User.id))
+        .where(User.created_at.is_not(None))
+        .group_by(signup_day)
+    )
+    signups_by_day = result.tuples().all()
+    await db.execute(UserSignupDaily.__table__.delete())
+    for day, count in signups_by_day:
+        if isinstance(day, str):
+            day = date.fromisoformat(day)
+        db.add(UserSignupDaily(day=day, count=count))
+    await db.commit()
+
+
+async def _load_user_stats(db: AsyncSession) -> Dict[str, Any]:
+    stats = await db.get(UserStats, STATS_ROW_ID)
+    if stats is None:
+        await rebuild_user_stats(db)
+        stats = await db.get(UserStats, STATS_ROW_ID)
+
+    since = _utc_today() - timedelta(days=settings.ADMIN_STATS_SIGNUP_DAYS - 1)
+    result = await db.execute(
+        select(UserSignupDaily.day, UserSignupDaily.count)
+        .where(UserSignupDaily.day >= since)
+        .order_by(UserSignupDaily.day)
+    )
+    return {
+        "total_users": stats.total,
+        "active_users": stats.active,
+        "inactive_users": stats.total - stats.active,
+        "superusers": stats.superusers,
+        "signups_by_day": [
+            {"date": day.isoformat(), "count": count}
+            for day, count in result.tuples().all()
+        ],
+        "as_of": datetime.now(timezone.utc).isoformat(),
+    }
+
+
+async def get_user_stats(db: AsyncSession) -> Dict[str, Any]:
+    """Get user statistics, served from a snapshot at most a few seconds old."""
+    global _snapshot
+    now = time.monotonic()
+    if _snapshot is None or now - _snapshot[0] > settings.ADMIN_STATS_MAX_STALENESS_SECONDS:
+        _snapshot = (now, await _load_user_stats(db))
+    taken_at, stats = _snapshot
+    return {**stats, "age_seconds": round(now - taken_at, 3)}
+
+
+async def get_system_stats(db: AsyncSession) -> Dict[str, Any]:
+    """Get system statistics."""
+    user_stats = await get_user_stats(db)
+    return {
+        "environment": settings.ENVIRONMENT,
+        "version": settings.VERSION,
+        "python_version": platform.python_version(),
+        "uptime_seconds": round(time.time() - _started_at, 3),
+        "users": {
+            "total": user_stats["total_users"],
+            "active": user_stats["active_users"],
+        },
+        "principal_cache": principal_cache.stats(),
+        "password_hashing": password_hasher.stats(),
+        "login_audit": login_audit.stats(),
+    }
@@ -4,28 +4,50 @@ Authentication service.
 from typing import Optional
 
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
+from sqlalchemy import update
 
-from app.core.security import verify_password
+from app.core.hashing import verify_and_update_password_async
+from app.core.config import settings
 from app.models.user import User
+from app.services.login_audit import login_audit
+from app.services.user import get_user_by_email
 
 
-async def authenticate_user(db: AsyncSession, email: str, password: str) -> Optional[User]:
-    """Authenticate user with email and password."""
+async def authenticate_user(
+    db: AsyncSession, email: str, password: str, client_ip: Optional[str] = None
+) -> Optional[User]:
+    """Authenticate user with email and password.
+
+    A stored hash using an outdated scheme or cost is replaced with a fresh
+    one while the plaintext is at hand.  The attempt is recorded in the
+    login audit buffer, which writes it later.
+    """
+    audit = settings.LOGIN_AUDIT_ENABLED
     user = await get_user_by_email(db, email=email)
     if not user:
+        if audit:
+            login_audit.record(email, None, False, client_ip)
         return None
-    if not verify_password(password, user.hashed_password):
+    valid, new_hash = await verify_and_update_password_async(
+        password, user.hashed_password
+    )
+    if audit:
+        login_audit.record(email, user.id, valid, client_ip)
+    if not valid:
         return None
+    if new_hash is not None:
+        # Only replace the hash we verified, in case the password changed
+        # concurrently; the password itself is unchanged, so tokens stay valid.
+        await db.execute(
+            update(User)
+            .where(User.id == user.id, User.hashed_password == user.hashed_password)
+            .values(hashed_password=new_hash)
+            .execution_options(synchronize_session=False)
+        )
+        await db.commit()
     return user
 
 
-async def get_user_by_email(db: AsyncSession, email: str) -> Optional[User]:
-    """Get user by email."""
-    result = await db.execute(select(User).where(User.email == email))
-    return result.scalar_one_or_none()
-
-
 def verify_user_permissions(user: User, required_permissions: list) -> bool:
     """Verify user has required permissions."""
     if user.is_superuser:
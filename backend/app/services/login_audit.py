@@ -0,0 +1,179 @@
+"""
+Write-behind login audit.
+
+``authenticate_user`` records every attempt with ``login_audit.record``,
+which only appends to an in-memory buffer.  A background task started from
+the application lifespan writes the buffer to ``login_events`` and
+``users.last_login_at`` in batched statements once ``LOGIN_AUDIT_BATCH_SIZE``
+events are pending or every ``LOGIN_AUDIT_FLUSH_INTERVAL_SECONDS``, and the
+rest is flushed on shutdown, so auditing adds no database round trip to
+logins.  At most ``LOGIN_AUDIT_MAX_PENDING`` events are held; beyond that new
+events are dropped and counted, as are events in a batch that fails to write.
+"""
+import asyncio
+from collections import deque
+from datetime import datetime, timezone
+from typing import Any, Deque, Dict, Iterable, List, Optional
+
+from sqlalchemy import bindparam, insert, or_, update
+
+from app.core.config import settings
+from app.core.logging import get_logger
+from app.core.metrics import Gauge, Metric, registry
+from app.db.session import AsyncSessionLocal
+from app.models.audit import LoginEvent
+from app.models.user import User
+
+logger = get_logger(__name__)
+
+login_audit_events_dropped_total = registry.counter(
+    "login_audit_events_dropped_total",
+    "Login audit events dropped, because the buffer was full or the write failed.",
+    ("reason",),
+)
+
+_users = User.__table__
+
+# Only ever moves last_login_at forward, and sets updated_at to itself so
+# its onupdate default (and with it the user's ETag) is left alone
+LAST_LOGIN_UPDATE = (
+    update(_users)
+    .where(
+        _users.c.id == bindparam("login_user_id"),
+        or_(
+            _users.c.last_login_at.is_(None),
+            _users.c.last_login_at < bindparam("login_at"),
+        ),
+    )
+    .values(last_login_at=bindparam("login_at"), updated_at=_users.c.updated_at)
+)
+
+
+def _chunks(items: List[Any], size: int) -> Iterable[List[Any]]:
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+class LoginAuditBuffer:
+    """Bounded buffer of login events, written to the database in batches."""
+
+    def __init__(self, max_pending: int, batch_size: int, flush_interval: float) -> None:
+        self.max_pending = max_pending
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._events: Deque[Dict[str, Any]] = deque()
+        # Latest successful login per user; never larger than the event buffer
+        self._last_logins: Dict[int, datetime] = {}
+        self._wakeup = asyncio.Event()
+        self._flush_lock = asyncio.Lock()
+        self._task: Optional[asyncio.Task] = None
+        self._closing = False
+        self.recorded = 0
+        self.written = 0
+        self.dropped = 0
+        self.failed = 0
+
+    def record(
+        self,
+        email: str,
+        user_id: Optional[int],
+        success: bool,
+        client_ip: Optional[str] = None,
+    ) -> None:
+        """Buffer one login attempt; never blocks or touches the database."""
+        if len(self._events) >= self.max_pending:
+            self.dropped += 1
+            login_audit_events_dropped_total.inc("full")
+            return
+        now = datetime.now(timezone.utc)
+        self._events.append({
+            "user_id": user_id,
+            "email": email,
+            "client_ip": client_ip,
+            "success": success,
+            "occurred_at": now,
+        })
+        if success and user_id is not None:
+            self._last_logins[user_id] = now
+        self.recorded += 1
+        if len(self._events) >= self.batch_size:
+            self._wakeup.set()
+
+    async def flush(self) -> None:
+        """Write every buffered event; a failed write drops what it held."""
+        async with self._flush_lock:
+            if not self._events and not self._last_logins:
+                return
+            events = list(self._events)
+            self._events.clear()
+            last_logins = [
+                {"login_user_id": user_id, "login_at": at}
+                for user_id, at in self._last_logins.items()
+            ]
+            self._last_logins = {}
+            try:
+                async with AsyncSessionLocal() as db:
+                    for batch in _chunks(events, self.batch_size):
+                        await db.execute(insert(LoginEvent), batch)
+                    for batch in _chunks(last_logins, self.batch_size):
+                        await db.execute(LAST_LOGIN_UPDATE, batch)
+                    await db.commit()
+            except Exception as e:
+                self.failed += len(events)
+                login_audit_events_dropped_total.inc("error", amount=len(events))
+                logger.error(
+                    "Failed to write login audit events", count=len(events), error=str(e)
+                )
+                return
+            self.written += len(events)
+
+    async def _loop(self) -> None:
+        while not self._closing:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            await self.flush()
+
+    def start(self) -> None:
+        """Start flushing in the background."""
+        if self._task is None:
+            self._closing = False
+            self._task = asyncio.create_task(self._loop(), name="login-audit")
+
+    async def stop(self) -> None:
+        """Stop the background task and flush whatever is still buffered."""
+        if self._task is not None:
+            # Let an in-progress flush finish rather than cancelling it
+            self._closing = True
+            self._wakeup.set()
+            await self._task
+            self._task = None
+        await self.flush()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "pending": len(self._events),
+            "recorded": self.recorded,
+            "written": self.written,
+            "dropped": self.dropped,
+            "failed": self.failed,
+        }
+
+
+login_audit = LoginAuditBuffer(
+    max_pending=settings.LOGIN_AUDIT_MAX_PENDING,
+    batch_size=settings.LOGIN_AUDIT_BATCH_SIZE,
+    flush_interval=settings.LOGIN_AUDIT_FLUSH_INTERVAL_SECONDS,
+)
+
+
+def collect_login_audit_metrics() -> List[Metric]:
+    """Depth of the login audit buffer."""
+    pending = Gauge("login_audit_pending", "Login audit events waiting to be written.")
+    pending.set(login_audit.stats()["pending"])
+    return [pending]
+
+
+registry.register_collector(collect_login_audit_metrics)
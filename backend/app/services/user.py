@@ -1,46 +1,267 @@
 """
 User service with CRUD operations.
 """
-from typing import Any, Dict, Optional, Union, List
+from datetime import datetime
+from typing import Any, Dict, Optional, Union, List, Tuple
 
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
+from sqlalchemy import (
+    String,
+    bindparam,
+    case,
+    delete,
+    func,
+    insert,
+    literal,
+    or_,
+    select,
+    tuple_,
+    type_coerce,
+    update,
+)
 from sqlalchemy.orm import selectinload
 
-from app.core.security import get_password_hash, verify_password
+from app.core.config import settings
+from app.core.hashing import (
+    HashingPoolSaturated,
+    get_password_hash_async,
+    password_hasher,
+)
+from app.core.pagination import InvalidCursor, decode_cursor, encode_cursor
+from app.core.principal_cache import principal_cache
 from app.models.user import User
-from app.schemas.user import UserCreate, UserUpdate
+from app.schemas.user import UserBulkUpdate, UserCreate, UserUpdate
+from app.services.admin import record_user_changes
+
+
+# Columns exposed by the public ``User`` schema; selecting only these skips
+# ORM instance construction for read-only listings.
+USER_PUBLIC_COLUMNS = (
+    User.id,
+    User.email,
+    User.full_name,
+    User.is_active,
+    User.is_superuser,
+    User.created_at,
+    User.updated_at,
+)
+
+# Hot queries are built once with bound parameters, so each call skips
+# statement construction and hits SQLAlchemy's compiled-statement cache
+# (and asyncpg's prepared-statement cache) under the same key.
+USER_BY_ID = select(User).where(User.id == bindparam("user_id"))
+USER_BY_ID_FOR_UPDATE = (
+    USER_BY_ID.with_for_update().execution_options(populate_existing=True)
+)
+USER_BY_EMAIL = select(User).where(User.email == bindparam("email"))
+TOKEN_VERSION_BY_ID = select(User.token_version).where(User.id == bindparam("user_id"))
+USERS_OFFSET = select(User).offset(bindparam("skip")).limit(bindparam("limit"))
+USER_ROWS_OFFSET = (
+    select(*USER_PUBLIC_COLUMNS)
+    .order_by(User.id)
+    .offset(bindparam("skip"))
+    .limit(bindparam("limit"))
+)
 
 
 async def get_user(db: AsyncSession, id: int) -> Optional[User]:
     """Get user by ID."""
-    result = await db.execute(select(User).where(User.id == id))
+    result = await db.execute(USER_BY_ID, {"user_id": id})
+    return result.scalar_one_or_none()
+
+
+async def get_user_for_update(db: AsyncSession, id: int) -> Optional[User]:
+    """Get user by ID, fresh from the database and locked until commit."""
+    result = await db.execute(USER_BY_ID_FOR_UPDATE, {"user_id": id})
     return result.scalar_one_or_none()
 
 
 async def get_user_by_email(db: AsyncSession, email: str) -> Optional[User]:
     """Get user by email."""
-    result = await db.execute(select(User).where(User.email == email))
+    result = await db.execute(USER_BY_EMAIL, {"email": email})
+    return result.scalar_one_or_none()
+
+
+async def get_token_version(db: AsyncSession, user_id: int) -> Optional[int]:
+    """Get a user's current ``token_version`` (``None`` if the user is gone)."""
+    result = await db.execute(TOKEN_VERSION_BY_ID, {"user_id": user_id})
     return result.scalar_one_or_none()
 
 
+# Changing any of these invalidates the claims embedded in access tokens
+TOKEN_CLAIM_FIELDS = ("email", "hashed_password", "is_active", "is_superuser")
+
+
 async def get_users(
     db: AsyncSession, skip: int = 0, limit: int = 100
 ) -> List[User]:
     """Get multiple users."""
-    result = await db.execute(select(User).offset(skip).limit(limit))
+    result = await db.execute(USERS_OFFSET, {"skip": skip, "limit": limit})
     return result.scalars().all()
 
 
+async def get_user_rows(db: AsyncSession, skip: int = 0, limit: int = 100) -> List[Any]:
+    """Get multiple users as rows of their public columns."""
+    result = await db.execute(USER_ROWS_OFFSET, {"skip": skip, "limit": limit})
+    return result.all()
+
+
+USER_PAGE_ORDERINGS = ("id", "created_at")
+
+
+async def get_users_page(
+    db: AsyncSession,
+    *,
+    limit: int = 100,
+    cursor: Optional[str] = None,
+    order_by: str = "id",
+    rows: bool = False,
+) -> Tuple[List[Any], Optional[str]]:
+    """Get a page of users using keyset pagination.
+
+    Unlike ``get_users`` this never scans skipped rows: each page seeks
+    directly past the last row of the previous one.  Returns the page and
+    the cursor for the next page (``None`` on the last page).  With
+    ``rows=True`` the page holds rows of ``USER_PUBLIC_COLUMNS`` instead of
+    ORM objects.
+
+    ``created_at`` cursors must hold exactly the stored value, or rows with
+    an equal timestamp are skipped.  SQLite stores timestamps as text whose
+    format depends on how they were written (``CURRENT_TIMESTAMP`` has no
+    fraction, bound values do), so there the cursor holds the stored text
+    and the seek compares text with text.
+    """
+    if order_by not in USER_PAGE_ORDERINGS:
+        raise ValueError(f"Unsupported ordering: {order_by}")
+    stored_as_text = db.get_bind().dialect.name == "sqlite"
+
+    stmt = select(*USER_PUBLIC_COLUMNS) if rows else select(User)
+    if order_by == "created_at":
+        stmt = stmt.order_by(User.created_at, User.id)
+    else:
+        stmt = stmt.order_by(User.id)
+
+    if cursor:
+        position = decode_cursor(cursor)
+        if position.get("o") != order_by:
+            raise InvalidCursor("Cursor was issued for a different ordering")
+        try:
+            last_id = int(position["id"])
+            if order_by == "created_at":
+                last_created_at = position["created_at"]
+                if stored_as_text:
+                    if not isinstance(last_created_at, str):
+                        raise TypeError("created_at must be text")
+                    last_created_at = literal(last_created_at, String)
+                else:
+                    last_created_at = datetime.fromisoformat(last_created_at)
+        except (KeyError, TypeError, ValueError) as e:
+            raise InvalidCursor("Malformed cursor") from e
+        if order_by == "created_at":
+            stmt = stmt.where(
+                tuple_(User.created_at, User.id) > tuple_(last_created_at, last_id)
+            )
+        else:
+            stmt = stmt.where(User.id > last_id)
+
+    # Fetch one extra row to learn whether another page exists
+    result = await db.execute(stmt.limit(limit + 1))
+    users = result.all() if rows else result.scalars().all()
+    if len(users) <= limit:
+        return users, None
+
+    users = users[:limit]
+    last = users[-1]
+    position = {"o": order_by, "id": last.id}
+    if order_by == "created_at":
+        if stored_as_text:
+            position["created_at"] = await db.scalar(
+                select(type_coerce(User.created_at, String)).where(User.id == last.id)
+            )
+        else:
+            position["created_at"] = last.created_at.isoformat()
+    return users, encode_cursor(position)
+
+
+def _like_escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+async def search_users(
+    db: AsyncSession, q: str, *, limit: int = 20, offset: int = 0
+) -> Tuple[List[Any], Optional[int]]:
+    """Search users by prefix or substring of email and full name.
+
+    Results are ranked exact email match first, then email prefix, then
+    name prefix, then other substring matches; on PostgreSQL ties are broken
+    by trigram similarity, which the ``*_trgm`` indexes also use to serve
+    the ``LIKE`` filters.  Terms shorter than
+    ``USERS_SEARCH_MIN_SUBSTRING_LENGTH`` match prefixes only, since an
+    unanchored pattern that short would scan the whole table.  Returns rows
+    of ``USER_PUBLIC_COLUMNS`` and the offset of the next page (``None`` on
+    the last page).
+    """
+    term = q.strip().lower()
+    if not term:
+        return [], None
+    pattern = _like_escape(term)
+    contains = (
+        f"%{pattern}%"
+        if len(term) >= settings.USERS_SEARCH_MIN_SUBSTRING_LENGTH
+        else f"{pattern}%"
+    )
+    email = func.lower(User.email)
+    # Same expressions as the trigram indexes, so PostgreSQL can use them
+    full_name = func.lower(User.full_name)
+    rank = case(
+        (email == term, 0),
+        (email.like(f"{pattern}%", escape="\\"), 1),
+        (full_name.like(f"{pattern}%", escape="\\"), 2),
+        else_=3,
+    )
+    order = [rank]
+    if db.get_bind().dialect.name == "postgresql":
+        order.append(
+            func.greatest(
+                func.similarity(email, literal(term)),
+                func.similarity(full_name, literal(term)),
+            ).desc()
+        )
+    else:
+        order.append(func.length(User.email))
+    order.append(User.id)
+
+    stmt = (
+        select(*USER_PUBLIC_COLUMNS)
+        .where(
+            or_(
+                email.like(contains, escape="\\"),
+                full_name.like(contains, escape="\\"),
+            )
+        )
+        .order_by(*order)
+        .offset(offset)
+        .limit(limit + 1)
+    )
+    rows = (await db.execute(stmt)).all()
+    if len(rows) <= limit:
+        return rows, None
+    return rows[:limit], offset + limit
+
+
 async def create_user(db: AsyncSession, obj_in: UserCreate) -> User:
     """Create new user."""
     db_obj = User(
         email=obj_in.email,
-        hashed_password=get_password_hash(obj_in.password),
+        hashed_password=await get_password_hash_async(obj_in.password),
         full_name=obj_in.full_name,
         is_superuser=obj_in.is_superuser,
     )
     db.add(db_obj)
+    await record_user_changes(
+        db, total=1, active=1, superusers=int(bool(obj_in.is_superuser)), signups=1
+    )
     await db.commit()
     await db.refresh(db_obj)
     return db_obj
@@ -56,27 +277,298 @@ async def update_user(
         update_data = obj_in.dict(exclude_unset=True)
     
     if update_data.get("password"):
-        hashed_password = get_password_hash(update_data["password"])
+        hashed_password = await get_password_hash_async(update_data["password"])
         del update_data["password"]
         update_data["hashed_password"] = hashed_password
     
+    previous_email = db_obj.email
+    was_active = bool(db_obj.is_active)
+    was_superuser = bool(db_obj.is_superuser)
+    revokes_tokens = any(
+        field in update_data and update_data[field] != getattr(db_obj, field)
+        for field in TOKEN_CLAIM_FIELDS
+    )
     for field, value in update_data.items():
         setattr(db_obj, field, value)
+    if revokes_tokens:
+        # Incremented in SQL so concurrent writers never lose a bump
+        db_obj.token_version = User.token_version + 1
     
     db.add(db_obj)
+    await record_user_changes(
+        db,
+        active=int(bool(db_obj.is_active)) - int(was_active),
+        superusers=int(bool(db_obj.is_superuser)) - int(was_superuser),
+    )
     await db.commit()
     await db.refresh(db_obj)
+    principal_cache.invalidate(email=previous_email, user_id=db_obj.id)
+    principal_cache.invalidate(email=db_obj.email)
     return db_obj
 
 
-async def delete_user(db: AsyncSession, *, id: int) -> User:
-    """Delete user."""
-    obj = await db.get(User, id)
+async def delete_user(db: AsyncSession, *, id: int, db_obj: Optional[User] = None) -> User:
+    """Delete user; pass ``db_obj`` if it is already loaded."""
+    obj = db_obj if db_obj is not None else await db.get(User, id)
     await db.delete(obj)
+    await record_user_changes(
+        db,
+        total=-1,
+        active=-int(bool(obj.is_active)),
+        superusers=-int(bool(obj.is_superuser)),
+    )
     await db.commit()
+    principal_cache.invalidate(email=obj.email, user_id=id)
     return obj
 
 
+def _chunks(items: List[Any], size: int):
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+def _hash_error(error: Exception) -> str:
+    if isinstance(error, HashingPoolSaturated):
+        return "Server busy, password not hashed; retry this item"
+    return "Could not hash password"
+
+
+# Bumps token_version in SQL, so concurrent writers never lose an increment
+TOKEN_VERSION_BUMP = (
+    update(User.__table__)
+    .where(User.__table__.c.id == bindparam("bump_id"))
+    .values(token_version=User.__table__.c.token_version + 1)
+)
+
+
+def _bulk_result(ids: List[int], errors: List[Dict[str, Any]]) -> Dict[str, Any]:
+    errors.sort(key=lambda error: error["index"])
+    return {"succeeded": len(ids), "ids": ids, "errors": errors}
+
+
+async def bulk_create_users(
+    db: AsyncSession, items: List[Tuple[int, UserCreate]]
+) -> Dict[str, Any]:
+    """Create many users with batched multi-row INSERTs.
+
+    ``items`` pairs each user with its index in the client's request so
+    failures can be reported per item.  Each batch is its own transaction;
+    a conflicting batch is rolled back and reported without affecting the
+    others.
+    """
+    errors: List[Dict[str, Any]] = []
+    seen = set()
+    candidates = []
+    for index, obj_in in items:
+        if obj_in.email in seen:
+            errors.append({"index": index, "detail": "Duplicate email in request"})
+            continue
+        seen.add(obj_in.email)
+        candidates.append((index, obj_in))
+
+    existing = set()
+    emails = [obj_in.email for _, obj_in in candidates]
+    for chunk in _chunks(emails, settings.USERS_BULK_BATCH_SIZE):
+        result = await db.execute(select(User.email).where(User.email.in_(chunk)))
+        existing.update(result.scalars().all())
+    pending = []
+    for index, obj_in in candidates:
+        if obj_in.email in existing:
+            errors.append({"index": index, "detail": "Email already registered"})
+        else:
+            pending.append((index, obj_in))
+
+    hashed_passwords = await password_hasher.hash_many(
+        [obj_in.password for _, obj_in in pending]
+    )
+    rows = []
+    for (index, obj_in), hashed_password in zip(pending, hashed_passwords):
+        if isinstance(hashed_password, Exception):
+            errors.append({"index": index, "detail": _hash_error(hashed_password)})
+            continue
+        rows.append((
+            index,
+            {
+                "email": obj_in.email,
+                "hashed_password": hashed_password,
+                "full_name": obj_in.full_name,
+                "is_superuser": obj_in.is_superuser,
+            },
+        ))
+
+    ids: List[int] = []
+    for batch in _chunks(rows, settings.USERS_BULK_BATCH_SIZE):
+        stmt = insert(User).returning(User.id, sort_by_parameter_order=True)
+        try:
+            result = await db.execute(stmt, [values for _, values in batch])
+            batch_ids = list(result.scalars().all())
+            await record_user_changes(
+                db,
+                total=len(batch),
+                active=len(batch),
+                superusers=sum(bool(values["is_superuser"]) for _, values in batch),
+                signups=len(batch),
+            )
+            await db.commit()
+        except IntegrityError:
+            await db.rollback()
+            errors.extend(
+                {"index": index, "detail": "Conflicting write, batch not applied"}
+                for index, _ in batch
+            )
+            continue
+        ids.extend(batch_ids)
+
+    return _bulk_result(ids, errors)
+
+
+async def bulk_update_users(
+    db: AsyncSession, items: List[Tuple[int, UserBulkUpdate]]
+) -> Dict[str, Any]:
+    """Update many users by id with batched UPDATEs.
+
+    Items are paired with their request index as in ``bulk_create_users``.
+    """
+    errors: List[Dict[str, Any]] = []
+    seen = set()
+    candidates = []
+    for index, obj_in in items:
+        if obj_in.id in seen:
+            errors.append({"index": index, "detail": "Duplicate id in request"})
+            continue
+        seen.add(obj_in.id)
+        candidates.append((index, obj_in))
+
+    current: Dict[int, Tuple[str, bool, bool]] = {}
+    user_ids = [obj_in.id for _, obj_in in candidates]
+    for chunk in _chunks(user_ids, settings.USERS_BULK_BATCH_SIZE):
+        result = await db.execute(
+            select(User.id, User.email, User.is_active, User.is_superuser).where(
+                User.id.in_(chunk)
+            )
+        )
+        for user_id, email, active, superuser in result.tuples().all():
+            current[user_id] = (email, bool(active), bool(superuser))
+
+    pending = []
+    for index, obj_in in candidates:
+        if obj_in.id not in current:
+            errors.append({"index": index, "detail": "User not found"})
+            continue
+        update_data = obj_in.dict(exclude_unset=True)
+        update_data["id"] = obj_in.id
+        if len(update_data) == 1:
+            errors.append({"index": index, "detail": "No fields to update"})
+            continue
+        pending.append((index, update_data))
+
+    with_password = [
+        (index, values) for index, values in pending if values.get("password")
+    ]
+    hashed_passwords = await password_hasher.hash_many(
+        [values["password"] for _, values in with_password]
+    )
+    failed = set()
+    for (index, values), hashed_password in zip(with_password, hashed_passwords):
+        if isinstance(hashed_password, Exception):
+            errors.append({"index": index, "detail": _hash_error(hashed_password)})
+            failed.add(index)
+        else:
+            values["hashed_password"] = hashed_password
+    pending = [(index, values) for index, values in pending if index not in failed]
+    revoking = set()
+    for _, values in pending:
+        values.pop("password", None)
+        email, was_active, was_superuser = current[values["id"]]
+        if (
+            "hashed_password" in values
+            or values.get("email", email) != email
+            or bool(values.get("is_active", was_active)) != was_active
+            or bool(values.get("is_superuser", was_superuser)) != was_superuser
+        ):
+            revoking.add(values["id"])
+
+    ids: List[int] = []
+    for batch in _chunks(pending, settings.USERS_BULK_BATCH_SIZE):
+        active_delta = 0
+        superuser_delta = 0
+        bumps = [
+            {"bump_id": values["id"]} for _, values in batch if values["id"] in revoking
+        ]
+        for _, values in batch:
+            _, was_active, was_superuser = current[values["id"]]
+            active_delta += int(bool(values.get("is_active", was_active))) - was_active
+            superuser_delta += (
+                int(bool(values.get("is_superuser", was_superuser))) - was_superuser
+            )
+        try:
+            await db.execute(update(User), [values for _, values in batch])
+            if bumps:
+                await db.execute(TOKEN_VERSION_BUMP, bumps)
+            await record_user_changes(
+                db, active=active_delta, superusers=superuser_delta
+            )
+            await db.commit()
+        except IntegrityError:
+            await db.rollback()
+            errors.extend(
+                {"index": index, "detail": "Conflicting write, batch not applied"}
+                for index, _ in batch
+            )
+            continue
+        for _, values in batch:
+            user_id = values["id"]
+            ids.append(user_id)
+            principal_cache.invalidate(email=current[user_id][0], user_id=user_id)
+            if "email" in values:
+                principal_cache.invalidate(email=values["email"])
+
+    return _bulk_result(ids, errors)
+
+
+async def bulk_delete_users(
+    db: AsyncSession, items: List[Tuple[int, int]]
+) -> Dict[str, Any]:
+    """Delete many users by id with batched ``DELETE ... WHERE id IN`` statements.
+
+    ``items`` pairs each user id with its request index.
+    """
+    errors: List[Dict[str, Any]] = []
+    index_by_id: Dict[int, int] = {}
+    for index, user_id in items:
+        if user_id in index_by_id:
+            errors.append({"index": index, "detail": "Duplicate id in request"})
+            continue
+        index_by_id[user_id] = index
+
+    ids: List[int] = []
+    for chunk in _chunks(list(index_by_id), settings.USERS_BULK_BATCH_SIZE):
+        result = await db.execute(
+            delete(User)
+            .where(User.id.in_(chunk))
+            .returning(User.id, User.email, User.is_active, User.is_superuser)
+        )
+        deleted = result.tuples().all()
+        await record_user_changes(
+            db,
+            total=-len(deleted),
+            active=-sum(bool(row.is_active) for row in deleted),
+            superusers=-sum(bool(row.is_superuser) for row in deleted),
+        )
+        await db.commit()
+        for user_id, email, _, _ in deleted:
+            ids.append(user_id)
+            principal_cache.invalidate(email=email, user_id=user_id)
+        deleted_ids = {row.id for row in deleted}
+        errors.extend(
+            {"index": index_by_id[user_id], "detail": "User not found"}
+            for user_id in chunk
+            if user_id not in deleted_ids
+        )
+
+    return _bulk_result(ids, errors)
+
+
 async def is_active(user: User) -> bool:
     """Check if user is active."""
     return user.is_active
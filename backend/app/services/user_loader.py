@@ -0,0 +1,100 @@
+"""
+Request-scoped user loader.
+
+A ``UserLoader`` remembers every user it has loaded by id or email for the
+life of one request, so repeated lookups cost nothing, and coalesces loads
+issued concurrently (e.g. from ``asyncio.gather``) into a single
+``WHERE id IN (...)`` or ``WHERE email IN (...)`` query.  Loaders are bound
+to one session; the ``get_user_loader`` and ``get_read_user_loader``
+dependencies in ``app.api.deps`` give the loader for the request's session.
+"""
+import asyncio
+from typing import Any, Dict, Hashable, Iterable, List, Optional
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.models.user import User
+
+
+class UserLoader:
+    """Deduplicating, batching loader of users for one session."""
+
+    def __init__(self, db: AsyncSession) -> None:
+        self.db = db
+        self._by_id: Dict[int, Optional[User]] = {}
+        self._by_email: Dict[str, Optional[User]] = {}
+        self._pending: Dict[str, Dict[Hashable, "asyncio.Future[Optional[User]]"]] = {
+            "id": {},
+            "email": {},
+        }
+        self._dispatch: Dict[str, Optional[asyncio.Task]] = {"id": None, "email": None}
+        # A session must not run two queries at once
+        self._query_lock = asyncio.Lock()
+        self.queries = 0
+
+    def prime(self, user: User) -> None:
+        """Remember ``user`` so later loads by its id or email return it."""
+        self._by_id[user.id] = user
+        self._by_email[user.email] = user
+
+    def _cache(self, field: str) -> Dict[Any, Optional[User]]:
+        return self._by_id if field == "id" else self._by_email
+
+    async def _load(self, field: str, key: Hashable) -> Optional[User]:
+        cache = self._cache(field)
+        if key in cache:
+            return cache[key]
+        pending = self._pending[field]
+        future = pending.get(key)
+        if future is None:
+            future = asyncio.get_running_loop().create_future()
+            pending[key] = future
+            if self._dispatch[field] is None:
+                self._dispatch[field] = asyncio.create_task(self._dispatch_batch(field))
+        return await future
+
+    async def _dispatch_batch(self, field: str) -> None:
+        # Let every coroutine scheduled alongside this one queue its key first
+        await asyncio.sleep(0)
+        pending = self._pending[field]
+        self._pending[field] = {}
+        self._dispatch[field] = None
+        column = User.id if field == "id" else User.email
+        keys = list(pending)
+        try:
+            async with self._query_lock:
+                for start in range(0, len(keys), settings.USERS_BULK_BATCH_SIZE):
+                    chunk = keys[start:start + settings.USERS_BULK_BATCH_SIZE]
+                    result = await self.db.execute(select(User).where(column.in_(chunk)))
+                    self.queries += 1
+                    for user in result.scalars().all():
+                        self.prime(user)
+        except Exception as e:
+            for future in pending.values():
+                if not future.done():
+                    future.set_exception(e)
+            return
+        cache = self._cache(field)
+        for key, future in pending.items():
+            cache.setdefault(key, None)
+            if not future.done():
+                future.set_result(cache[key])
+
+    async def load(self, user_id: int) -> Optional[User]:
+        """Load one user by id."""
+        return await self._load("id", user_id)
+
+    async def load_by_email(self, email: str) -> Optional[User]:
+        """Load one user by email."""
+        return await self._load("email", email)
+
+    async def load_many(self, user_ids: Iterable[int]) -> List[Optional[User]]:
+        """Load users by id with a single query; ``None`` for ids not found."""
+        return list(await asyncio.gather(*(self.load(user_id) for user_id in user_ids)))
+
+    def forget(self, user: User) -> None:
+        """Drop ``user`` from the loader (e.g. after deleting it)."""
+        self._by_id.pop(user.id, None)
+        self._by_email.pop(user.email, None)
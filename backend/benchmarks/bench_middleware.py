@@ -0,0 +1,147 @@
+"""
+Per-request overhead of the middleware in front of the routes.
+
+    python -m benchmarks.bench_middleware
+
+Drives an ASGI app that answers immediately through the previous stack
+(Starlette ``TrustedHostMiddleware`` and ``CORSMiddleware`` around the
+metrics and request logging middleware) and through ``FrontDoorMiddleware``
+around the same inner middleware, for plain, CORS, preflight and health
+check requests.
+"""
+import argparse
+import asyncio
+from typing import Any, Dict, List, Optional
+
+from benchmarks.common import configure_environment, emit, measure_async, summarize
+
+configure_environment()
+
+from starlette.middleware.cors import CORSMiddleware  # noqa: E402
+from starlette.middleware.trustedhost import TrustedHostMiddleware  # noqa: E402
+
+from app.core.front_door import FrontDoorMiddleware  # noqa: E402
+from app.core.logging import RequestLoggingMiddleware  # noqa: E402
+from app.core.metrics import MetricsMiddleware  # noqa: E402
+
+HOSTS = [
+    "api.example.com",
+    "api.example.org",
+    "*.internal.example.com",
+    "localhost",
+    "127.0.0.1",
+]
+ORIGINS = [
+    "https://app.example.com",
+    "https://admin.example.com",
+    "https://staging.example.com",
+    "http://localhost:3000",
+    "http://127.0.0.1:3000",
+]
+
+CASES = {
+    "plain": ("GET", "/api/v1/users/me", {}),
+    "cors": ("GET", "/api/v1/users/me", {"origin": "http://127.0.0.1:3000"}),
+    "preflight": (
+        "OPTIONS",
+        "/api/v1/users/me",
+        {
+            "origin": "http://127.0.0.1:3000",
+            "access-control-request-method": "PUT",
+            "access-control-request-headers": "authorization, content-type",
+        },
+    ),
+    "health": ("GET", "/health/live", {}),
+}
+
+
+async def endpoint(scope, receive, send):
+    await send({
+        "type": "http.response.start",
+        "status": 200,
+        "headers": [(b"content-type", b"application/json"), (b"content-length", b"2")],
+    })
+    await send({"type": "http.response.body", "body": b"{}"})
+
+
+def inner_stack():
+    return MetricsMiddleware(RequestLoggingMiddleware(endpoint, sample_rate=0.0))
+
+
+def previous_stack():
+    app = CORSMiddleware(
+        inner_stack(),
+        allow_origins=ORIGINS,
+        allow_credentials=True,
+        allow_methods=["*"],
+        allow_headers=["*"],
+    )
+    return TrustedHostMiddleware(app, allowed_hosts=HOSTS)
+
+
+def front_door_stack():
+    return FrontDoorMiddleware(
+        inner_stack(),
+        bypass_app=endpoint,
+        allowed_hosts=HOSTS,
+        allowed_origins=ORIGINS,
+        max_age=600,
+    )
+
+
+def make_scope(method: str, path: str, headers: Dict[str, str]) -> Dict[str, Any]:
+    raw = [(b"host", b"api.example.com"), (b"user-agent", b"bench"), (b"accept", b"*/*")]
+    raw.extend((name.encode(), value.encode()) for name, value in headers.items())
+    return {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": method,
+        "scheme": "https",
+        "path": path,
+        "raw_path": path.encode(),
+        "query_string": b"",
+        "root_path": "",
+        "headers": raw,
+        "client": ("10.0.0.1", 50000),
+        "server": ("10.0.0.2", 443),
+    }
+
+
+async def receive() -> Dict[str, Any]:
+    return {"type": "http.request", "body": b"", "more_body": False}
+
+
+async def _run(repeat: int, number: int) -> List[Dict[str, Any]]:
+    status: Optional[int] = None
+
+    async def send(message):
+        nonlocal status
+        if message["type"] == "http.response.start":
+            status = message["status"]
+
+    results = []
+    for variant, build in (("stack", previous_stack), ("front_door", front_door_stack)):
+        app = build()
+        for case, (method, path, headers) in CASES.items():
+            scope = make_scope(method, path, headers)
+            await app(dict(scope), receive, send)  # warm caches
+            samples = await measure_async(
+                lambda: app(dict(scope), receive, send), repeat=repeat, number=number
+            )
+            results.append(
+                summarize(f"middleware.{case}.{variant}", samples, status=status)
+            )
+    return results
+
+
+def run(quick: bool = False) -> List[Dict[str, Any]]:
+    """Run the benchmark and return its results."""
+    return asyncio.run(_run(repeat=5 if quick else 20, number=500 if quick else 5000))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--quick", action="store_true")
+    args = parser.parse_args()
+    emit(run(quick=args.quick))
@@ -0,0 +1,70 @@
+"""
+Deep-page latency of OFFSET paging versus keyset (cursor) paging.
+
+    python -m benchmarks.bench_pagination --rows 2000000
+
+OFFSET latency grows with the page depth; keyset latency should stay flat.
+"""
+import argparse
+import asyncio
+from typing import Any, Dict, List, Optional
+
+from benchmarks.common import (
+    configure_environment,
+    emit,
+    measure_async,
+    reset_schema,
+    seed_users,
+    summarize,
+)
+
+configure_environment()
+
+from app.core.pagination import encode_cursor  # noqa: E402
+from app.db.session import AsyncSessionLocal  # noqa: E402
+from app.services.user import get_users, get_users_page  # noqa: E402
+
+PAGE_SIZE = 100
+
+
+async def _run(rows: int, repeat: int) -> List[Dict[str, Any]]:
+    await reset_schema()
+    await seed_users(rows)
+
+    depths = sorted({0, rows // 10, rows // 2, max(rows - 2 * PAGE_SIZE, 0)})
+    results = []
+    async with AsyncSessionLocal() as db:
+        for depth in depths:
+            samples = await measure_async(
+                lambda: get_users(db, skip=depth, limit=PAGE_SIZE), repeat=repeat
+            )
+            results.append(
+                summarize("pagination.offset", samples, rows=rows, depth=depth)
+            )
+
+            # Row ids are assigned sequentially, so the cursor for a given
+            # depth points just past row ``depth``.
+            cursor: Optional[str] = encode_cursor({"o": "id", "id": depth}) if depth else ""
+            samples = await measure_async(
+                lambda: get_users_page(db, limit=PAGE_SIZE, cursor=cursor),
+                repeat=repeat,
+            )
+            results.append(
+                summarize("pagination.keyset", samples, rows=rows, depth=depth)
+            )
+    return results
+
+
+def run(quick: bool = False, rows: Optional[int] = None) -> List[Dict[str, Any]]:
+    """Run the benchmark and return its results."""
+    if rows is None:
+        rows = 20000 if quick else 1000000
+    return asyncio.run(_run(rows, repeat=5 if quick else 20))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=None)
+    parser.add_argument("--quick", action="store_true")
+    args = parser.parse_args()
+    emit(run(quick=args.quick, rows=args.rows))
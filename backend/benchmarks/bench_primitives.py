@@ -0,0 +1,124 @@
+"""
+Micro-benchmarks for the security, service and serialization primitives.
+
+    python -m benchmarks.bench_primitives
+
+Covers JWT creation and verification, password hashing and verification at
+the configured cost, ``get_user_by_email`` and ``get_users`` against the
+benchmark database, and response-model serialization of ``schemas.User``
+lists.
+"""
+import argparse
+import asyncio
+from datetime import timedelta
+from typing import Any, Dict, List
+
+from benchmarks.common import (
+    configure_environment,
+    emit,
+    measure,
+    measure_async,
+    reset_schema,
+    seed_users,
+    summarize,
+)
+
+configure_environment()
+
+from fastapi.encoders import jsonable_encoder  # noqa: E402
+
+from app.core.config import settings  # noqa: E402
+from app.core.hashing import get_password_hash, hashing_params, verify_password  # noqa: E402
+from app.core.security import create_access_token  # noqa: E402
+from app.core.tokens import decode_access_token  # noqa: E402
+from app.db.session import AsyncSessionLocal  # noqa: E402
+from app.schemas.user import User as UserSchema  # noqa: E402
+from app.services.user import get_user_by_email, get_users  # noqa: E402
+
+SEED_ROWS = 10000
+
+
+def bench_tokens(repeat: int) -> List[Dict[str, Any]]:
+    claims = {"sub": "user1@example.com"}
+    token = create_access_token(claims, expires_delta=timedelta(minutes=30))
+    return [
+        summarize(
+            "security.create_access_token",
+            measure(lambda: create_access_token(claims), repeat=repeat, number=100),
+        ),
+        summarize(
+            "security.decode_access_token",
+            measure(lambda: decode_access_token(token), repeat=repeat, number=100),
+        ),
+    ]
+
+
+def bench_hashing(repeat: int) -> List[Dict[str, Any]]:
+    hashed = get_password_hash("correct horse battery staple")
+    scheme = settings.PASSWORD_HASH_SCHEMES[0]
+    params = hashing_params(scheme)
+    return [
+        summarize(
+            "security.get_password_hash",
+            measure(lambda: get_password_hash("correct horse battery staple"), repeat=repeat),
+            scheme=scheme,
+            params=params,
+        ),
+        summarize(
+            "security.verify_password",
+            measure(
+                lambda: verify_password("correct horse battery staple", hashed),
+                repeat=repeat,
+            ),
+            scheme=scheme,
+            params=params,
+        ),
+    ]
+
+
+async def bench_services(repeat: int) -> List[Dict[str, Any]]:
+    await reset_schema()
+    await seed_users(SEED_ROWS)
+
+    results = []
+    async with AsyncSessionLocal() as db:
+        email = f"user{SEED_ROWS // 2}@example.com"
+        samples = await measure_async(
+            lambda: get_user_by_email(db, email=email), repeat=repeat, number=20
+        )
+        results.append(summarize("services.get_user_by_email", samples, rows=SEED_ROWS))
+
+        for limit in (100, 1000):
+            samples = await measure_async(
+                lambda: get_users(db, skip=0, limit=limit), repeat=repeat
+            )
+            results.append(
+                summarize("services.get_users", samples, rows=SEED_ROWS, limit=limit)
+            )
+
+        for size in (100, 1000):
+            users = await get_users(db, limit=size)
+            samples = measure(
+                lambda: jsonable_encoder(
+                    [UserSchema.model_validate(user) for user in users]
+                ),
+                repeat=repeat,
+            )
+            results.append(summarize("schemas.user_list", samples, items=size))
+    return results
+
+
+def run(quick: bool = False) -> List[Dict[str, Any]]:
+    """Run the benchmark and return its results."""
+    repeat = 5 if quick else 20
+    results = bench_tokens(repeat)
+    results += bench_hashing(3 if quick else 10)
+    results += asyncio.run(bench_services(repeat))
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--quick", action="store_true")
+    args = parser.parse_args()
+    emit(run(quick=args.quick))
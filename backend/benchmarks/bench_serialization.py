@@ -0,0 +1,92 @@
+"""
+User list response cost: response-model validation versus the fast path.
+
+    python -m benchmarks.bench_serialization
+
+For 100, 1k and 10k users, compares the generic FastAPI pipeline (ORM
+objects validated into ``schemas.User``, ``jsonable_encoder``,
+``JSONResponse``) with the fast path used by ``GET /users/`` (column rows,
+``serialize_users``, ``FastJSONResponse``).  Each is measured for
+serialization alone and end to end including the query.
+"""
+import argparse
+import asyncio
+from typing import Any, Dict, List
+
+from benchmarks.common import (
+    configure_environment,
+    emit,
+    measure,
+    measure_async,
+    reset_schema,
+    seed_users,
+    summarize,
+)
+
+configure_environment()
+
+from fastapi.encoders import jsonable_encoder  # noqa: E402
+from fastapi.responses import JSONResponse  # noqa: E402
+
+from app.core.serialization import FastJSONResponse, serialize_users  # noqa: E402
+from app.db.session import AsyncSessionLocal  # noqa: E402
+from app.schemas.user import User as UserSchema  # noqa: E402
+from app.services.user import get_user_rows, get_users  # noqa: E402
+
+SIZES = (100, 1000, 10000)
+
+
+def validated_response(users: List[Any]) -> bytes:
+    """What FastAPI does with ``response_model=List[User]``."""
+    content = jsonable_encoder([UserSchema.model_validate(user) for user in users])
+    return JSONResponse(content).body
+
+
+def fast_response(rows: List[Any]) -> bytes:
+    return FastJSONResponse(serialize_users(rows)).body
+
+
+async def _run(repeat: int) -> List[Dict[str, Any]]:
+    await reset_schema()
+    await seed_users(max(SIZES))
+
+    results = []
+    async with AsyncSessionLocal() as db:
+        for size in SIZES:
+            users = await get_users(db, limit=size)
+            rows = await get_user_rows(db, limit=size)
+            assert validated_response(users) and fast_response(rows)
+
+            samples = measure(lambda: validated_response(users), repeat=repeat)
+            results.append(summarize("serialization.users.validated", samples, items=size))
+            samples = measure(lambda: fast_response(rows), repeat=repeat)
+            results.append(summarize("serialization.users.fast", samples, items=size))
+
+            async def validated_end_to_end() -> None:
+                db.expunge_all()
+                validated_response(await get_users(db, limit=size))
+
+            async def fast_end_to_end() -> None:
+                fast_response(await get_user_rows(db, limit=size))
+
+            samples = await measure_async(validated_end_to_end, repeat=repeat)
+            results.append(
+                summarize("serialization.users.validated_end_to_end", samples, items=size)
+            )
+            samples = await measure_async(fast_end_to_end, repeat=repeat)
+            results.append(
+                summarize("serialization.users.fast_end_to_end", samples, items=size)
+            )
+    return results
+
+
+def run(quick: bool = False) -> List[Dict[str, Any]]:
+    """Run the benchmark and return its results."""
+    return asyncio.run(_run(repeat=5 if quick else 30))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--quick", action="store_true")
+    args = parser.parse_args()
+    emit(run(quick=args.quick))
@@ -0,0 +1,186 @@
+"""
+Cold-start cost: import time of ``app.main`` and time to first response.
+
+    python -m benchmarks.bench_startup [--check]
+
+Every sample runs in a fresh interpreter, as a Cloud Run cold start would.
+Import time is broken down per module with ``python -X importtime``; the
+first-response sample times process spawn through application startup to
+the first ``GET /health/`` response, driving the ASGI app in-process.
+
+Results are compared against ``startup_budget.json``; with ``--check`` the
+exit status is non-zero when a median exceeds its budget.
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+from collections import defaultdict
+from pathlib import Path
+from typing import Any, Dict, List, Tuple
+
+from benchmarks.common import BACKEND_DIR, configure_environment, emit, summarize
+
+configure_environment()
+
+BUDGET_FILE = Path(__file__).resolve().parent / "startup_budget.json"
+
+FIRST_RESPONSE_SCRIPT = """
+import asyncio, sys, time
+
+spawned = float(sys.argv[1])
+start = time.perf_counter()
+from app.main import app
+imported = time.perf_counter()
+
+
+async def main():
+    lifespan_events = [{"type": "lifespan.startup"}]
+    lifespan_sent = []
+
+    async def lifespan_receive():
+        if lifespan_events:
+            return lifespan_events.pop()
+        await asyncio.Event().wait()
+
+    async def lifespan_send(message):
+        lifespan_sent.append(message)
+
+    lifespan = asyncio.create_task(
+        app({"type": "lifespan", "asgi": {"version": "3.0"}, "state": {}},
+            lifespan_receive, lifespan_send)
+    )
+    while not lifespan_sent:
+        await asyncio.sleep(0)
+
+    scope = {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1",
+        "method": "GET", "scheme": "http", "path": "/health/", "raw_path": b"/health/",
+        "root_path": "", "query_string": b"", "headers": [(b"host", b"localhost")],
+        "client": ("127.0.0.1", 1), "server": ("localhost", 80), "state": {},
+    }
+    status = []
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        if message["type"] == "http.response.start":
+            status.append(message["status"])
+
+    await app(scope, receive, send)
+    responded = time.perf_counter()
+    lifespan.cancel()
+    return status[0], responded
+
+
+status, responded = asyncio.run(main())
+print(status, imported - start, responded - start, time.time() - spawned)
+"""
+
+
+def _child_env() -> Dict[str, str]:
+    env = dict(os.environ)
+    env["PYTHONPATH"] = os.pathsep.join(
+        filter(None, [str(BACKEND_DIR), env.get("PYTHONPATH")])
+    )
+    return env
+
+
+def import_profile() -> List[Tuple[str, float, float]]:
+    """Return ``(module, self_seconds, cumulative_seconds)`` for one cold import."""
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import app.main"],
+        cwd=BACKEND_DIR,
+        env=_child_env(),
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    rows = []
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|", 2)
+        rows.append((name.strip(), int(self_us) / 1e6, int(cumulative_us) / 1e6))
+    return rows
+
+
+def first_response() -> Tuple[float, float]:
+    """Return ``(import_seconds, spawn_to_first_response_seconds)`` for one cold start."""
+    proc = subprocess.run(
+        [sys.executable, "-c", FIRST_RESPONSE_SCRIPT, repr(time.time())],
+        cwd=BACKEND_DIR,
+        env=_child_env(),
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    status, import_seconds, _, total_seconds = proc.stdout.split()[-4:]
+    if status != "200":
+        raise RuntimeError(f"first request returned {status}")
+    return float(import_seconds), float(total_seconds)
+
+
+def _top_packages(rows: List[Tuple[str, float, float]], limit: int) -> Dict[str, float]:
+    totals: Dict[str, float] = defaultdict(float)
+    for name, self_seconds, _ in rows:
+        totals[name.split(".")[0]] += self_seconds
+    ordered = sorted(totals.items(), key=lambda item: item[1], reverse=True)
+    return {name: round(seconds, 6) for name, seconds in ordered[:limit]}
+
+
+def _top_modules(rows: List[Tuple[str, float, float]], limit: int) -> Dict[str, float]:
+    ordered = sorted(rows, key=lambda row: row[2], reverse=True)
+    return {name: round(cumulative, 6) for name, _, cumulative in ordered[:limit]}
+
+
+def load_budget() -> Dict[str, float]:
+    with open(BUDGET_FILE) as f:
+        return json.load(f)
+
+
+def run(quick: bool = False, top: int = 15) -> List[Dict[str, Any]]:
+    """Run the benchmark and return its results."""
+    repeat = 3 if quick else 10
+    budget = load_budget()
+    profile = import_profile()
+
+    import_samples = []
+    response_samples = []
+    for _ in range(repeat):
+        import_seconds, total_seconds = first_response()
+        import_samples.append(import_seconds)
+        response_samples.append(total_seconds)
+
+    imported = summarize(
+        "startup.import_app_main",
+        import_samples,
+        budget=budget["import_seconds"],
+        top_packages_self=_top_packages(profile, top),
+        top_modules_cumulative=_top_modules(profile, top),
+    )
+    responded = summarize(
+        "startup.first_response",
+        response_samples,
+        budget=budget["first_response_seconds"],
+    )
+    for record in (imported, responded):
+        record["within_budget"] = record["median"] <= record["budget"]
+    return [imported, responded]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--quick", action="store_true")
+    parser.add_argument("--top", type=int, default=15)
+    parser.add_argument(
+        "--check", action="store_true", help="exit non-zero when over budget"
+    )
+    args = parser.parse_args()
+    results = run(quick=args.quick, top=args.top)
+    emit(results)
+    if args.check and not all(record["within_budget"] for record in results):
+        sys.exit(1)
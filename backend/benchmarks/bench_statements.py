@@ -0,0 +1,87 @@
+"""
+Per-query Python overhead of the user service lookups.
+
+    python -m benchmarks.bench_statements
+
+Compares building ``select(User)`` on every call (how the service used to
+work) with the prebuilt bound-parameter statements in
+``app.services.user``, executing each against the benchmark database, and
+reports the compiled-statement cache results the engine recorded.
+"""
+import argparse
+import asyncio
+from typing import Any, Dict, List
+
+from benchmarks.common import (
+    configure_environment,
+    emit,
+    measure_async,
+    reset_schema,
+    seed_users,
+    summarize,
+)
+
+configure_environment()
+
+from sqlalchemy import select  # noqa: E402
+
+from app.db.session import AsyncSessionLocal, statement_cache_events  # noqa: E402
+from app.models.user import User  # noqa: E402
+from app.services.user import get_user, get_user_by_email, get_users  # noqa: E402
+
+SEED_ROWS = 1000
+
+
+async def rebuilt_get_user(db, id: int):
+    result = await db.execute(select(User).where(User.id == id))
+    return result.scalar_one_or_none()
+
+
+async def rebuilt_get_user_by_email(db, email: str):
+    result = await db.execute(select(User).where(User.email == email))
+    return result.scalar_one_or_none()
+
+
+async def rebuilt_get_users(db, skip: int = 0, limit: int = 100):
+    result = await db.execute(select(User).offset(skip).limit(limit))
+    return result.scalars().all()
+
+
+async def _run(repeat: int, number: int) -> List[Dict[str, Any]]:
+    await reset_schema()
+    await seed_users(SEED_ROWS)
+
+    email = f"user{SEED_ROWS // 2}@example.com"
+    cases = [
+        ("get_user", rebuilt_get_user, get_user, {"id": SEED_ROWS // 2}),
+        ("get_user_by_email", rebuilt_get_user_by_email, get_user_by_email, {"email": email}),
+        ("get_users", rebuilt_get_users, get_users, {"skip": 0, "limit": 10}),
+    ]
+    results = []
+    async with AsyncSessionLocal() as db:
+        for name, rebuilt, prebuilt, kwargs in cases:
+            for variant, func in (("rebuilt", rebuilt), ("prebuilt", prebuilt)):
+                await func(db, **kwargs)  # warm the compiled cache
+                samples = await measure_async(
+                    lambda: func(db, **kwargs), repeat=repeat, number=number
+                )
+                results.append(summarize(f"statements.{name}.{variant}", samples))
+
+    hits = statement_cache_events[("primary", "hit")]
+    misses = statement_cache_events[("primary", "miss")]
+    for record in results:
+        record["engine_cache_hits"] = hits
+        record["engine_cache_misses"] = misses
+    return results
+
+
+def run(quick: bool = False) -> List[Dict[str, Any]]:
+    """Run the benchmark and return its results."""
+    return asyncio.run(_run(repeat=5 if quick else 20, number=50 if quick else 200))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--quick", action="store_true")
+    args = parser.parse_args()
+    emit(run(quick=args.quick))
@@ -0,0 +1,124 @@
+"""
+Shared helpers for the backend benchmarks.
+
+Benchmarks run against a throwaway SQLite database by default so they need
+no external services; set ``BENCH_DATABASE_URL`` to point them at Postgres.
+Every benchmark module exposes ``run(quick=False)`` returning a list of
+result dicts (see ``summarize``) and can also be run on its own with
+``python -m benchmarks.<module>``.
+"""
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Dict, List
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+
+
+def configure_environment() -> None:
+    """Provide the settings the app needs before any ``app`` module is imported."""
+    if str(BACKEND_DIR) not in sys.path:
+        sys.path.insert(0, str(BACKEND_DIR))
+    database_url = os.environ.get("BENCH_DATABASE_URL")
+    if not database_url:
+        db_path = Path(tempfile.gettempdir()) / "reckon-bench.sqlite3"
+        database_url = f"sqlite+aiosqlite:///{db_path}"
+    os.environ["DATABASE_URL"] = database_url
+    os.environ.setdefault("SECRET_KEY", "benchmark-secret-key")
+    os.environ.setdefault("GCP_PROJECT_ID", "benchmark")
+    os.environ.setdefault("ENVIRONMENT", "development")
+    # Requests built by the benchmarks carry Host: localhost
+    os.environ.setdefault("ALLOWED_HOSTS", '["localhost", "127.0.0.1"]')
+    os.environ.setdefault("LOG_LEVEL", "WARNING")
+
+
+def summarize(name: str, samples: List[float], **extra: Any) -> Dict[str, Any]:
+    """Build a result record from per-operation timings in seconds."""
+    ordered = sorted(samples)
+    p95_index = min(len(ordered) - 1, int(round(0.95 * (len(ordered) - 1))))
+    record = {
+        "name": name,
+        "unit": "seconds",
+        "samples": len(ordered),
+        "mean": statistics.fmean(ordered),
+        "median": statistics.median(ordered),
+        "p95": ordered[p95_index],
+        "min": ordered[0],
+        "max": ordered[-1],
+    }
+    record.update(extra)
+    return record
+
+
+def measure(func: Callable[[], Any], *, repeat: int, number: int = 1) -> List[float]:
+    """Time ``func``; returns ``repeat`` samples of the mean per-call time."""
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in range(number):
+            func()
+        samples.append((time.perf_counter() - start) / number)
+    return samples
+
+
+async def measure_async(
+    func: Callable[[], Awaitable[Any]], *, repeat: int, number: int = 1
+) -> List[float]:
+    """Async counterpart of ``measure``."""
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in range(number):
+            await func()
+        samples.append((time.perf_counter() - start) / number)
+    return samples
+
+
+async def reset_schema() -> None:
+    """Drop and recreate every table on the benchmark database."""
+    from app.db.session import Base, engine
+    import app.models.audit  # noqa: F401 (registers the tables)
+    import app.models.stats  # noqa: F401
+    import app.models.user  # noqa: F401
+
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.drop_all)
+        await conn.run_sync(Base.metadata.create_all)
+
+
+async def seed_users(rows: int, batch_size: int = 10000) -> None:
+    """Insert ``rows`` synthetic users with multi-row inserts."""
+    from datetime import datetime, timedelta, timezone
+
+    from sqlalchemy import insert
+
+    from app.db.session import engine
+    from app.models.user import User
+
+    base_time = datetime(2024, 1, 1, tzinfo=timezone.utc)
+    async with engine.begin() as conn:
+        for offset in range(0, rows, batch_size):
+            await conn.execute(
+                insert(User),
+                [
+                    {
+                        "email": f"user{i}@example.com",
+                        "hashed_password": "x",
+                        "full_name": f"User {i}",
+                        "is_active": True,
+                        "is_superuser": False,
+                        "created_at": base_time + timedelta(seconds=i),
+                    }
+                    for i in range(offset, min(offset + batch_size, rows))
+                ],
+            )
+
+
+def emit(results: List[Dict[str, Any]]) -> None:
+    """Write results to stdout as JSON."""
+    json.dump(results, sys.stdout, indent=2)
+    sys.stdout.write("\n")
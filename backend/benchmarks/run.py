@@ -0,0 +1,122 @@
+"""
+Run the benchmark suite and compare it against a stored baseline.
+
+    python -m benchmarks.run [--quick] [--only primitives,serialization]
+                             [--output results.json] [--baseline baseline.json]
+                             [--threshold 0.2] [--save-baseline]
+
+Results are written as JSON (stdout by default).  When a baseline file
+exists, every result whose median is more than ``--threshold`` slower than
+the baseline's is reported and the exit status is 1.  ``--save-baseline``
+records the current results as the new baseline instead of comparing.
+
+Baselines are only meaningful on the machine they were recorded on, so
+record one before a change and compare after it on the same host.
+"""
+import argparse
+import importlib
+import json
+import sys
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from benchmarks.common import emit
+
+SUITES = (
+    "primitives",
+    "serialization",
+    "statements",
+    "pagination",
+    "middleware",
+    "startup",
+)
+DEFAULT_BASELINE = Path(__file__).resolve().parent / "baseline.json"
+
+# Parameters that distinguish results sharing a name
+KEY_FIELDS = ("rows", "depth", "items", "limit")
+
+
+def result_key(record: Dict[str, Any]) -> str:
+    params = ",".join(
+        f"{field}={record[field]}" for field in KEY_FIELDS if field in record
+    )
+    return f"{record['name']}[{params}]" if params else record["name"]
+
+
+def run_suites(names: List[str], quick: bool) -> List[Dict[str, Any]]:
+    results = []
+    for name in names:
+        module = importlib.import_module(f"benchmarks.bench_{name}")
+        print(f"running {name}", file=sys.stderr)
+        results.extend(module.run(quick=quick))
+    return results
+
+
+def compare(
+    results: List[Dict[str, Any]], baseline: List[Dict[str, Any]], threshold: float
+) -> List[Dict[str, Any]]:
+    """Return the results whose median regressed beyond ``threshold``."""
+    previous = {result_key(record): record for record in baseline}
+    regressions = []
+    for record in results:
+        before = previous.get(result_key(record))
+        if before is None or not before["median"]:
+            continue
+        change = record["median"] / before["median"] - 1.0
+        record["baseline_median"] = before["median"]
+        record["change"] = round(change, 4)
+        if change > threshold:
+            regressions.append(record)
+    return regressions
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--quick", action="store_true")
+    parser.add_argument(
+        "--only", default=",".join(SUITES), help="comma-separated suites to run"
+    )
+    parser.add_argument("--output", type=Path, default=None)
+    parser.add_argument("--baseline", type=Path, default=DEFAULT_BASELINE)
+    parser.add_argument("--threshold", type=float, default=0.2)
+    parser.add_argument("--save-baseline", action="store_true")
+    args = parser.parse_args(argv)
+
+    names = [name.strip() for name in args.only.split(",") if name.strip()]
+    unknown = sorted(set(names) - set(SUITES))
+    if unknown:
+        parser.error(f"unknown suites: {', '.join(unknown)}")
+
+    results = run_suites(names, args.quick)
+
+    if args.save_baseline:
+        with open(args.baseline, "w") as f:
+            json.dump(results, f, indent=2)
+            f.write("\n")
+        regressions = []
+    elif args.baseline.exists():
+        with open(args.baseline) as f:
+            regressions = compare(results, json.load(f), args.threshold)
+    else:
+        print(f"no baseline at {args.baseline}; skipping comparison", file=sys.stderr)
+        regressions = []
+
+    if args.output is None:
+        emit(results)
+    else:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+            f.write("\n")
+
+    for record in regressions:
+        print(
+            f"REGRESSION {result_key(record)}: median {record['median']:.6g}s "
+            f"vs baseline {record['baseline_median']:.6g}s "
+            f"(+{record['change']:.0%})",
+            file=sys.stderr,
+        )
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,44 @@
+"""
+Test configuration.
+
+Settings are read when ``app`` is first imported, so the environment is set
+up here, before any test module imports it.  Database tests run against a
+throwaway SQLite file whose tables are created and dropped around each test.
+"""
+import os
+import tempfile
+from pathlib import Path
+
+_DB_PATH = Path(tempfile.mkdtemp(prefix="reckon-tests-")) / "test.sqlite3"
+os.environ["DATABASE_URL"] = f"sqlite+aiosqlite:///{_DB_PATH}"
+os.environ["ENVIRONMENT"] = "development"
+os.environ["ALLOWED_HOSTS"] = '["testserver", "localhost"]'
+os.environ["BCRYPT_ROUNDS"] = "4"
+os.environ["LOGIN_AUDIT_ENABLED"] = "false"
+os.environ.setdefault("SECRET_KEY", "test-secret-key")
+os.environ.setdefault("GCP_PROJECT_ID", "test")
+os.environ.pop("REDIS_URL", None)
+
+import pytest  # noqa: E402
+
+import app.models.audit  # noqa: E402,F401
+import app.models.stats  # noqa: E402,F401
+import app.models.user  # noqa: E402,F401
+from app.core.principal_cache import principal_cache  # noqa: E402
+from app.db.session import AsyncSessionLocal, Base, engine  # noqa: E402
+from app.services import admin  # noqa: E402
+
+
+@pytest.fixture
+async def db(monkeypatch):
+    """A session on a freshly created schema."""
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    principal_cache.clear()
+    monkeypatch.setattr(admin, "_snapshot", None)
+    async with AsyncSessionLocal() as session:
+        yield session
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.drop_all)
+    # Pooled connections belong to this test's event loop
+    await engine.dispose()
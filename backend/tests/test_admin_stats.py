@@ -0,0 +1,64 @@
+from app.db.session import AsyncSessionLocal
+from app.schemas.user import UserCreate, UserUpdate
+from app.services import admin
+from app.services.admin import get_user_stats, rebuild_user_stats
+from app.services.user import create_user, delete_user, update_user
+
+
+async def read_stats(monkeypatch):
+    # A fresh session and no process snapshot, so the counters are re-read
+    monkeypatch.setattr(admin, "_snapshot", None)
+    async with AsyncSessionLocal() as session:
+        return await get_user_stats(session)
+
+
+def counters(stats):
+    return (
+        stats["total_users"],
+        stats["active_users"],
+        stats["inactive_users"],
+        stats["superusers"],
+    )
+
+
+async def test_writes_adjust_counters(db, monkeypatch):
+    # The first read initialises the counters from the (empty) table
+    assert counters(await read_stats(monkeypatch)) == (0, 0, 0, 0)
+
+    alice = await create_user(db, UserCreate(email="alice@example.com", password="pw-alice"))
+    bob = await create_user(
+        db, UserCreate(email="bob@example.com", password="pw-bob", is_superuser=True)
+    )
+    stats = await read_stats(monkeypatch)
+    assert counters(stats) == (2, 2, 0, 1)
+    assert sum(day["count"] for day in stats["signups_by_day"]) == 2
+
+    await update_user(db, db_obj=alice, obj_in=UserUpdate(is_active=False))
+    assert counters(await read_stats(monkeypatch)) == (2, 1, 1, 1)
+
+    await update_user(db, db_obj=bob, obj_in={"is_superuser": False})
+    assert counters(await read_stats(monkeypatch)) == (2, 1, 1, 0)
+
+    await delete_user(db, id=alice.id, db_obj=alice)
+    assert counters(await read_stats(monkeypatch)) == (1, 1, 0, 0)
+
+
+async def test_rebuild_matches_incremental_counters(db, monkeypatch):
+    await read_stats(monkeypatch)
+    for i in range(3):
+        await create_user(
+            db, UserCreate(email=f"user{i}@example.com", password="pw", is_superuser=i == 0)
+        )
+    incremental = await read_stats(monkeypatch)
+
+    await rebuild_user_stats(db)
+    rebuilt = await read_stats(monkeypatch)
+
+    assert counters(rebuilt) == counters(incremental) == (3, 3, 0, 1)
+    assert rebuilt["signups_by_day"] == incremental["signups_by_day"]
+
+
+async def test_rebuild_is_idempotent_when_the_row_exists(db, monkeypatch):
+    await rebuild_user_stats(db)
+    await rebuild_user_stats(db)
+    assert counters(await read_stats(monkeypatch)) == (0, 0, 0, 0)
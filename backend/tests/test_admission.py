@@ -0,0 +1,161 @@
+import asyncio
+
+import pytest
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.orm import Session
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+
+from app.core.admission import AdmissionRejected, ConcurrencyLimiter, PoolWaitEstimator
+
+
+async def test_slots_are_granted_up_to_the_limit():
+    limiter = ConcurrencyLimiter(limit=2, queue_size=0, timeout=1.0)
+    await limiter.acquire()
+    await limiter.acquire()
+    assert limiter.in_flight == 2
+
+    with pytest.raises(AdmissionRejected) as exc_info:
+        await limiter.acquire()
+    assert exc_info.value.reason == "queue_full"
+
+
+async def test_released_slot_goes_to_the_oldest_waiter():
+    limiter = ConcurrencyLimiter(limit=1, queue_size=2, timeout=1.0)
+    await limiter.acquire()
+    order = []
+
+    async def wait(name):
+        await limiter.acquire()
+        order.append(name)
+
+    first = asyncio.create_task(wait("first"))
+    second = asyncio.create_task(wait("second"))
+    await asyncio.sleep(0)
+    assert limiter.queued == 2
+
+    limiter.release()
+    await first
+    assert order == ["first"]
+    assert limiter.in_flight == 1
+    limiter.release()
+    await second
+    assert order == ["first", "second"]
+    limiter.release()
+    assert limiter.in_flight == 0
+
+
+async def test_waiter_times_out():
+    limiter = ConcurrencyLimiter(limit=1, queue_size=1, timeout=0.01)
+    await limiter.acquire()
+    with pytest.raises(AdmissionRejected) as exc_info:
+        await limiter.acquire()
+    assert exc_info.value.reason == "timeout"
+    assert limiter.queued == 0
+    assert limiter.in_flight == 1
+
+
+async def test_cancelled_waiter_leaves_the_queue():
+    limiter = ConcurrencyLimiter(limit=1, queue_size=1, timeout=1.0)
+    await limiter.acquire()
+    waiter = asyncio.create_task(limiter.acquire())
+    await asyncio.sleep(0)
+    waiter.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await waiter
+    assert limiter.queued == 0
+
+    limiter.release()
+    assert limiter.in_flight == 0
+
+
+async def test_slot_granted_to_a_cancelled_waiter_is_passed_on():
+    limiter = ConcurrencyLimiter(limit=1, queue_size=2, timeout=1.0)
+    await limiter.acquire()
+    cancelled = asyncio.create_task(limiter.acquire())
+    next_in_line = asyncio.create_task(limiter.acquire())
+    await asyncio.sleep(0)
+
+    # Grant the slot, then cancel before the waiter resumes
+    limiter.release()
+    cancelled.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await cancelled
+    await next_in_line
+    assert limiter.in_flight == 1
+    assert limiter.queued == 0
+
+
+def test_estimate_is_zero_until_the_pool_is_exhausted():
+    estimator = PoolWaitEstimator(capacity=2)
+    estimator.mean_hold = 0.5
+    estimator.checked_out = 1
+    estimator.waiting = 5
+    assert estimator.estimate() == 0.0
+
+    estimator.checked_out = 2
+    # Six checkouts ahead (five queued plus this one), one freed every 0.25s
+    assert estimator.estimate() == pytest.approx(1.5)
+
+
+def _estimated_engine(tmp_path):
+    engine = create_async_engine(
+        f"sqlite+aiosqlite:///{tmp_path / 'pool.sqlite3'}",
+        poolclass=AsyncAdaptedQueuePool,
+        pool_size=1,
+        max_overflow=0,
+        pool_timeout=5,
+    )
+
+    class EstimatedSession(Session):
+        pass
+
+    estimator = PoolWaitEstimator(capacity=1)
+    estimator.attach(engine, EstimatedSession)
+    return engine, estimator, async_sessionmaker(engine, sync_session_class=EstimatedSession)
+
+
+async def test_estimate_counts_sessions_waiting_for_the_pool(tmp_path):
+    engine, estimator, session_factory = _estimated_engine(tmp_path)
+
+    async def query():
+        async with session_factory() as session:
+            await session.execute(select(1))
+            # Holding the connection: no longer waiting
+            assert "admission_waiting" not in session.info
+
+    try:
+        async with engine.connect():
+            assert estimator.checked_out == 1
+
+            queued = [asyncio.create_task(query()) for _ in range(2)]
+            await asyncio.sleep(0.05)
+            assert estimator.waiting == 2
+            estimator.mean_hold = 0.4
+            assert estimator.estimate() == pytest.approx(1.2)
+
+        await asyncio.gather(*queued)
+        assert estimator.waiting == 0
+        assert estimator.checked_out == 0
+        assert estimator.estimate() == 0.0
+    finally:
+        await engine.dispose()
+
+
+async def test_estimate_survives_pool_recreation(tmp_path):
+    engine, estimator, session_factory = _estimated_engine(tmp_path)
+    try:
+        async with session_factory() as session:
+            await session.execute(select(1))
+        await engine.dispose()
+
+        async with engine.connect():
+            assert estimator.checked_out == 1
+            waiting = asyncio.create_task(engine.connect().start())
+            await asyncio.sleep(0.05)
+            assert estimator.estimate() > 0.0
+        connection = await waiting
+        await connection.close()
+        assert estimator.checked_out == 0
+    finally:
+        await engine.dispose()
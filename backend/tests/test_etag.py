@@ -0,0 +1,70 @@
+import pytest
+from httpx import AsyncClient
+
+from app.core.config import settings
+from app.core.etag import etag_matches
+from app.core.security import create_user_access_token
+from app.main import app
+from app.models.user import User
+from app.schemas.user import UserCreate
+from app.services.user import create_user
+
+ME = f"{settings.API_V1_STR}/users/me"
+
+
+@pytest.mark.parametrize(
+    "header, weak, expected",
+    [
+        (None, False, False),
+        ('"1-a"', False, True),
+        ('"0-0", "1-a"', False, True),
+        ("*", False, True),
+        ('W/"1-a"', False, False),
+        ('W/"1-a"', True, True),
+        ('"1-b"', True, False),
+    ],
+)
+def test_etag_matches(header, weak, expected):
+    assert etag_matches(header, '"1-a"', weak=weak) is expected
+
+
+@pytest.fixture
+async def user(db):
+    return await create_user(db, UserCreate(email="etag@example.com", password="pw"))
+
+
+@pytest.fixture
+async def client(user):
+    headers = {"Authorization": f"Bearer {create_user_access_token(user)}"}
+    async with AsyncClient(app=app, base_url="http://testserver", headers=headers) as client:
+        yield client
+
+
+async def test_if_none_match_returns_304(client):
+    response = await client.get(ME)
+    assert response.status_code == 200
+    etag = response.headers["ETag"]
+
+    response = await client.get(ME, headers={"If-None-Match": etag})
+    assert response.status_code == 304
+    assert response.headers["ETag"] == etag
+
+
+async def test_stale_if_match_is_rejected_with_412(client, db, user):
+    user_id = user.id
+    response = await client.put(
+        ME, json={"full_name": "Changed"}, headers={"If-Match": '"0-0"'}
+    )
+    assert response.status_code == 412
+
+    db.expire_all()
+    stored = await db.get(User, user_id)
+    assert stored.full_name is None
+
+
+async def test_current_if_match_is_applied(client):
+    etag = (await client.get(ME)).headers["ETag"]
+    response = await client.put(ME, json={"full_name": "Changed"}, headers={"If-Match": etag})
+    assert response.status_code == 200
+    assert response.json()["full_name"] == "Changed"
+    assert "ETag" in response.headers
@@ -0,0 +1,31 @@
+import gzip
+import json
+from datetime import datetime, timezone
+
+from app.core.serialization import FastJSONResponse
+from app.schemas.user import UserCreate
+from app.services.export import EXPORT_COLUMNS, _encode_ndjson, stream_users_export
+from app.services.user import create_user
+
+
+def test_ndjson_datetimes_match_the_api():
+    created = datetime(2024, 5, 1, 12, 30, tzinfo=timezone.utc)
+    row = tuple(created if column == "created_at" else None for column in EXPORT_COLUMNS)
+
+    line = _encode_ndjson([row], header=True)
+    assert line.endswith(b"\n")
+    assert json.loads(line)["created_at"] == "2024-05-01T12:30:00Z"
+    assert line.rstrip(b"\n") == FastJSONResponse(dict(zip(EXPORT_COLUMNS, row))).body
+
+
+async def test_export_streams_every_user(db):
+    for n in range(3):
+        await create_user(db, UserCreate(email=f"export{n}@example.com", password="pw"))
+
+    chunks = [chunk async for chunk in stream_users_export("ndjson", compress=True)]
+    lines = gzip.decompress(b"".join(chunks)).splitlines()
+    assert [json.loads(line)["email"] for line in lines] == [
+        "export0@example.com",
+        "export1@example.com",
+        "export2@example.com",
+    ]
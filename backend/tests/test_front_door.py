@@ -0,0 +1,105 @@
+import pytest
+from httpx import ASGITransport, AsyncClient
+from starlette.responses import PlainTextResponse
+
+from app.core.front_door import FrontDoorMiddleware
+
+
+async def _app(scope, receive, send):
+    await PlainTextResponse("app")(scope, receive, send)
+
+
+async def _bypass(scope, receive, send):
+    await PlainTextResponse("bypass")(scope, receive, send)
+
+
+def _client(**kwargs):
+    options = {
+        "allowed_hosts": ["api.example.com", "*.example.org"],
+        "allowed_origins": ["https://app.example.com", "https://*.example.net"],
+        "max_age": 600,
+    }
+    options.update(kwargs)
+    middleware = FrontDoorMiddleware(_app, bypass_app=_bypass, **options)
+    return AsyncClient(transport=ASGITransport(app=middleware), base_url="http://api.example.com")
+
+
+@pytest.mark.parametrize(
+    "host, status",
+    [
+        ("api.example.com", 200),
+        ("API.example.com:8443", 200),
+        ("eu.api.example.org", 200),
+        ("example.org", 400),
+        ("evil.com", 400),
+        ("api.example.com.evil.com", 400),
+    ],
+)
+async def test_host_header_is_checked(host, status):
+    async with _client() as client:
+        response = await client.get("/users", headers={"Host": host})
+    assert response.status_code == status
+    if status == 400:
+        assert response.text == "Invalid host header"
+
+
+async def test_health_checks_bypass_the_host_check():
+    async with _client() as client:
+        response = await client.get("/health/ready", headers={"Host": "10.0.0.5"})
+        assert response.text == "bypass"
+        response = await client.get("/healthz", headers={"Host": "api.example.com"})
+        assert response.text == "app"
+
+
+async def test_allowed_origin_gets_cors_headers():
+    async with _client() as client:
+        response = await client.get(
+            "/users", headers={"Origin": "https://eu.example.net"}
+        )
+    assert response.text == "app"
+    assert response.headers["access-control-allow-origin"] == "https://eu.example.net"
+    assert response.headers["access-control-allow-credentials"] == "true"
+    assert response.headers["vary"] == "Origin"
+
+
+async def test_disallowed_origin_gets_no_cors_headers():
+    async with _client() as client:
+        response = await client.get("/users", headers={"Origin": "https://evil.com"})
+    assert response.text == "app"
+    assert "access-control-allow-origin" not in response.headers
+
+
+async def test_preflight_is_answered_directly():
+    async with _client() as client:
+        response = await client.options(
+            "/users",
+            headers={
+                "Origin": "https://app.example.com",
+                "Access-Control-Request-Method": "PUT",
+                "Access-Control-Request-Headers": "authorization, if-match",
+            },
+        )
+        assert response.status_code == 200
+        assert response.headers["access-control-allow-origin"] == "https://app.example.com"
+        assert "PUT" in response.headers["access-control-allow-methods"]
+        assert response.headers["access-control-allow-headers"] == "authorization, if-match"
+        assert response.headers["access-control-max-age"] == "600"
+
+        response = await client.options(
+            "/users",
+            headers={"Origin": "https://evil.com", "Access-Control-Request-Method": "PUT"},
+        )
+        assert response.status_code == 400
+        assert response.text == "Disallowed CORS origin"
+
+
+def test_any_origin_is_refused_with_credentials():
+    with pytest.raises(ValueError):
+        FrontDoorMiddleware(_app, allowed_hosts=["*"], allowed_origins=["*"])
+
+
+async def test_any_origin_is_allowed_without_credentials():
+    async with _client(allowed_origins=["*"], allow_credentials=False) as client:
+        response = await client.get("/users", headers={"Origin": "https://any.example"})
+    assert response.headers["access-control-allow-origin"] == "https://any.example"
+    assert "access-control-allow-credentials" not in response.headers
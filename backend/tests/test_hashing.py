@@ -0,0 +1,55 @@
+import asyncio
+import threading
+
+import pytest
+from httpx import AsyncClient
+
+from app.core.config import settings
+from app.core.hashing import HashingPoolSaturated, PasswordHasher, password_hasher
+from app.main import app
+from app.schemas.user import UserCreate
+from app.services.user import create_user
+
+
+async def test_calls_over_max_pending_are_rejected():
+    hasher = PasswordHasher(max_workers=1, max_pending=1)
+    gate = threading.Event()
+    try:
+        running = asyncio.create_task(hasher._run(gate.wait))
+        await asyncio.sleep(0.01)
+        assert hasher.pending == 1
+
+        with pytest.raises(HashingPoolSaturated):
+            await hasher._run(gate.wait)
+        assert hasher.rejected == 1
+
+        gate.set()
+        assert await running is True
+        await asyncio.sleep(0.01)
+        assert hasher.pending == 0
+        assert hasher.completed == 1
+    finally:
+        gate.set()
+        hasher.shutdown()
+
+
+async def test_hash_many_stops_once_the_pool_is_saturated():
+    hasher = PasswordHasher(max_workers=2, max_pending=0)
+    results = await hasher.hash_many(["a", "b", "c"])
+    assert len(results) == 3
+    assert all(isinstance(result, HashingPoolSaturated) for result in results)
+    # Only the first batch (one password per half of the workers) was tried
+    assert hasher.rejected == 1
+
+
+async def test_login_answers_503_when_the_pool_is_saturated(db, monkeypatch):
+    await create_user(db, UserCreate(email="busy@example.com", password="pw"))
+    monkeypatch.setattr(password_hasher, "max_pending", 0)
+
+    async with AsyncClient(app=app, base_url="http://testserver") as client:
+        response = await client.post(
+            f"{settings.API_V1_STR}/auth/login",
+            data={"username": "busy@example.com", "password": "pw"},
+        )
+    assert response.status_code == 503
+    assert response.headers["retry-after"] == "1"
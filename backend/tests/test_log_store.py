@@ -0,0 +1,85 @@
+from datetime import datetime, timezone
+
+import pytest
+
+from app.core.log_store import LogRingBuffer
+
+
+def record(store, count, **fields):
+    for i in range(count):
+        event = {"event": f"event {i}", "level": "info", "logger": "app", **fields}
+        store(None, event["level"], event)
+
+
+def all_pages(store, limit, **filters):
+    pages, before = [], None
+    while True:
+        items, before = store.query(before=before, limit=limit, **filters)
+        pages.append([item["seq"] for item in items])
+        if before is None:
+            return pages
+
+
+def test_pages_are_newest_first_and_cover_every_event():
+    store = LogRingBuffer(size=100, index_size=10, max_index_keys=4)
+    record(store, 25)
+
+    pages = all_pages(store, limit=10)
+
+    assert [len(page) for page in pages] == [10, 10, 5]
+    seqs = [seq for page in pages for seq in page]
+    assert seqs == list(range(25, 0, -1))
+
+
+def test_main_ring_keeps_only_the_newest_events():
+    store = LogRingBuffer(size=10, index_size=5, max_index_keys=4)
+    record(store, 25)
+    seqs = [seq for page in all_pages(store, limit=4) for seq in page]
+    assert seqs == list(range(25, 15, -1))
+    assert store.stats()["oldest_seq"] == 16
+
+
+def test_route_filter_pages_past_the_end_of_its_index_ring():
+    store = LogRingBuffer(size=100, index_size=5, max_index_keys=4)
+    for i in range(12):
+        record(store, 1, route="/api/v1/users/{user_id}")
+        record(store, 1, route="/api/v1/users/me")
+
+    pages = all_pages(store, limit=5, route="/api/v1/users/{user_id}")
+
+    seqs = [seq for page in pages for seq in page]
+    # Every other event, although the route's own ring holds only five
+    assert seqs == list(range(23, 0, -2))
+    assert [len(page) for page in pages] == [5, 5, 2]
+
+
+def test_level_and_logger_filters():
+    store = LogRingBuffer(size=100, index_size=50, max_index_keys=4)
+    record(store, 3, level="debug")
+    record(store, 2, level="warning", logger="security")
+    record(store, 1, level="error")
+
+    items, before = store.query(min_level="warning")
+    assert [item["level"] for item in items] == ["error", "warning", "warning"]
+    assert before is None
+
+    items, _ = store.query(logger="security", limit=1)
+    assert [item["seq"] for item in items] == [5]
+
+
+def test_time_bounds():
+    store = LogRingBuffer(size=100, index_size=50, max_index_keys=4)
+    record(store, 3)
+    items, _ = store.query(since=datetime.now(timezone.utc).replace(year=2000))
+    assert len(items) == 3
+    items, _ = store.query(until=datetime(2000, 1, 1, tzinfo=timezone.utc))
+    assert items == []
+
+
+@pytest.mark.parametrize("limit", [1, 3, 7])
+def test_cursor_is_none_exactly_on_the_last_page(limit):
+    store = LogRingBuffer(size=100, index_size=50, max_index_keys=4)
+    record(store, 7)
+    pages = all_pages(store, limit=limit)
+    assert all(pages)
+    assert sum(len(page) for page in pages) == 7
@@ -0,0 +1,65 @@
+import asyncio
+
+from sqlalchemy import func, select
+
+from app.models.audit import LoginEvent
+from app.schemas.user import UserCreate
+from app.services.login_audit import LoginAuditBuffer
+from app.services.user import create_user
+
+
+async def _event_count(db):
+    return await db.scalar(select(func.count(LoginEvent.id)))
+
+
+async def test_full_batch_is_flushed_without_waiting_for_the_interval(db):
+    audit = LoginAuditBuffer(max_pending=10, batch_size=2, flush_interval=60.0)
+    audit.start()
+    try:
+        audit.record("a@example.com", None, False, "10.0.0.1")
+        await asyncio.sleep(0.05)
+        assert audit.written == 0
+
+        audit.record("a@example.com", None, False, "10.0.0.1")
+        for _ in range(50):
+            if audit.written:
+                break
+            await asyncio.sleep(0.01)
+        assert audit.written == 2
+        assert await _event_count(db) == 2
+    finally:
+        await audit.stop()
+
+
+async def test_events_over_max_pending_are_dropped(db):
+    audit = LoginAuditBuffer(max_pending=2, batch_size=10, flush_interval=60.0)
+    for _ in range(3):
+        audit.record("a@example.com", None, False)
+    assert audit.stats()["pending"] == 2
+    assert audit.dropped == 1
+
+    await audit.flush()
+    assert await _event_count(db) == 2
+
+
+async def test_stop_flushes_buffered_events_and_last_login(db):
+    user = await create_user(db, UserCreate(email="audit@example.com", password="pw"))
+    updated_at = user.updated_at
+    audit = LoginAuditBuffer(max_pending=10, batch_size=10, flush_interval=60.0)
+    audit.start()
+    audit.record(user.email, user.id, True, "10.0.0.1")
+    await audit.stop()
+
+    assert audit.stats() == {
+        "pending": 0,
+        "recorded": 1,
+        "written": 1,
+        "dropped": 0,
+        "failed": 0,
+    }
+    event = (await db.execute(select(LoginEvent))).scalar_one()
+    assert (event.user_id, event.email, event.success) == (user.id, user.email, True)
+    await db.refresh(user)
+    assert user.last_login_at is not None
+    # Recording a login does not change the user's ETag
+    assert user.updated_at == updated_at
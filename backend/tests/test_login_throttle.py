@@ -0,0 +1,151 @@
+from types import SimpleNamespace
+
+import fakeredis
+import fakeredis.aioredis
+import pytest
+
+from app.core import login_throttle
+from app.core.login_throttle import (
+    LocalFailureTracker,
+    LoginThrottle,
+    RedisFailureTracker,
+    ThrottlePolicy,
+)
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000.0]
+    # Only this module's clock; asyncio keeps the real one
+    monkeypatch.setattr(login_throttle, "time", SimpleNamespace(monotonic=lambda: now[0]))
+    return now
+
+
+@pytest.fixture
+def redis_client():
+    # A server of its own, so keys do not leak between tests
+    return fakeredis.aioredis.FakeRedis(server=fakeredis.FakeServer())
+
+
+def _throttle(shared=None, email=(3, 100), ip=(5, 100)):
+    local = LocalFailureTracker(window=60.0, backoff_base=1.0, backoff_max=8.0, max_keys=100)
+    policies = {"email": ThrottlePolicy(*email), "ip": ThrottlePolicy(*ip)}
+    return LoginThrottle(local, policies, shared)
+
+
+async def _fail(throttle, email, client_ip="10.0.0.1"):
+    attempt = await throttle.check(email, client_ip)
+    assert not attempt.retry_after
+    await throttle.record_failure(attempt)
+
+
+async def test_email_is_locked_out_after_max_failures(clock):
+    throttle = _throttle()
+    for _ in range(3):
+        await _fail(throttle, "a@example.com")
+
+    # Case and surrounding space do not give a fresh budget
+    attempt = await throttle.check(" A@example.com", "10.0.0.2")
+    assert attempt.retry_after == pytest.approx(60.0)
+    assert throttle.rejected == {"email": 1, "ip": 0}
+    assert not (await throttle.check("b@example.com", "10.0.0.1")).retry_after
+
+    clock[0] += 60.0
+    assert not (await throttle.check("a@example.com", "10.0.0.2")).retry_after
+
+
+async def test_ip_is_locked_out_across_emails(clock):
+    throttle = _throttle()
+    for n in range(5):
+        await _fail(throttle, f"user{n}@example.com")
+
+    attempt = await throttle.check("fresh@example.com", "10.0.0.1")
+    assert attempt.retry_after == pytest.approx(60.0)
+    assert throttle.rejected == {"email": 0, "ip": 1}
+    assert not (await throttle.check("fresh@example.com", "10.0.0.2")).retry_after
+
+
+async def test_concurrent_attempts_are_counted_before_they_fail(clock):
+    throttle = _throttle()
+    admitted = [await throttle.check("a@example.com", None) for _ in range(3)]
+    assert not any(attempt.retry_after for attempt in admitted)
+    # Three attempts in flight use up the budget before any has failed
+    assert (await throttle.check("a@example.com", None)).retry_after
+
+    # A success clears the email, in-flight attempts included
+    await throttle.record_success(admitted[0])
+    assert not (await throttle.check("a@example.com", None)).retry_after
+
+
+async def test_success_releases_only_its_own_ip_attempt(clock):
+    throttle = _throttle(email=(100, 100), ip=(2, 100))
+    first = await throttle.check("a@example.com", "10.0.0.1")
+    second = await throttle.check("b@example.com", "10.0.0.1")
+    await throttle.record_success(first)
+    await throttle.release(second)
+    for n in range(2):
+        assert not (await throttle.check(f"c{n}@example.com", "10.0.0.1")).retry_after
+    assert (await throttle.check("d@example.com", "10.0.0.1")).retry_after
+
+
+async def test_backoff_doubles_per_failure_up_to_the_cap(clock):
+    throttle = _throttle(email=(100, 2), ip=(100, 100))
+    await _fail(throttle, "a@example.com")
+    admitted = await throttle.check("a@example.com", None)
+    assert not admitted.retry_after
+    await throttle.release(admitted)
+
+    for expected in (1.0, 2.0, 4.0, 8.0, 8.0):
+        # Each lock is waited out before the next failure
+        clock[0] += 10.0
+        await _fail(throttle, "a@example.com")
+        assert (await throttle.check("a@example.com", None)).retry_after == pytest.approx(
+            expected
+        )
+
+
+async def test_shared_tracker_counts_attempts_across_instances(clock, redis_client):
+    client = redis_client
+
+    def shared():
+        return RedisFailureTracker(client, 60.0, 1.0, 8.0, prefix="login:")
+
+    first = _throttle(shared())
+    second = _throttle(shared())
+    # In flight on different instances: only Redis sees all three
+    attempts = [
+        await first.check("a@example.com", None),
+        await second.check("a@example.com", None),
+        await first.check("a@example.com", None),
+    ]
+    assert not any(attempt.retry_after for attempt in attempts)
+
+    rejected = await second.check("a@example.com", None)
+    assert rejected.retry_after > 0
+    assert second.rejected["email"] == 1
+    # The rejected attempt holds no local reservation either
+    assert second.local.retry_after("email:a@example.com", second.policies["email"]) == 0
+
+    await first.record_success(attempts[0])
+    assert not (await second.check("a@example.com", None)).retry_after
+
+
+async def test_shared_tracker_applies_backoff(redis_client):
+    client = redis_client
+    tracker = RedisFailureTracker(client, 60.0, 1.0, 8.0, prefix="login:")
+    keys = [("email:a@example.com", ThrottlePolicy(100, 2))]
+    lock = "login:email:a@example.com:lock"
+
+    assert await tracker.reserve(keys, "first") == (-1, 0.0)
+    await tracker.add_failure(*keys[0], "first")
+    assert await client.pttl(lock) < 0
+
+    # Failures recorded without a reservation are counted too
+    for attempt_id, lock_ms in (("second", 1000), ("third", 2000), ("fourth", 4000)):
+        await tracker.add_failure(*keys[0], attempt_id)
+        assert lock_ms - 100 < await client.pttl(lock) <= lock_ms
+
+    index, retry_after = await tracker.reserve(keys, "fifth")
+    assert index == 0
+    assert 3.9 < retry_after <= 4.0
+    assert await client.zcard("login:email:a@example.com:failures") == 4
@@ -0,0 +1,38 @@
+from httpx import ASGITransport, AsyncClient
+
+from app.core.config import settings
+from app.main import app
+
+
+def _client(host):
+    transport = ASGITransport(app=app, client=(host, 40000))
+    return AsyncClient(transport=transport, base_url="http://testserver")
+
+
+async def test_metrics_are_served_to_allowed_networks():
+    async with _client("127.0.0.1") as client:
+        response = await client.get("/metrics")
+    assert response.status_code == 200
+    assert "http_requests_total" in response.text
+
+
+async def test_metrics_are_hidden_from_other_clients(monkeypatch):
+    monkeypatch.setattr(settings, "METRICS_BEARER_TOKEN", "scrape-secret")
+    async with _client("203.0.113.7") as client:
+        assert (await client.get("/metrics")).status_code == 404
+        response = await client.get(
+            "/metrics", headers={"Authorization": "Bearer wrong"}
+        )
+        assert response.status_code == 404
+
+        response = await client.get(
+            "/metrics", headers={"Authorization": "Bearer scrape-secret"}
+        )
+        assert response.status_code == 200
+
+
+async def test_metrics_need_a_configured_token(monkeypatch):
+    monkeypatch.setattr(settings, "METRICS_BEARER_TOKEN", None)
+    async with _client("203.0.113.7") as client:
+        response = await client.get("/metrics", headers={"Authorization": "Bearer "})
+    assert response.status_code == 404
@@ -0,0 +1,65 @@
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from sqlalchemy import select
+
+from app.core.pagination import InvalidCursor, decode_cursor, encode_cursor
+from app.models.user import User
+from app.services.user import get_users_page
+
+
+def test_cursor_round_trips():
+    values = {"o": "created_at", "id": 42, "created_at": "2024-01-02T03:04:05+00:00"}
+    cursor = encode_cursor(values)
+    assert "=" not in cursor
+    assert decode_cursor(cursor) == values
+
+
+@pytest.mark.parametrize("cursor", ["not a cursor!", "bm90IGpzb24", encode_cursor([1])])
+def test_malformed_cursor_is_rejected(cursor):
+    with pytest.raises(InvalidCursor):
+        decode_cursor(cursor)
+
+
+async def _walk(db, order_by, rows=False):
+    seen, cursor = [], None
+    while True:
+        page, cursor = await get_users_page(
+            db, limit=2, cursor=cursor, order_by=order_by, rows=rows
+        )
+        assert len(page) <= 2
+        seen.extend(user.id for user in page)
+        if cursor is None:
+            return seen
+
+
+@pytest.mark.parametrize("order_by", ["id", "created_at"])
+@pytest.mark.parametrize("rows", [False, True])
+async def test_pages_cover_every_user_once(db, order_by, rows):
+    db.add_all(User(email=f"user{i}@example.com", hashed_password="x") for i in range(5))
+    await db.commit()
+    ids = list((await db.execute(select(User.id).order_by(User.id))).scalars())
+
+    assert await _walk(db, order_by, rows=rows) == ids
+
+
+async def test_cursor_from_another_ordering_is_rejected(db):
+    db.add_all(User(email=f"user{i}@example.com", hashed_password="x") for i in range(3))
+    await db.commit()
+    _, cursor = await get_users_page(db, limit=1, order_by="id")
+    with pytest.raises(InvalidCursor):
+        await get_users_page(db, limit=1, cursor=cursor, order_by="created_at")
+
+
+async def test_created_at_pages_keep_rows_with_equal_timestamps(db):
+    shared = datetime(2024, 5, 1, 12, 0, 0, 250000, tzinfo=timezone.utc)
+    db.add_all(
+        User(email=f"user{i}@example.com", hashed_password="x", created_at=shared)
+        for i in range(3)
+    )
+    later = shared + timedelta(seconds=1)
+    db.add(User(email="later@example.com", hashed_password="x", created_at=later))
+    await db.commit()
+    ids = list((await db.execute(select(User.id).order_by(User.created_at, User.id))).scalars())
+
+    assert await _walk(db, "created_at") == ids
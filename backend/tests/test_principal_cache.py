@@ -0,0 +1,103 @@
+from datetime import datetime, timezone
+from types import SimpleNamespace
+
+import pytest
+
+from app.core import cache
+from app.core.principal_cache import PrincipalCache
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000.0]
+    # Only this module's clock; asyncio keeps the real one
+    monkeypatch.setattr(cache, "time", SimpleNamespace(monotonic=lambda: now[0]))
+    return now
+
+
+def make_user(id, email=None, token_version=0):
+    now = datetime.now(timezone.utc)
+    return SimpleNamespace(
+        id=id,
+        email=email or f"user{id}@example.com",
+        full_name=None,
+        is_active=True,
+        is_superuser=False,
+        created_at=now,
+        updated_at=now,
+        token_version=token_version,
+    )
+
+
+def make_cache(maxsize=2, ttl=60.0):
+    return PrincipalCache(maxsize=maxsize, ttl=ttl, version_maxsize=10, version_ttl=ttl)
+
+
+def test_get_returns_snapshot_and_counts_hits(clock):
+    principals = make_cache()
+    principals.put(make_user(1, token_version=3))
+
+    principal = principals.get("user1@example.com")
+    assert principal.id == 1
+    assert principal.token_version == 3
+    assert principals.get("missing@example.com") is None
+    assert principals.get_token_version(1) == 3
+    stats = principals.stats()
+    assert (stats["hits"], stats["misses"]) == (1, 1)
+
+
+def test_least_recently_used_entry_is_evicted(clock):
+    principals = make_cache(maxsize=2)
+    principals.put(make_user(1))
+    principals.put(make_user(2))
+    principals.get("user1@example.com")
+    principals.put(make_user(3))
+
+    assert principals.get("user2@example.com") is None
+    assert principals.get("user1@example.com") is not None
+    assert principals.get("user3@example.com") is not None
+    assert principals.stats()["evictions"] == 1
+
+
+def test_entries_expire_after_ttl(clock):
+    principals = make_cache(ttl=5.0)
+    principals.put(make_user(1))
+    clock[0] += 4.9
+    assert principals.get("user1@example.com") is not None
+    clock[0] += 0.2
+    assert principals.get("user1@example.com") is None
+    assert principals.get_token_version(1) is None
+
+
+def test_invalidate_by_id_drops_principal_and_token_version(clock):
+    principals = make_cache()
+    principals.put(make_user(1, token_version=2))
+    principals.invalidate(user_id=1)
+    assert principals.get("user1@example.com") is None
+    assert principals.get_token_version(1) is None
+
+
+def test_invalidate_by_id_follows_email_changes(clock):
+    principals = make_cache()
+    principals.put(make_user(1, email="old@example.com"))
+    principals.put(make_user(1, email="new@example.com"))
+    principals.invalidate(email="old@example.com", user_id=1)
+    assert principals.get("new@example.com") is None
+
+
+def test_pruning_the_id_index_leaves_order_and_counters_alone(clock):
+    principals = make_cache(maxsize=3)
+    for user_id in range(1, 7):
+        principals.put(make_user(user_id))
+    # Live entries are users 4-6; use 5 so recency no longer follows ids
+    principals.get("user5@example.com")
+    before = principals.stats()
+    # Evicts user 4; the index then holds 7 ids for 3 entries and is pruned
+    principals.put(make_user(7))
+    after = principals.stats()
+    assert (after["hits"], after["misses"]) == (before["hits"], before["misses"])
+
+    # User 6 is still the least recently used entry, so it goes next
+    principals.put(make_user(8))
+    assert "user6@example.com" not in principals._by_email
+    assert "user5@example.com" in principals._by_email
@@ -0,0 +1,86 @@
+from types import SimpleNamespace
+
+import fakeredis.aioredis
+import pytest
+
+from app.core import rate_limit
+from app.core.rate_limit import LocalTokenBuckets, RateLimiter, RedisTokenBuckets
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000.0]
+    # Only this module's clock; asyncio keeps the real one
+    monkeypatch.setattr(rate_limit, "time", SimpleNamespace(monotonic=lambda: now[0]))
+    return now
+
+
+def test_local_bucket_refills_at_rate(clock):
+    buckets = LocalTokenBuckets(capacity=2, rate=1.0, max_keys=10)
+    assert buckets.consume("k", 1) == (True, 0.0)
+    assert buckets.consume("k", 1) == (True, 0.0)
+    allowed, retry_after = buckets.consume("k", 1)
+    assert not allowed
+    assert retry_after == pytest.approx(1.0)
+
+    clock[0] += 0.5
+    assert not buckets.consume("k", 1)[0]
+    clock[0] += 0.5
+    assert buckets.consume("k", 1)[0]
+
+    # Refill is capped at the capacity
+    clock[0] += 100
+    assert buckets.consume("k", 2)[0]
+    assert not buckets.consume("k", 1)[0]
+
+
+def test_local_buckets_evict_least_recently_used_key(clock):
+    buckets = LocalTokenBuckets(capacity=1, rate=0.001, max_keys=2)
+    assert buckets.consume("a", 1)[0]
+    assert buckets.consume("b", 1)[0]
+    assert buckets.consume("c", 1)[0]
+    # "a" was evicted, so it starts again from a full bucket
+    assert buckets.consume("a", 1)[0]
+
+
+def test_refund_is_capped_at_capacity(clock):
+    buckets = LocalTokenBuckets(capacity=2, rate=1.0, max_keys=10)
+    buckets.consume("k", 1)
+    buckets.refund("k", 5)
+    assert buckets.consume("k", 2)[0]
+    assert not buckets.consume("k", 1)[0]
+
+
+async def test_shared_limit_holds_across_limiters_and_refunds_locally(clock):
+    client = fakeredis.aioredis.FakeRedis()
+    first = RateLimiter(
+        2, 0.001, 10, shared=RedisTokenBuckets(client, 2, 0.001, prefix="rl:")
+    )
+    second = RateLimiter(
+        2, 0.001, 10, shared=RedisTokenBuckets(client, 2, 0.001, prefix="rl:")
+    )
+
+    assert (await first.hit("user:a"))[0]
+    assert (await first.hit("user:a"))[0]
+    allowed, retry_after = await second.hit("user:a")
+    assert not allowed
+    assert retry_after > 0
+    assert second.stats()["rejected_shared"] == 1
+
+    # The rejected request spent no local tokens
+    assert second.local.consume("user:a", 2)[0]
+    await first.close()
+
+
+class _BrokenBuckets:
+    async def consume(self, key, cost):
+        raise ConnectionError("redis down")
+
+
+async def test_shared_errors_fail_open_on_the_local_limit(clock):
+    limiter = RateLimiter(1, 0.001, 10, shared=_BrokenBuckets())
+    assert await limiter.hit("ip:1") == (True, 0.0)
+    assert not (await limiter.hit("ip:1"))[0]
+    stats = limiter.stats()
+    assert stats["shared_errors"] == 1
+    assert stats["rejected_local"] == 1
@@ -0,0 +1,59 @@
+import pytest
+from fastapi import HTTPException
+
+from app.core.principal_cache import TokenPrincipal, principal_cache
+from app.core.security import (
+    create_access_token,
+    create_user_access_token,
+    decode_access_token,
+    get_current_user,
+)
+from app.schemas.user import UserCreate
+from app.services.user import create_user, update_user
+
+
+@pytest.fixture
+async def user(db):
+    return await create_user(db, UserCreate(email="claims@example.com", password="pw"))
+
+
+async def test_token_carries_the_user_claims(db, user):
+    claims = decode_access_token(create_user_access_token(user))
+    assert claims["sub"] == "claims@example.com"
+    assert (claims["uid"], claims["act"], claims["su"], claims["ver"]) == (
+        user.id,
+        True,
+        False,
+        0,
+    )
+
+    principal = await get_current_user(db, create_user_access_token(user))
+    assert isinstance(principal, TokenPrincipal)
+    assert principal.id == user.id
+    assert principal.token_version == 0
+    # The version check is cached for later requests
+    assert principal_cache.get_token_version(user.id) == 0
+
+
+async def test_claim_changes_bump_the_version_and_revoke_tokens(db, user):
+    token = create_user_access_token(user)
+
+    user = await update_user(db, db_obj=user, obj_in={"full_name": "Not a claim"})
+    assert user.token_version == 0
+    assert (await get_current_user(db, token)).id == user.id
+
+    user = await update_user(db, db_obj=user, obj_in={"is_superuser": True})
+    assert user.token_version == 1
+    with pytest.raises(HTTPException) as exc_info:
+        await get_current_user(db, token)
+    assert exc_info.value.status_code == 401
+
+    principal = await get_current_user(db, create_user_access_token(user))
+    assert principal.is_superuser
+
+
+async def test_token_with_incomplete_claims_is_rejected(db, user):
+    token = create_access_token({"sub": user.email, "uid": user.id, "ver": 0})
+    with pytest.raises(HTTPException) as exc_info:
+        await get_current_user(db, token)
+    assert exc_info.value.status_code == 401
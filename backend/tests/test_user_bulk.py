@@ -0,0 +1,57 @@
+from sqlalchemy import select
+
+from app.core.hashing import HashingPoolSaturated, password_hasher
+from app.models.user import User
+from app.schemas.user import UserCreate
+from app.services.user import bulk_create_users
+
+
+async def test_bulk_create_reports_each_failed_item(db, monkeypatch):
+    db.add(User(email="taken@example.com", hashed_password="x"))
+    await db.commit()
+
+    async def hash_many(passwords):
+        # The pool saturates after the first password
+        saturated = HashingPoolSaturated("busy")
+        return [f"hash:{passwords[0]}"] + [saturated for _ in passwords[1:]]
+
+    monkeypatch.setattr(password_hasher, "hash_many", hash_many)
+    items = list(enumerate([
+        UserCreate(email="new@example.com", password="secret-0"),
+        UserCreate(email="taken@example.com", password="secret-1"),
+        UserCreate(email="new@example.com", password="secret-2"),
+        UserCreate(email="later@example.com", password="secret-3"),
+    ]))
+
+    result = await bulk_create_users(db, items)
+
+    assert result["succeeded"] == 1
+    assert [(e["index"], e["detail"]) for e in result["errors"]] == [
+        (1, "Email already registered"),
+        (2, "Duplicate email in request"),
+        (3, "Server busy, password not hashed; retry this item"),
+    ]
+    created = await db.get(User, result["ids"][0])
+    assert created.email == "new@example.com"
+    assert created.hashed_password == "hash:secret-0"
+    emails = (await db.execute(select(User.email))).scalars().all()
+    assert sorted(emails) == ["new@example.com", "taken@example.com"]
+
+
+async def test_hash_many_stops_after_saturation(monkeypatch):
+    calls = []
+
+    async def hash(password):
+        calls.append(password)
+        if password == "b":
+            raise HashingPoolSaturated("busy")
+        return f"hash:{password}"
+
+    monkeypatch.setattr(password_hasher, "max_workers", 2)
+    monkeypatch.setattr(password_hasher, "hash", hash)
+
+    results = await password_hasher.hash_many(["a", "b", "c", "d"])
+
+    assert results[0] == "hash:a"
+    assert all(isinstance(result, HashingPoolSaturated) for result in results[1:])
+    assert calls == ["a", "b"]
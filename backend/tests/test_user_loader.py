@@ -0,0 +1,57 @@
+import asyncio
+
+import pytest
+
+from app.core.config import settings
+from app.schemas.user import UserCreate
+from app.services.user import create_user
+from app.services.user_loader import UserLoader
+
+
+@pytest.fixture
+async def users(db):
+    return [
+        await create_user(db, UserCreate(email=f"loader{n}@example.com", password="pw"))
+        for n in range(3)
+    ]
+
+
+async def test_concurrent_loads_share_one_query(db, users):
+    loader = UserLoader(db)
+    ids = [users[0].id, users[1].id, users[0].id, 999999]
+    loaded = await loader.load_many(ids)
+    assert loaded == [users[0], users[1], users[0], None]
+    assert loader.queries == 1
+
+
+async def test_loaded_users_are_remembered_by_id_and_email(db, users):
+    loader = UserLoader(db)
+    user = await loader.load(users[2].id)
+    assert await loader.load_by_email("loader2@example.com") is user
+    assert await loader.load(users[2].id) is user
+    # Misses are remembered too
+    assert await loader.load(999999) is None
+    assert await loader.load(999999) is None
+    assert loader.queries == 2
+
+    loader.forget(user)
+    assert await loader.load(users[2].id) is user
+    assert loader.queries == 3
+
+
+async def test_loads_by_id_and_email_batch_separately(db, users):
+    loader = UserLoader(db)
+    by_id, by_email, other = await asyncio.gather(
+        loader.load(users[0].id),
+        loader.load_by_email("loader1@example.com"),
+        loader.load_by_email("loader2@example.com"),
+    )
+    assert (by_id, by_email, other) == (users[0], users[1], users[2])
+    assert loader.queries == 2
+
+
+async def test_large_batches_are_chunked(db, users, monkeypatch):
+    monkeypatch.setattr(settings, "USERS_BULK_BATCH_SIZE", 2)
+    loader = UserLoader(db)
+    assert await loader.load_many(user.id for user in users) == users
+    assert loader.queries == 2